@@ -47,6 +47,8 @@ class BaseBarFeed(feed.BaseFeed):
         super(BaseBarFeed, self).__init__(maxLen)
         self.__frequency = frequency
         self.__useAdjustedValues = False
+        self.__dtype = None
+        self.__memMap = False
         self.__defaultInstrument = None
         self.__currentBars = None
         self.__lastBars = {}
@@ -65,6 +67,29 @@ class BaseBarFeed(feed.BaseFeed):
         for instrument in self.getRegisteredInstruments():
             self[instrument].setUseAdjustedValues(useAdjusted)
 
+    def setDataSeriesDType(self, dtype):
+        """Sets the data-type used by the :class:`pyalgotrade.dataseries.bards.BarDataSeries` to store open, high, low,
+        close, volume and adjusted close values. Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+
+        .. note::
+            This must be called before registering instruments.
+        """
+        if len(self.getRegisteredInstruments()):
+            raise Exception("The data-type can't be changed once instruments were registered")
+        self.__dtype = dtype
+
+    def setDataSeriesMemMap(self, memMap):
+        """Sets whether :class:`pyalgotrade.dataseries.bards.BarDataSeries` hold all the open, high, low, close, volume
+        and adjusted close values in memory mapped temporary files. Check
+        :class:`pyalgotrade.dataseries.bards.BarDataSeries`.
+
+        .. note::
+            This must be called before registering instruments.
+        """
+        if len(self.getRegisteredInstruments()):
+            raise Exception("Memory mapping can't be changed once instruments were registered")
+        self.__memMap = memMap
+
     # Return the datetime for the current bars.
     @abc.abstractmethod
     def getCurrentDateTime(self):
@@ -86,7 +111,7 @@ class BaseBarFeed(feed.BaseFeed):
         raise NotImplementedError()
 
     def createDataSeries(self, key, maxLen):
-        ret = bards.BarDataSeries(maxLen)
+        ret = bards.BarDataSeries(maxLen, self.__dtype, self.__memMap)
         ret.setUseAdjustedValues(self.__useAdjustedValues)
         return ret
 
@@ -23,6 +23,7 @@ import six
 from pyalgotrade import barfeed
 from pyalgotrade import bar
 from pyalgotrade import utils
+from pyalgotrade.dataseries import bards
 
 
 # A non real-time BarFeed responsible for:
@@ -114,6 +115,29 @@ class BarFeed(barfeed.BaseBarFeed):
         self.__currDateTime = smallestDateTime
         return bar.Bars(ret)
 
+    def preload(self, eventBasedFilter):
+        """Calculates, in a single batch, the values of a filter for all the bars that were not dispatched yet, so
+        they're just replayed as the bars get dispatched. Check :meth:`pyalgotrade.technical.EventBasedFilter.preload`.
+
+        :param eventBasedFilter: A filter over the :class:`pyalgotrade.dataseries.bards.BarDataSeries` for one of the
+            instruments, or over one of its fields, like the close prices.
+        :type eventBasedFilter: :class:`pyalgotrade.technical.EventBasedFilter`.
+        """
+        dataSeries = eventBasedFilter.getDataSeries()
+        barDataSeries = dataSeries
+        if isinstance(dataSeries, bards.BarFieldDataSeries):
+            barDataSeries = dataSeries.getBarDataSeries()
+
+        for instrument, bars in six.iteritems(self.__bars):
+            if self.getDataSeries(instrument) is barDataSeries:
+                bars = bars[self.__nextPos[instrument]:]
+                values = bars
+                if barDataSeries is not dataSeries:
+                    values = dataSeries.getValuesFromBars(bars)
+                eventBasedFilter.preload([b.getDateTime() for b in bars], values)
+                return
+        raise Exception("The filter is not over the bars from this feed")
+
     def loadAll(self):
         for dateTime, bars in self:
             pass
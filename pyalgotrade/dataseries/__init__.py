@@ -20,11 +20,13 @@
 
 import abc
 
+import numpy as np
 import six
 from six.moves import xrange
 
 from pyalgotrade import observer
 from pyalgotrade.utils import collections
+from pyalgotrade.utils import dt
 
 DEFAULT_MAX_LEN = 1024
 
@@ -71,6 +73,27 @@ class DataSeries(object):
     def getValueAbsolute(self, pos):
         raise NotImplementedError()
 
+    def asarray(self, start=None, stop=None, dtype=None):
+        """Returns a numpy.array with the values in the [start, stop) range. Positions are interpreted like in slices.
+
+        :param start: The first position. If None, the array starts with the first value.
+        :type start: int.
+        :param stop: The position after the last one. If None, the array ends with the last value.
+        :type stop: int.
+        :param dtype: The desired data-type for the array. None values are converted to NaN for floating point
+            data-types.
+        :type dtype: data-type.
+
+        .. note::
+            Subclasses that store values in numpy arrays return views when possible. Those should not be modified.
+        """
+        return np.array(self[start:stop], dtype=dtype)
+
+    def tail(self, count, dtype=None):
+        """Returns a numpy.array with the last count values, or less if there are not enough values.
+        Check :meth:`asarray`."""
+        return self.asarray(max(len(self) - count, 0), None, dtype)
+
     @abc.abstractmethod
     def getDateTimes(self):
         """Returns a list of :class:`datetime.datetime` associated with each value."""
@@ -84,15 +107,38 @@ class SequenceDataSeries(DataSeries):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, values are stored in a numpy array of this data-type, and datetimes as int64 nanoseconds
+        since the epoch, instead of holding Python objects. None values are stored as NaN for floating point data-types.
+    :type dtype: data-type.
+    :param memMap: True to hold all the values, without a maximum length, in memory mapped temporary files. Recent
+        values stay in memory while older ones are only loaded when accessed. If dtype is None, float is used.
+    :type memMap: boolean.
     """
 
-    def __init__(self, maxLen=None):
+    def __init__(self, maxLen=None, dtype=None, memMap=False):
         super(SequenceDataSeries, self).__init__()
         maxLen = get_checked_max_len(maxLen)
 
         self.__newValueEvent = observer.Event()
-        self.__values = collections.ListDeque(maxLen)
-        self.__dateTimes = collections.ListDeque(maxLen)
+        self.__newValuesEvent = observer.Event()
+        if memMap and dtype is None:
+            dtype = float
+        self.__dtype = dtype
+        self.__memMap = memMap
+        self.__values, self.__dateTimes = self.__buildStorage(maxLen)
+
+    # Returns the deques for the values and the datetimes.
+    def __buildStorage(self, maxLen):
+        if self.__memMap:
+            values = collections.TypedDeque(None, self.__dtype, collections.MemMapDeque(self.__dtype))
+            dateTimes = collections.DateTimeDeque(None, collections.MemMapDeque(np.int64))
+        elif self.__dtype is None:
+            values = collections.ListDeque(maxLen)
+            dateTimes = collections.ListDeque(maxLen)
+        else:
+            values = collections.TypedDeque(maxLen, self.__dtype)
+            dateTimes = collections.DateTimeDeque(maxLen)
+        return values, dateTimes
 
     def __len__(self):
         return len(self.__values)
@@ -106,7 +152,7 @@ class SequenceDataSeries(DataSeries):
         self.__dateTimes.resize(maxLen)
 
     def getMaxLen(self):
-        """Returns the maximum number of values to hold."""
+        """Returns the maximum number of values to hold, or None if values are memory mapped."""
         return self.__values.getMaxLen()
 
     # Event handler receives:
@@ -116,6 +162,16 @@ class SequenceDataSeries(DataSeries):
     def getNewValueEvent(self):
         return self.__newValueEvent
 
+    # Event emitted by extendWithDateTimes when all the subscribers to the new value event can handle batches.
+    # Event handler receives:
+    # 1: Dataseries generating the event
+    # 2: A sequence with the datetimes for the new values
+    # 3: A sequence with the new values
+    #
+    # Subscribers to this event must also be subscribed to the new value event.
+    def getNewValuesEvent(self):
+        return self.__newValuesEvent
+
     def getValueAbsolute(self, pos):
         ret = None
         if pos >= 0 and pos < len(self.__values):
@@ -143,5 +199,94 @@ class SequenceDataSeries(DataSeries):
 
         self.getNewValueEvent().emit(self, dateTime, value)
 
+    def extendWithDateTimes(self, dateTimes, values):
+        """
+        Appends many values with their associated datetimes.
+
+        If every subscriber to the new value event also handles batches, a single new values event is emitted.
+        If not, the new value event is emitted for each value.
+
+        .. note::
+            Datetimes that are not None must be greater than the previous ones.
+        """
+
+        if len(dateTimes) != len(values):
+            raise Exception("The number of datetimes and values doesn't match")
+
+        # Validate all datetimes before adding anything.
+        checkLast = len(self.__dateTimes) != 0
+        lastDateTime = self.__dateTimes[-1] if checkLast else None
+        for dateTime in dateTimes:
+            if dateTime is not None and checkLast and lastDateTime >= dateTime:
+                raise Exception("Invalid datetime. It must be bigger than that last one")
+            lastDateTime = dateTime
+            checkLast = True
+
+        assert(len(self.__values) == len(self.__dateTimes))
+        self.__dateTimes.extend(dateTimes)
+        self.__values.extend(values)
+
+        if self.__newValuesEvent.getSubscriberCount() == self.__newValueEvent.getSubscriberCount():
+            if self.__newValuesEvent.hasSubscribers():
+                self.__newValuesEvent.emit(self, dateTimes, values)
+        else:
+            for dateTime, value in zip(dateTimes, values):
+                self.__newValueEvent.emit(self, dateTime, value)
+
     def getDateTimes(self):
         return self.__dateTimes.data()
+
+    def getState(self):
+        """Returns a picklable dictionary with the values and the datetimes, that can be used to restore them using
+        :meth:`setState`."""
+        return {"dateTimes": list(self.__dateTimes[:]), "values": list(self.__values[:])}
+
+    def setState(self, state):
+        """Replaces the values and the datetimes with the ones returned by :meth:`getState`.
+        No new value events are emitted.
+
+        :param state: The state returned by :meth:`getState`.
+        :type state: dict.
+        """
+        values, dateTimes = self.__buildStorage(self.getMaxLen())
+        dateTimes.extend(state["dateTimes"])
+        values.extend(state["values"])
+        self.__values = values
+        self.__dateTimes = dateTimes
+
+    def asarray(self, start=None, stop=None, dtype=None):
+        if self.__dtype is None:
+            return np.array(self.__values[start:stop], dtype=dtype)
+        ret = self.__values.array()[start:stop]
+        if dtype is not None and ret.dtype != dtype:
+            ret = ret.astype(dtype)
+        return ret
+
+    def getDType(self):
+        """Returns the data-type used to store values, or None if values are stored as Python objects."""
+        return self.__dtype
+
+    def values(self):
+        """Returns a numpy.array with the values.
+
+        .. note::
+            If a dtype was set, the array is a view over the internal buffer and it should not be modified.
+        """
+        if self.__dtype is None:
+            return np.array(self.__values[:])
+        return self.__values.array()
+
+    def timestamps(self):
+        """Returns a numpy.array of int64 with the datetimes as nanoseconds since the epoch.
+        Missing datetimes are set to numpy.iinfo(numpy.int64).min.
+
+        .. note::
+            If a dtype was set, the array is a view over the internal buffer and it should not be modified.
+        """
+        if self.__dtype is None:
+            return np.array(
+                [collections.DateTimeDeque.NULL if dateTime is None else dt.datetime_to_nanoseconds(dateTime)
+                    for dateTime in self.__dateTimes.data()],
+                dtype=np.int64
+            )
+        return self.__dateTimes.array()
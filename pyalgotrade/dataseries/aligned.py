@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import heapq
+
 from pyalgotrade import dataseries
 
 
@@ -34,62 +36,67 @@ def datetime_aligned(ds1, ds2, maxLen=None):
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
     """
-    aligned1 = dataseries.SequenceDataSeries(maxLen)
-    aligned2 = dataseries.SequenceDataSeries(maxLen)
-    Syncer(ds1, ds2, aligned1, aligned2)
+    aligned1, aligned2 = multi_datetime_aligned([ds1, ds2], maxLen)
     return (aligned1, aligned2)
 
 
-# This class is responsible for filling 2 dataseries when 2 other dataseries get new values.
-class Syncer(object):
-    def __init__(self, sourceDS1, sourceDS2, destDS1, destDS2):
-        self.__values1 = []  # (datetime, value)
-        self.__values2 = []  # (datetime, value)
-        self.__destDS1 = destDS1
-        self.__destDS2 = destDS2
-        sourceDS1.getNewValueEvent().subscribe(self.__onNewValue1)
-        sourceDS2.getNewValueEvent().subscribe(self.__onNewValue2)
+def multi_datetime_aligned(dataSeries, maxLen=None):
+    """
+    Returns a list of dataseries that exhibit only those values whose datetimes are in all the dataseries.
+
+    :param dataSeries: A list of DataSeries instances.
+    :type dataSeries: list.
+    :param maxLen: The maximum number of values to hold for the returned :class:`DataSeries`.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+    ret = [dataseries.SequenceDataSeries(maxLen) for ds in dataSeries]
+    MultiSyncer(dataSeries, ret)
+    return ret
+
+
+# This class is responsible for filling N dataseries when N other dataseries get new values.
+# Values waiting for the other dataseries are indexed by datetime, so each new value is matched in O(1). Since the
+# source dataseries are sorted by datetime, once a datetime is matched, pending values for previous datetimes can be
+# discarded because they will never be matched.
+class MultiSyncer(object):
+    def __init__(self, sourceDS, destDS):
+        assert len(sourceDS) == len(destDS)
+        assert len(sourceDS) > 0
+
+        self.__destDS = destDS
+        # datetime -> [values, number of values set]
+        self.__pending = {}
+        # Heap with the datetimes in self.__pending, to discard them in order.
+        self.__pendingDateTimes = []
+        for i, ds in enumerate(sourceDS):
+            ds.getNewValueEvent().subscribe(self.__buildHandler(i))
         # Source dataseries will keep a reference to self and that will prevent from getting this destroyed.
 
-    # Scan backwards for the position of dateTime in ds.
-    def __findPosForDateTime(self, values, dateTime):
-        ret = None
-        i = len(values) - 1
-        while i >= 0:
-            if values[i][0] == dateTime:
-                ret = i
-                break
-            elif values[i][0] < dateTime:
-                break
-            i -= 1
-        return ret
-
-    def __onNewValue1(self, dataSeries, dateTime, value):
-        pos2 = self.__findPosForDateTime(self.__values2, dateTime)
-        # If a value for dateTime was added to first dataseries, and a value for that same datetime is also in the second one
-        # then append to both destination dataseries.
-        if pos2 is not None:
-            self.__append(dateTime, value, self.__values2[pos2][1])
-            # Reset buffers.
-            self.__values1 = []
-            self.__values2 = self.__values2[pos2+1:]
-        else:
-            # Since source dataseries may not hold all the values we need, we need to buffer manually.
-            self.__values1.append((dateTime, value))
-
-    def __onNewValue2(self, dataSeries, dateTime, value):
-        pos1 = self.__findPosForDateTime(self.__values1, dateTime)
-        # If a value for dateTime was added to second dataseries, and a value for that same datetime is also in the first one
-        # then append to both destination dataseries.
-        if pos1 is not None:
-            self.__append(dateTime, self.__values1[pos1][1], value)
-            # Reset buffers.
-            self.__values1 = self.__values1[pos1+1:]
-            self.__values2 = []
-        else:
-            # Since source dataseries may not hold all the values we need, we need to buffer manually.
-            self.__values2.append((dateTime, value))
-
-    def __append(self, dateTime, value1, value2):
-        self.__destDS1.appendWithDateTime(dateTime, value1)
-        self.__destDS2.appendWithDateTime(dateTime, value2)
+    def __buildHandler(self, pos):
+        def handler(dataSeries, dateTime, value):
+            self.__onNewValue(pos, dateTime, value)
+        return handler
+
+    def __onNewValue(self, pos, dateTime, value):
+        entry = self.__pending.get(dateTime)
+        if entry is None:
+            entry = [[None] * len(self.__destDS), 0]
+            self.__pending[dateTime] = entry
+            heapq.heappush(self.__pendingDateTimes, dateTime)
+
+        entry[0][pos] = value
+        entry[1] += 1
+        if entry[1] == len(self.__destDS):
+            # Discard the matched datetime and the previous ones.
+            while self.__pendingDateTimes and self.__pendingDateTimes[0] <= dateTime:
+                del self.__pending[heapq.heappop(self.__pendingDateTimes)]
+            for destDS, alignedValue in zip(self.__destDS, entry[0]):
+                destDS.appendWithDateTime(dateTime, alignedValue)
+
+
+# This class is responsible for filling 2 dataseries when 2 other dataseries get new values.
+class Syncer(MultiSyncer):
+    def __init__(self, sourceDS1, sourceDS2, destDS1, destDS2):
+        super(Syncer, self).__init__([sourceDS1, sourceDS2], [destDS1, destDS2])
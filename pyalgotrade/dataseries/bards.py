@@ -19,27 +19,144 @@
 """
 
 from pyalgotrade import dataseries
+from pyalgotrade import observer
+from pyalgotrade.utils import collections
 
+import numpy as np
 import six
 
 
+class BarFieldDataSeries(dataseries.DataSeries):
+    """A read-only DataSeries with one of the values, like the close price, of the bars in a
+    :class:`BarDataSeries`. Values are stored by the :class:`BarDataSeries`, and datetimes are shared with it, or
+    with the other fields if they are memory mapped.
+
+    .. note::
+        This class should not be instantiated directly. Use the getters in :class:`BarDataSeries` instead.
+    """
+
+    def __init__(self, barDataSeries, values, getter, dateTimes=None):
+        super(BarFieldDataSeries, self).__init__()
+        self.__barDataSeries = barDataSeries
+        self.__values = values
+        # Returns the value from a bar.
+        self.__getter = getter
+        # If None, the datetimes from barDataSeries are used.
+        self.__dateTimes = dateTimes
+        self.__newValueEvent = observer.Event()
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __getitem__(self, key):
+        return self.__values[key]
+
+    def getMaxLen(self):
+        return self.__values.getMaxLen()
+
+    # Event handler receives:
+    # 1: Dataseries generating the event
+    # 2: The datetime for the new value
+    # 3: The new value
+    def getNewValueEvent(self):
+        return self.__newValueEvent
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self.__values):
+            ret = self.__values[pos]
+        return ret
+
+    def getDateTimes(self):
+        if self.__dateTimes is None:
+            return self.__barDataSeries.getDateTimes()
+        return self.__dateTimes.data()
+
+    def asarray(self, start=None, stop=None, dtype=None):
+        if self.__barDataSeries.getDType() is None:
+            return np.array(self.__values[start:stop], dtype=dtype)
+        ret = self.__values.array()[start:stop]
+        if dtype is not None and ret.dtype != dtype:
+            ret = ret.astype(dtype)
+        return ret
+
+    def getDType(self):
+        return self.__barDataSeries.getDType()
+
+    def values(self):
+        """Returns a numpy.array with the values.
+
+        .. note::
+            If a dtype was set, the array is a view over the internal buffer and it should not be modified.
+        """
+        if self.__barDataSeries.getDType() is None:
+            return np.array(self.__values[:])
+        return self.__values.array()
+
+    def timestamps(self):
+        if self.__dateTimes is None:
+            return self.__barDataSeries.timestamps()
+        return self.__dateTimes.array()
+
+    def setValues(self, values, dateTimes=None):
+        # Used by BarDataSeries when its columns get replaced.
+        self.__values = values
+        self.__dateTimes = dateTimes
+
+    def getBarDataSeries(self):
+        """Returns the :class:`BarDataSeries` that holds the values."""
+        return self.__barDataSeries
+
+    def getValuesFromBars(self, bars):
+        """Returns a list with the value of this field for each bar.
+
+        :param bars: The bars.
+        :type bars: list of :class:`pyalgotrade.bar.Bar`.
+        """
+        return [self.__getter(bar) for bar in bars]
+
+    def emitNewValue(self, dateTime):
+        # Skip reading the value back if no one is listening.
+        if self.__newValueEvent.hasSubscribers():
+            self.__newValueEvent.emit(self, dateTime, self.__values[-1])
+
+
 class BarDataSeries(dataseries.SequenceDataSeries):
     """A DataSeries of :class:`pyalgotrade.bar.Bar` instances.
 
+    Open, high, low, close, volume and adjusted close values are stored in columns that share the datetimes of this
+    DataSeries. The DataSeries for each of those are built on demand, and only emit new value events when there are
+    subscribers.
+
     :param maxLen: The maximum number of values to hold.
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store open, high, low, close, volume and adjusted close values.
+        If None, values are stored as Python objects.
+    :type dtype: data-type.
+    :param memMap: True to hold all the open, high, low, close, volume and adjusted close values, without a maximum
+        length, in a single memory mapped temporary file. Bars are still held in memory up to maxLen.
+        If dtype is None, float is used.
+    :type memMap: boolean.
     """
 
-    def __init__(self, maxLen=None):
+    def __init__(self, maxLen=None, dtype=None, memMap=False):
         super(BarDataSeries, self).__init__(maxLen)
-        self.__openDS = dataseries.SequenceDataSeries(maxLen)
-        self.__closeDS = dataseries.SequenceDataSeries(maxLen)
-        self.__highDS = dataseries.SequenceDataSeries(maxLen)
-        self.__lowDS = dataseries.SequenceDataSeries(maxLen)
-        self.__volumeDS = dataseries.SequenceDataSeries(maxLen)
-        self.__adjCloseDS = dataseries.SequenceDataSeries(maxLen)
+        maxLen = self.getMaxLen()
+        if memMap and dtype is None:
+            dtype = float
+        self.__dtype = dtype
+        self.__memMap = memMap
+        self.__buildColumns(maxLen)
+        self.__openDS = None
+        self.__highDS = None
+        self.__lowDS = None
+        self.__closeDS = None
+        self.__volumeDS = None
+        self.__adjCloseDS = None
+        # BarFieldDataSeries built so far.
+        self.__fieldDS = []
         self.__extraDS = {}
         self.__useAdjustedValues = False
 
@@ -50,9 +167,55 @@ class BarDataSeries(dataseries.SequenceDataSeries):
             self.__extraDS[name] = ret
         return ret
 
+    def __buildColumns(self, maxLen):
+        # Columns get their own datetimes when they can hold more values than this dataseries.
+        self.__fieldDateTimes = None
+        # All the memory mapped columns are stored in a single file.
+        self.__table = None
+        if self.__memMap:
+            fields = [(name, self.__dtype) for name in ["open", "high", "low", "close", "volume", "adjClose"]]
+            self.__table = collections.MemMapTable([("dateTime", np.int64)] + fields)
+            self.__fieldDateTimes = collections.DateTimeDeque(None, self.__table.getField("dateTime"))
+        self.__open = self.__buildColumn(maxLen, "open")
+        self.__high = self.__buildColumn(maxLen, "high")
+        self.__low = self.__buildColumn(maxLen, "low")
+        self.__close = self.__buildColumn(maxLen, "close")
+        self.__volume = self.__buildColumn(maxLen, "volume")
+        self.__adjClose = self.__buildColumn(maxLen, "adjClose")
+
+    # Returns the columns along with the DataSeries built for them, if any.
+    def __getColumns(self):
+        return [
+            (self.__open, self.__openDS), (self.__high, self.__highDS), (self.__low, self.__lowDS),
+            (self.__close, self.__closeDS), (self.__volume, self.__volumeDS), (self.__adjClose, self.__adjCloseDS),
+        ]
+
+    def __buildColumn(self, maxLen, name):
+        if self.__memMap:
+            return collections.TypedDeque(None, self.__dtype, self.__table.getField(name))
+        elif self.__dtype is None:
+            # Values are read on every bar, and indexing a list is a lot faster than indexing an object array.
+            return collections.BoundedList(maxLen)
+        else:
+            return collections.TypedDeque(maxLen, self.__dtype)
+
+    def __buildFieldDS(self, values, getter):
+        ret = BarFieldDataSeries(self, values, getter, self.__fieldDateTimes)
+        self.__fieldDS.append(ret)
+        return ret
+
     def setUseAdjustedValues(self, useAdjusted):
         self.__useAdjustedValues = useAdjusted
 
+    def setMaxLen(self, maxLen):
+        super(BarDataSeries, self).setMaxLen(maxLen)
+        for values in [self.__open, self.__high, self.__low, self.__close, self.__volume, self.__adjClose]:
+            values.resize(maxLen)
+
+    def getDType(self):
+        """Returns the data-type used to store open, high, low, close, volume and adjusted close values."""
+        return self.__dtype
+
     def append(self, bar):
         self.appendWithDateTime(bar.getDateTime(), bar)
 
@@ -63,48 +226,110 @@ class BarDataSeries(dataseries.SequenceDataSeries):
 
         super(BarDataSeries, self).appendWithDateTime(dateTime, bar)
 
-        self.__openDS.appendWithDateTime(dateTime, bar.getOpen())
-        self.__closeDS.appendWithDateTime(dateTime, bar.getClose())
-        self.__highDS.appendWithDateTime(dateTime, bar.getHigh())
-        self.__lowDS.appendWithDateTime(dateTime, bar.getLow())
-        self.__volumeDS.appendWithDateTime(dateTime, bar.getVolume())
-        self.__adjCloseDS.appendWithDateTime(dateTime, bar.getAdjClose())
+        if self.__fieldDateTimes is not None:
+            self.__fieldDateTimes.append(dateTime)
+        self.__open.append(bar.getOpen())
+        self.__high.append(bar.getHigh())
+        self.__low.append(bar.getLow())
+        self.__close.append(bar.getClose())
+        self.__volume.append(bar.getVolume())
+        self.__adjClose.append(bar.getAdjClose())
+        for fieldDS in self.__fieldDS:
+            fieldDS.emitNewValue(dateTime)
 
         # Process extra columns.
         for name, value in six.iteritems(bar.getExtraColumns()):
             extraDS = self.__getOrCreateExtraDS(name)
             extraDS.appendWithDateTime(dateTime, value)
 
+    def extendWithDateTimes(self, dateTimes, bars):
+        # Bars are added one at a time since each one has to be split into columns.
+        if len(dateTimes) != len(bars):
+            raise Exception("The number of datetimes and values doesn't match")
+        for dateTime, bar in zip(dateTimes, bars):
+            self.appendWithDateTime(dateTime, bar)
+
+    def getState(self):
+        """Returns a picklable dictionary with the bars, the datetimes and the extra columns, that can be used to
+        restore them using :meth:`setState`. If values are memory mapped, all of them are included."""
+        ret = super(BarDataSeries, self).getState()
+        ret["extra"] = dict((name, extraDS.getState()) for name, extraDS in six.iteritems(self.__extraDS))
+        if self.__memMap:
+            ret["fieldDateTimes"] = list(self.__fieldDateTimes[:])
+            ret["fields"] = [list(values[:]) for values, fieldDS in self.__getColumns()]
+        return ret
+
+    def setState(self, state):
+        """Replaces the bars, the datetimes and the extra columns with the ones returned by :meth:`getState`.
+        Open, high, low, close, volume and adjusted close values are rebuilt from the bars.
+        No new value events are emitted.
+
+        :param state: The state returned by :meth:`getState` for a BarDataSeries built with the same parameters.
+        :type state: dict.
+        """
+        super(BarDataSeries, self).setState(state)
+        self.__buildColumns(self.getMaxLen())
+        bars = self[:]
+        if self.__memMap:
+            self.__fieldDateTimes.extend(state["fieldDateTimes"])
+            for (values, fieldDS), fieldValues in zip(self.__getColumns(), state["fields"]):
+                values.extend(fieldValues)
+        else:
+            self.__open.extend([bar.getOpen() for bar in bars])
+            self.__high.extend([bar.getHigh() for bar in bars])
+            self.__low.extend([bar.getLow() for bar in bars])
+            self.__close.extend([bar.getClose() for bar in bars])
+            self.__volume.extend([bar.getVolume() for bar in bars])
+            self.__adjClose.extend([bar.getAdjClose() for bar in bars])
+        for values, fieldDS in self.__getColumns():
+            if fieldDS is not None:
+                fieldDS.setValues(values, self.__fieldDateTimes)
+
+        for name, extraState in six.iteritems(state["extra"]):
+            self.__getOrCreateExtraDS(name).setState(extraState)
+
     def getOpenDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the open prices."""
+        if self.__openDS is None:
+            self.__openDS = self.__buildFieldDS(self.__open, lambda bar: bar.getOpen())
         return self.__openDS
 
     def getCloseDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the close prices."""
+        if self.__closeDS is None:
+            self.__closeDS = self.__buildFieldDS(self.__close, lambda bar: bar.getClose())
         return self.__closeDS
 
     def getHighDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the high prices."""
+        if self.__highDS is None:
+            self.__highDS = self.__buildFieldDS(self.__high, lambda bar: bar.getHigh())
         return self.__highDS
 
     def getLowDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the low prices."""
+        if self.__lowDS is None:
+            self.__lowDS = self.__buildFieldDS(self.__low, lambda bar: bar.getLow())
         return self.__lowDS
 
     def getVolumeDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the volume."""
+        if self.__volumeDS is None:
+            self.__volumeDS = self.__buildFieldDS(self.__volume, lambda bar: bar.getVolume())
         return self.__volumeDS
 
     def getAdjCloseDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the adjusted close prices."""
+        if self.__adjCloseDS is None:
+            self.__adjCloseDS = self.__buildFieldDS(self.__adjClose, lambda bar: bar.getAdjClose())
         return self.__adjCloseDS
 
     def getPriceDataSeries(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the close or adjusted close prices."""
         if self.__useAdjustedValues:
-            return self.__adjCloseDS
+            return self.getAdjCloseDataSeries()
         else:
-            return self.__closeDS
+            return self.getCloseDataSeries()
 
     def getExtraDataSeries(self, name):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` for an extra column."""
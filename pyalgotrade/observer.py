@@ -19,6 +19,7 @@
 """
 
 import abc
+import timeit
 
 import six
 
@@ -26,51 +27,123 @@ from pyalgotrade import dispatchprio
 
 
 class Event(object):
+    # Handlers are kept in a tuple that gets replaced on subscribe/unsubscribe. Since emit iterates over the tuple that
+    # was there when it started, handlers can subscribe/unsubscribe while emitting without any extra bookkeeping, and
+    # changes take effect on the next emission. That includes emissions nested in the current one, since there is no
+    # need to wait for the outermost emission to finish.
+    __profiler = None
+
     def __init__(self):
-        self.__handlers = []
-        self.__deferred = []
-        self.__emitting = 0
+        self.__handlers = ()
 
-    def __subscribeImpl(self, handler):
-        assert not self.__emitting
+    def subscribe(self, handler):
         if handler not in self.__handlers:
-            self.__handlers.append(handler)
-
-    def __unsubscribeImpl(self, handler):
-        assert not self.__emitting
-        self.__handlers.remove(handler)
+            self.__handlers = self.__handlers + (handler,)
 
-    def __applyChanges(self):
-        assert not self.__emitting
-        for action, param in self.__deferred:
-            action(param)
-        self.__deferred = []
+    def unsubscribe(self, handler):
+        handlers = list(self.__handlers)
+        handlers.remove(handler)
+        self.__handlers = tuple(handlers)
 
-    def subscribe(self, handler):
-        if self.__emitting:
-            self.__deferred.append((self.__subscribeImpl, handler))
-        elif handler not in self.__handlers:
-            self.__subscribeImpl(handler)
+    def __emit(self, *args, **kwargs):
+        for handler in self.__handlers:
+            handler(*args, **kwargs)
 
-    def unsubscribe(self, handler):
-        if self.__emitting:
-            self.__deferred.append((self.__unsubscribeImpl, handler))
-        else:
-            self.__unsubscribeImpl(handler)
+    emit = __emit
 
-    def emit(self, *args, **kwargs):
-        try:
-            self.__emitting += 1
-            for handler in self.__handlers:
+    def __profiledEmit(self, *args, **kwargs):
+        profiler = Event.__profiler
+        for handler in self.__handlers:
+            begin = timeit.default_timer()
+            try:
                 handler(*args, **kwargs)
-        finally:
-            self.__emitting -= 1
-            if not self.__emitting:
-                self.__applyChanges()
+            finally:
+                profiler.addCall(handler, timeit.default_timer() - begin)
 
     def hasSubscribers(self):
         return bool(self.__handlers)
 
+    def getSubscriberCount(self):
+        return len(self.__handlers)
+
+    @staticmethod
+    def setProfiler(profiler):
+        # The emit implementation is swapped for every event, in every thread, so there is no overhead when profiling is
+        # disabled. Use HandlerProfiler as a context manager to make sure that the original one gets restored.
+        assert profiler is None or Event.__profiler is None, "There is already a profiler running"
+        Event.__profiler = profiler
+        Event.emit = Event.__emit if profiler is None else Event.__profiledEmit
+
+
+class HandlerProfiler(object):
+    """Records the number of calls and the cumulative time spent in every event handler while running.
+    Time spent in nested handlers (for example, indicators that get updated when a dataseries is updated) is included
+    in the handler that triggered them.
+
+    It can be used as a context manager to profile a block of code, and profiling is stopped when the block exits,
+    even if an exception is raised::
+
+        profiler = observer.HandlerProfiler()
+        with profiler:
+            strat.run()
+        print(profiler.getStats())
+
+    .. note::
+        * Every :class:`Event` emission gets profiled, no matter which thread it comes from, so only one profiler can
+          be running at a time.
+        * If :meth:`start` is used instead, :meth:`stop` should be called in a finally block.
+    """
+
+    def __init__(self):
+        self.__stats = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+
+    def start(self):
+        """Starts profiling every :class:`Event` emission."""
+        Event.setProfiler(self)
+
+    def stop(self):
+        """Stops profiling."""
+        Event.setProfiler(None)
+
+    def addCall(self, handler, elapsed):
+        name = get_handler_name(handler)
+        stats = self.__stats.get(name)
+        if stats is None:
+            self.__stats[name] = [1, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+
+    def getStats(self):
+        """Returns a list of (handler name, calls, cumulative time in seconds) tuples, sorted by cumulative time in
+        descending order."""
+        ret = [(name, stats[0], stats[1]) for name, stats in six.iteritems(self.__stats)]
+        ret.sort(key=lambda stats: stats[2], reverse=True)
+        return ret
+
+    def reset(self):
+        """Clears the recorded stats."""
+        self.__stats = {}
+
+
+# Builds a readable name for a handler. For bound methods the class name of the instance is used, so that handlers
+# from different indicators/analyzers can be told apart.
+def get_handler_name(handler):
+    instance = getattr(handler, "__self__", None)
+    name = getattr(handler, "__name__", None)
+    if name is None:
+        name = type(handler).__name__
+    if instance is not None:
+        name = "%s.%s" % (type(instance).__name__, name)
+    return name
+
 
 @six.add_metaclass(abc.ABCMeta)
 class Subject(object):
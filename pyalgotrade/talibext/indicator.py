@@ -26,11 +26,12 @@ import numpy
 def value_ds_to_numpy(ds, count):
     ret = None
     try:
-        values = ds[count*-1:]
-        ret = numpy.array([float(value) for value in values])
-    except IndexError:
-        pass
-    except TypeError:  # In case we try to convert None to float.
+        ret = ds.tail(count, float)
+        # None values are converted to NaN, but NaN values are valid too, so look for None values only if there are NaNs.
+        # DataSeries with a floating point dtype store None values as NaN, so those are returned as NaN.
+        if numpy.isnan(ret).any() and None in ds[count*-1:]:
+            ret = None
+    except TypeError:  # In case a value can't be converted to float.
         pass
     return ret
 
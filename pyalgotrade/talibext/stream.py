@@ -0,0 +1,141 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy
+from talib import abstract
+
+from pyalgotrade import dataseries
+from pyalgotrade.utils import collections
+
+
+# Functions that TA-Lib doesn't flag as having an unstable period, but that are built on top of EMAs.
+RECURSIVE_FUNCTIONS = ["DEMA", "TEMA", "TRIX", "MACD", "MACDFIX"]
+
+# Moving average types (matype parameters) that only use the values in the window: SMA, WMA and TRIMA.
+WINDOW_MA_TYPES = [0, 2, 5]
+
+
+def _get_function(talibFunc, **parameters):
+    ret = abstract.Function(talibFunc.__name__)
+    if parameters:
+        ret.set_parameters(parameters)
+    return ret
+
+
+# Returns the number of values that a TA-Lib function needs to calculate a value.
+def get_min_count(talibFunc, **parameters):
+    return _get_function(talibFunc, **parameters).lookback + 1
+
+
+# Returns True if the values calculated by a TA-Lib function depend on all the previous values, and not only on the
+# last get_min_count ones.
+def is_recursive(talibFunc, **parameters):
+    function = _get_function(talibFunc, **parameters)
+    flags = function.function_flags or []
+    if "Function has an unstable period" in flags or "Output is path-dependent" in flags:
+        return True
+    if function.info["name"] in RECURSIVE_FUNCTIONS:
+        return True
+    for name, value in function.parameters.items():
+        if name.endswith("matype") and value not in WINDOW_MA_TYPES:
+            return True
+    return False
+
+
+class TALibFilter(dataseries.SequenceDataSeries):
+    """A DataSeries that calls a TA-Lib function every time a new value is added to the input DataSeries, and holds the
+    last value that the function returns.
+
+    Instead of building numpy arrays from the input DataSeries on every call, like the functions in
+    :mod:`pyalgotrade.talibext.indicator` do, the last values are kept in numpy buffers that get updated as new values are
+    added.
+
+    :param inputs: The DataSeries instances to use as inputs for the TA-Lib function, in the order the function expects
+        them. If there is more than one, they should be updated together, like the open, high, low, close and volume
+        DataSeries of a :class:`pyalgotrade.dataseries.bards.BarDataSeries`, since the function is called when the last
+        one gets a new value.
+    :type inputs: list.
+    :param talibFunc: The TA-Lib function, for example talib.SMA.
+    :param count: The number of values to pass to the TA-Lib function. If None, the minimum number of values needed to
+        calculate a value is used. Functions that are calculated recursively, like EMA, RSI, ATR, ADX or MACD, use all
+        the previous values, so count must be set for those, and values will only be close to the ones calculated
+        using the whole history if count is big enough.
+    :type count: int.
+    :param output: The index of the output to hold, for TA-Lib functions with more than one output.
+    :type output: int.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param parameters: Keyword parameters for the TA-Lib function, for example timeperiod=14.
+    """
+
+    def __init__(self, inputs, talibFunc, count=None, output=0, maxLen=None, **parameters):
+        assert len(inputs) > 0, "No inputs"
+        super(TALibFilter, self).__init__(maxLen)
+
+        if count is None:
+            if is_recursive(talibFunc, **parameters):
+                raise Exception(
+                    "%s is calculated recursively, so the number of values to use must be set" % talibFunc.__name__
+                )
+            count = get_min_count(talibFunc, **parameters)
+        self.__inputs = inputs
+        self.__talibFunc = talibFunc
+        self.__output = output
+        self.__parameters = parameters
+        self.__buffers = [collections.NumPyDeque(count) for input_ in inputs]
+        self.__count = count
+
+        trigger = inputs[-1]
+        trigger.getNewValueEvent().subscribe(self.__onNewValue)
+        if len(inputs) == 1 and isinstance(trigger, dataseries.SequenceDataSeries):
+            trigger.getNewValuesEvent().subscribe(self.__onNewValues)
+
+    def __calculate(self, value):
+        # The last input sends the value in the event, and the rest are expected to be updated already.
+        # Inputs that don't have values yet are handled like missing values, so None is returned until all of them do.
+        for input_, buffer_ in zip(self.__inputs[:-1], self.__buffers[:-1]):
+            inputValue = input_[-1] if len(input_) else None
+            buffer_.append(numpy.nan if inputValue is None else inputValue)
+        self.__buffers[-1].append(numpy.nan if value is None else value)
+
+        ret = None
+        if len(self.__buffers[-1]) == self.__count:
+            args = [buffer_.data() for buffer_ in self.__buffers]
+            # TA-Lib can't handle missing values, just like talibext.indicator functions.
+            if not any(numpy.isnan(arg).any() for arg in args):
+                ret = self.__talibFunc(*args, **self.__parameters)
+                if isinstance(ret, tuple):
+                    ret = ret[self.__output]
+                ret = ret[-1]
+                if numpy.isnan(ret):
+                    ret = None
+        return ret
+
+    def __onNewValue(self, dataSeries, dateTime, value):
+        self.appendWithDateTime(dateTime, self.__calculate(value))
+
+    def __onNewValues(self, dataSeries, dateTimes, values):
+        self.extendWithDateTimes(dateTimes, [self.__calculate(value) for value in values])
+
+    def getCount(self):
+        """Returns the number of values passed to the TA-Lib function."""
+        return self.__count
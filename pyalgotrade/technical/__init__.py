@@ -18,10 +18,25 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import copy
+import inspect
+import os
+
+import numpy as np
+import six
+from six.moves import cPickle
+
 from pyalgotrade.utils import collections
 from pyalgotrade import dataseries
 
 
+# Returns a read-only 2D view with every window of windowSize consecutive values in a 1D numpy.array.
+def rolling_windows(values, windowSize):
+    count = max(len(values) - windowSize + 1, 0)
+    stride = values.strides[0]
+    return np.lib.stride_tricks.as_strided(values, shape=(count, windowSize), strides=(stride, stride), writeable=False)
+
+
 class EventWindow(object):
     """An EventWindow class is responsible for making calculation over a moving window of values.
 
@@ -47,6 +62,35 @@ class EventWindow(object):
         if value is not None or not self.__skipNone:
             self.__values.append(value)
 
+    def onNewValues(self, dateTimes, values):
+        """Processes many values at once and returns a list with the value calculated after each one.
+        If the values are all numbers, and :meth:`computeValues` is implemented, values are calculated in one shot.
+        Otherwise, values are processed one at a time using :meth:`onNewValue` and :meth:`getValue`.
+        """
+        ret = None
+        newValues = None
+        if self.__values.data().dtype.kind == "f":
+            try:
+                newValues = np.asarray(values, dtype=float)
+            except (TypeError, ValueError):  # There are values that are not numbers.
+                pass
+        # None values get converted to NaN. Those, and NaNs, are handled differently depending on the calculation, so
+        # they are left to the regular path.
+        if newValues is not None and newValues.ndim == 1 and not np.isnan(newValues).any():
+            ret = self.computeValues(np.concatenate((self.__values.data(), newValues)))
+
+        if ret is None:
+            ret = []
+            for dateTime, value in zip(dateTimes, values):
+                self.onNewValue(dateTime, value)
+                ret.append(self.getValue())
+        else:
+            self.__values.extend(newValues)
+            # Values are missing until the window is full.
+            ret = ret[-len(newValues):] if len(newValues) else []
+            ret = [None] * (len(newValues) - len(ret)) + list(ret)
+        return ret
+
     def getValues(self):
         """Returns a numpy.array with the values in the window."""
         return self.__values.data()
@@ -62,6 +106,29 @@ class EventWindow(object):
         """Override to calculate a value using the values in the window."""
         raise NotImplementedError()
 
+    def getState(self):
+        """Returns a picklable copy of the state of the window, including the values in the window and any other value
+        kept to calculate new values, that can be used to restore it using :meth:`setState`."""
+        return copy.deepcopy(self.__dict__)
+
+    def setState(self, state):
+        """Restores the state of the window from the one returned by :meth:`getState`.
+
+        :param state: The state returned by :meth:`getState` for a window built with the same parameters.
+        """
+        self.__dict__.update(copy.deepcopy(state))
+
+    def computeValues(self, values):
+        """Override to calculate many values at once using a vectorized implementation.
+        Implementations must leave the window in the same state as if the values were processed one at a time.
+
+        :param values: The values in the window followed by the new ones.
+        :type values: numpy.array.
+        :rtype: A sequence with one value for every window of :meth:`getWindowSize` consecutive values, or None if
+            values can't be calculated at once.
+        """
+        return None
+
 
 class EventBasedFilter(dataseries.SequenceDataSeries):
     """An EventBasedFilter class is responsible for capturing new values in a :class:`pyalgotrade.dataseries.DataSeries`
@@ -75,15 +142,41 @@ class EventBasedFilter(dataseries.SequenceDataSeries):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, eventWindow, maxLen=None):
-        super(EventBasedFilter, self).__init__(maxLen)
+    def __init__(self, dataSeries, eventWindow, maxLen=None, dtype=None):
+        super(EventBasedFilter, self).__init__(maxLen, dtype)
         self.__dataSeries = dataSeries
         self.__dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
+        if isinstance(dataSeries, dataseries.SequenceDataSeries):
+            self.__dataSeries.getNewValuesEvent().subscribe(self.__onNewValues)
         self.__eventWindow = eventWindow
+        self.__lazy = False
+        # New values waiting to be processed when lazy evaluation is enabled.
+        self.__pendingDateTimes = []
+        self.__pendingValues = []
+        # Values calculated in advance by preload, and the position of the next one to replay.
+        self.__preloaded = None
+        self.__preloadedPos = 0
+
+    # Values are queued only if no one needs to be notified about the new values.
+    def __deferUpdate(self):
+        return self.__lazy and not self.getNewValueEvent().hasSubscribers()
 
     def __onNewValue(self, dataSeries, dateTime, value):
+        if self.__preloaded is not None and self.__replay(dateTime, value):
+            return
+
+        if self.__deferUpdate():
+            self.__pendingDateTimes.append(dateTime)
+            self.__pendingValues.append(value)
+            self.__checkPending()
+            return
+
+        self.flush()
         # Let the event window perform calculations.
         self.__eventWindow.onNewValue(dateTime, value)
         # Get the resulting value
@@ -91,8 +184,298 @@ class EventBasedFilter(dataseries.SequenceDataSeries):
         # Add the new value.
         self.appendWithDateTime(dateTime, newValue)
 
+    def __onNewValues(self, dataSeries, dateTimes, values):
+        self.__stopReplay()
+        if self.__deferUpdate():
+            self.__pendingDateTimes.extend(dateTimes)
+            self.__pendingValues.extend(values)
+            self.__checkPending()
+            return
+
+        self.flush()
+        newValues = self.__eventWindow.onNewValues(dateTimes, values)
+        # Add all the new values at once so our subscribers get them in a batch too.
+        self.extendWithDateTimes(dateTimes, newValues)
+
+    # Appends the next preloaded value if it was calculated for this datetime and value, and returns True if so.
+    def __replay(self, dateTime, value):
+        dateTimes, values, newValues, eventWindow = self.__preloaded
+        pos = self.__preloadedPos
+        expected = values[pos]
+        if dateTime != dateTimes[pos] or (value is not expected and value != expected):
+            self.__stopReplay()
+            return False
+
+        self.__preloadedPos += 1
+        if self.__preloadedPos == len(values):
+            # The window that calculated the values is in the right state now.
+            self.__eventWindow.setState(eventWindow.getState())
+            self.__preloaded = None
+        self.appendWithDateTime(dateTime, newValues[pos])
+        return True
+
+    # Brings the event window up to date with the values replayed so far, and discards the rest.
+    def __stopReplay(self):
+        if self.__preloaded is not None:
+            dateTimes, values = self.__preloaded[0:2]
+            pos = self.__preloadedPos
+            self.__preloaded = None
+            if pos:
+                self.__eventWindow.onNewValues(dateTimes[:pos], values[:pos])
+
+    def preload(self, dateTimes, values):
+        """Calculates the values for the next values of the DataSeries being filtered before they are added, so that
+        they're just replayed as they arrive. This is useful when the whole history is known in advance, like when
+        using a :class:`pyalgotrade.barfeed.membf.BarFeed`. Check :meth:`pyalgotrade.barfeed.membf.BarFeed.preload`.
+
+        Values are calculated in a single batch using :meth:`EventWindow.onNewValues`, so they are calculated in one
+        shot only if the :class:`EventWindow` implements :meth:`EventWindow.computeValues`. Those are SMA, EMA, WMA,
+        RSI, StdDev, ZScore, RateOfChange, High and Low. Other windows, like the ones for ATR, VWAP and
+        StochasticOscillator, process the values one at a time when preloading.
+
+        If a value that doesn't match the preloaded ones arrives, the remaining preloaded values are discarded and new
+        values are calculated as usual.
+
+        :param dateTimes: The datetimes for the next values.
+        :type dateTimes: list.
+        :param values: The next values.
+        :type values: list.
+        """
+        if len(dateTimes) != len(values):
+            raise Exception("The number of datetimes and values doesn't match")
+
+        self.__stopReplay()
+        self.flush()
+        if len(values):
+            eventWindow = copy.deepcopy(self.__eventWindow)
+            newValues = eventWindow.onNewValues(dateTimes, values)
+            self.__preloaded = (list(dateTimes), list(values), newValues, eventWindow)
+            self.__preloadedPos = 0
+
+    # Queued values are processed once there are enough of them to fill this DataSeries, to bound memory usage.
+    def __checkPending(self):
+        maxLen = self.getMaxLen()
+        if maxLen is not None and len(self.__pendingValues) >= maxLen:
+            self.flush()
+
+    def setLazy(self, lazy):
+        """Enables or disables lazy evaluation.
+
+        When lazy evaluation is enabled, and there are no subscribers to the new value event, new values from the
+        DataSeries being filtered are queued instead of being calculated right away. Queued values are calculated in a
+        single batch, using :meth:`EventWindow.onNewValues`, the next time this DataSeries is accessed, and the
+        results are held just like any other value.
+
+        :param lazy: True to enable lazy evaluation.
+        :type lazy: boolean.
+        """
+        if not lazy:
+            self.flush()
+        self.__lazy = lazy
+
+    def isLazy(self):
+        """Returns True if lazy evaluation is enabled."""
+        return self.__lazy
+
+    def flush(self):
+        """Calculates the values that were queued while lazy evaluation is enabled."""
+        if self.__pendingValues:
+            dateTimes = self.__pendingDateTimes
+            values = self.__pendingValues
+            self.__pendingDateTimes = []
+            self.__pendingValues = []
+            self.extendWithDateTimes(dateTimes, self.__eventWindow.onNewValues(dateTimes, values))
+
+    def __len__(self):
+        if self.__pendingValues:
+            self.flush()
+        return super(EventBasedFilter, self).__len__()
+
+    def __getitem__(self, key):
+        if self.__pendingValues:
+            self.flush()
+        return super(EventBasedFilter, self).__getitem__(key)
+
+    def getValueAbsolute(self, pos):
+        if self.__pendingValues:
+            self.flush()
+        return super(EventBasedFilter, self).getValueAbsolute(pos)
+
+    def getDateTimes(self):
+        if self.__pendingValues:
+            self.flush()
+        return super(EventBasedFilter, self).getDateTimes()
+
+    def asarray(self, start=None, stop=None, dtype=None):
+        if self.__pendingValues:
+            self.flush()
+        return super(EventBasedFilter, self).asarray(start, stop, dtype)
+
+    def values(self):
+        if self.__pendingValues:
+            self.flush()
+        return super(EventBasedFilter, self).values()
+
+    def timestamps(self):
+        if self.__pendingValues:
+            self.flush()
+        return super(EventBasedFilter, self).timestamps()
+
+    def getState(self):
+        """Returns a picklable dictionary with the state of the filter, that can be used to restore it using
+        :meth:`setState`. It includes the values held and the state of the :class:`EventWindow`."""
+        self.__stopReplay()
+        self.flush()
+        ret = super(EventBasedFilter, self).getState()
+        ret["eventWindow"] = self.__eventWindow.getState()
+        return ret
+
+    def setState(self, state):
+        """Restores the state of the filter from the one returned by :meth:`getState`.
+        No new value events are emitted.
+
+        :param state: The state returned by :meth:`getState` for a filter built with the same parameters.
+        :type state: dict.
+        """
+        self.__pendingDateTimes = []
+        self.__pendingValues = []
+        self.__preloaded = None
+        super(EventBasedFilter, self).setState(state)
+        self.__eventWindow.setState(state["eventWindow"])
+
     def getDataSeries(self):
         return self.__dataSeries
 
     def getEventWindow(self):
+        self.__stopReplay()
+        if self.__pendingValues:
+            self.flush()
         return self.__eventWindow
+
+
+def save_states(fileName, indicators):
+    """Saves the state of many indicators to a file, so they can be restored using :func:`load_states` without
+    processing all the values again. The file is replaced atomically, so it can be refreshed while other processes
+    load it.
+
+    :param fileName: The path to the file.
+    :type fileName: string.
+    :param indicators: A dictionary that maps names to indicators with getState and setState methods, like
+        :class:`EventBasedFilter` instances.
+    :type indicators: dict.
+    """
+    states = dict((name, indicator.getState()) for name, indicator in indicators.items())
+    tmpFileName = fileName + ".tmp"
+    with open(tmpFileName, "wb") as f:
+        cPickle.dump(states, f, cPickle.HIGHEST_PROTOCOL)
+    # os.rename fails on Windows if the file already exists. os.replace is not available in Python 2.
+    replace = getattr(os, "replace", os.rename)
+    replace(tmpFileName, fileName)
+
+
+def load_states(fileName, indicators):
+    """Restores the state of many indicators from a file written by :func:`save_states`.
+
+    :param fileName: The path to the file.
+    :type fileName: string.
+    :param indicators: A dictionary that maps names to indicators built with the same parameters as the ones that were
+        saved. Indicators are typically subscribed to DataSeries with no values yet.
+    :type indicators: dict.
+    """
+    with open(fileName, "rb") as f:
+        states = cPickle.load(f)
+    for name, indicator in indicators.items():
+        indicator.setState(states[name])
+
+
+# Converts lists and dicts into tuples so they can be used as part of a key.
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        ret = tuple(_freeze(item) for item in value)
+    elif isinstance(value, dict):
+        ret = tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    else:
+        ret = value
+    return ret
+
+
+# Returns a dict that maps the names of the parameters for the indicator constructor, other than self and the
+# DataSeries, to their values, defaults included. The same parameters give the same dict, no matter how they're passed.
+def _bind_args(indicatorClass, dataSeries, args, kwargs):
+    ret = inspect.getcallargs(indicatorClass.__init__, None, dataSeries, *args, **kwargs)
+    for name in six.get_unbound_function(indicatorClass.__init__).__code__.co_varnames[0:2]:
+        ret.pop(name)
+    return ret
+
+
+class IndicatorRegistry(object):
+    """An IndicatorRegistry class is responsible for sharing indicators built with the same parameters on the same
+    :class:`pyalgotrade.dataseries.DataSeries`, so they get subscribed to the DataSeries and calculated only once.
+
+    .. note::
+        Shared indicators should be treated as read-only.
+    """
+
+    def __init__(self):
+        # (id(dataSeries), indicatorClass, parameters) -> _SharedIndicator
+        self.__indicators = {}
+
+    def get(self, indicatorClass, dataSeries, *args, **kwargs):
+        """Returns the indicator built as ``indicatorClass(dataSeries, *args, **kwargs)``.
+        If an indicator was already built with the same class, DataSeries and parameters, that instance is returned.
+        Parameters are compared after binding them to the constructor arguments, with the defaults applied, so passing
+        them by position or by name makes no difference.
+
+        :param indicatorClass: The indicator class. The first parameter for the constructor must be the DataSeries.
+        :param dataSeries: The DataSeries instance being filtered.
+        :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+        :param args: Positional parameters for the indicator constructor.
+        :param kwargs: Keyword parameters for the indicator constructor.
+        """
+
+        key = (id(dataSeries), indicatorClass, _freeze(_bind_args(indicatorClass, dataSeries, args, kwargs)))
+        shared = self.__indicators.get(key)
+        if shared is None:
+            shared = _SharedIndicator(dataSeries, indicatorClass(dataSeries, *args, **kwargs))
+            self.__indicators[key] = shared
+        else:
+            shared.addShare()
+        return shared.getIndicator()
+
+    def getIndicatorCount(self):
+        """Returns the number of distinct indicators built."""
+        return len(self.__indicators)
+
+    def getSavedEvaluations(self):
+        """Returns the number of times that indicators were not evaluated because they were shared.
+        That is, the number of values that shared indicators would have calculated again if built more than once."""
+        return sum(shared.getSavedEvaluations() for shared in self.__indicators.values())
+
+
+class _SharedIndicator(object):
+    def __init__(self, dataSeries, indicator):
+        # Keep a reference to the DataSeries so its id is not reused while the indicator is registered.
+        self.__dataSeries = dataSeries
+        self.__indicator = indicator
+        self.__shares = 0
+        self.__savedEvaluations = 0
+
+    def getIndicator(self):
+        return self.__indicator
+
+    def getSavedEvaluations(self):
+        return self.__savedEvaluations
+
+    def addShare(self):
+        # Only start counting evaluations once the indicator gets shared.
+        if self.__shares == 0:
+            self.__dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
+            if isinstance(self.__dataSeries, dataseries.SequenceDataSeries):
+                self.__dataSeries.getNewValuesEvent().subscribe(self.__onNewValues)
+        self.__shares += 1
+
+    def __onNewValue(self, dataSeries, dateTime, value):
+        self.__savedEvaluations += self.__shares
+
+    def __onNewValues(self, dataSeries, dateTimes, values):
+        self.__savedEvaluations += self.__shares * len(values)
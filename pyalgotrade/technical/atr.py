@@ -33,14 +33,11 @@ class ATREventWindow(technical.EventWindow):
         self.__value = None
 
     def _calculateTrueRange(self, value):
-        ret = None
-        if self.__prevClose is None:
-            ret = value.getHigh(self.__useAdjustedValues) - value.getLow(self.__useAdjustedValues)
-        else:
-            tr1 = value.getHigh(self.__useAdjustedValues) - value.getLow(self.__useAdjustedValues)
-            tr2 = abs(value.getHigh(self.__useAdjustedValues) - self.__prevClose)
-            tr3 = abs(value.getLow(self.__useAdjustedValues) - self.__prevClose)
-            ret = max(max(tr1, tr2), tr3)
+        high = value.getHigh(self.__useAdjustedValues)
+        low = value.getLow(self.__useAdjustedValues)
+        ret = high - low
+        if self.__prevClose is not None:
+            ret = max(ret, abs(high - self.__prevClose), abs(low - self.__prevClose))
         return ret
 
     def onNewValue(self, dateTime, value):
@@ -71,10 +68,13 @@ class ATR(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, barDataSeries, period, useAdjustedValues=False, maxLen=None):
+    def __init__(self, barDataSeries, period, useAdjustedValues=False, maxLen=None, dtype=None):
         if not isinstance(barDataSeries, bards.BarDataSeries):
             raise Exception("barDataSeries must be a dataseries.bards.BarDataSeries instance")
 
-        super(ATR, self).__init__(barDataSeries, ATREventWindow(period, useAdjustedValues), maxLen)
+        super(ATR, self).__init__(barDataSeries, ATREventWindow(period, useAdjustedValues), maxLen, dtype)
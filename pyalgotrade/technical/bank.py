@@ -0,0 +1,237 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+from pyalgotrade import dataseries
+from pyalgotrade.utils import collections
+
+
+class IndicatorBank(object):
+    """An IndicatorBank class is responsible for calculating the same indicator for many periods in a single pass,
+    sharing the state between the different periods. Values for each period are available as a regular DataSeries.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param periods: The periods to calculate the indicator for.
+    :type periods: list.
+    :param windowSize: The number of values needed to calculate the indicator for every period.
+    :type windowSize: int.
+    :param maxLen: The maximum number of values to hold for each period.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    def __init__(self, dataSeries, periods, windowSize, maxLen=None):
+        assert len(periods) > 0, "No periods"
+        assert len(set(periods)) == len(periods), "Duplicate periods"
+
+        self.__periods = np.asarray(periods)
+        self.__values = collections.NumPyDeque(windowSize)
+        self.__count = 0
+        self.__lastValues = [None] * len(periods)
+        self.__dataSeries = [dataseries.SequenceDataSeries(maxLen) for period in periods]
+        self.__dataSeriesByPeriod = dict(zip(periods, self.__dataSeries))
+        dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
+        if isinstance(dataSeries, dataseries.SequenceDataSeries):
+            dataSeries.getNewValuesEvent().subscribe(self.__onNewValues)
+
+    def __update(self, value):
+        # None values are skipped, and the last values are repeated, just like EventBasedFilters do.
+        if value is not None:
+            self.__values.append(value)
+            self.__count += 1
+            self.__lastValues = self.calculate(self.__values.data(), self.__count)
+            if self.__lastValues is None:
+                self.__lastValues = [None] * len(self.__periods)
+        return self.__lastValues
+
+    def __onNewValue(self, dataSeries, dateTime, value):
+        for ds, newValue in zip(self.__dataSeries, self.__update(value)):
+            ds.appendWithDateTime(dateTime, newValue)
+
+    def __onNewValues(self, dataSeries, dateTimes, values):
+        newValues = [self.__update(value) for value in values]
+        for i, ds in enumerate(self.__dataSeries):
+            ds.extendWithDateTimes(dateTimes, [periodValues[i] for periodValues in newValues])
+
+    def getPeriods(self):
+        """Returns a numpy.array with the periods."""
+        return self.__periods
+
+    def getDataSeries(self, period):
+        """Returns the :class:`pyalgotrade.dataseries.DataSeries` with the values for a given period."""
+        return self.__dataSeriesByPeriod[period]
+
+    def calculate(self, values, count):
+        """Override to calculate the values for every period.
+
+        :param values: The last values, up to windowSize.
+        :type values: numpy.array.
+        :param count: The number of values processed so far.
+        :type count: int.
+        :rtype: A list with one value for every period, using None for the periods that can't be calculated yet.
+            If None is returned, None is used for every period.
+        """
+        raise NotImplementedError()
+
+
+# Returns the sums of the last 1, 2, ..., len(values) values.
+def trailing_sums(values):
+    return np.cumsum(values[::-1])
+
+
+# Converts an array of values into a list, using None for the periods that are not ready.
+def to_list(values, ready):
+    return [value if isReady else None for value, isReady in zip(values.tolist(), ready)]
+
+
+class SMABank(IndicatorBank):
+    """Calculates a Simple Moving Average for many periods in a single pass.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param periods: The number of values to use to calculate each SMA.
+    :type periods: list.
+    :param maxLen: The maximum number of values to hold for each period.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, periods, maxLen=None):
+        assert min(periods) > 0, "Periods must be > 0"
+        super(SMABank, self).__init__(dataSeries, periods, max(periods), maxLen)
+
+    def calculate(self, values, count):
+        periods = self.getPeriods()
+        ready = periods <= count
+        sums = trailing_sums(values)[np.minimum(periods, len(values)) - 1]
+        return to_list(sums / periods, ready)
+
+
+class EMABank(IndicatorBank):
+    """Calculates an Exponential Moving Average for many periods in a single pass.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param periods: The number of values to use to calculate each EMA. Must be integers greater than 1.
+    :type periods: list.
+    :param maxLen: The maximum number of values to hold for each period.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, periods, maxLen=None):
+        assert min(periods) > 1, "Periods must be > 1"
+        super(EMABank, self).__init__(dataSeries, periods, max(periods), maxLen)
+        self.__multipliers = 2.0 / (self.getPeriods() + 1)
+        self.__values = np.zeros(len(periods))
+
+    def calculate(self, values, count):
+        periods = self.getPeriods()
+        # The first value is the SMA, and the rest are smoothed.
+        first = periods == count
+        if first.any():
+            sums = trailing_sums(values)[periods[first] - 1]
+            self.__values[first] = sums / periods[first]
+        rest = periods < count
+        self.__values[rest] += (values[-1] - self.__values[rest]) * self.__multipliers[rest]
+        return to_list(self.__values, periods <= count)
+
+
+class StdDevBank(IndicatorBank):
+    """Calculates the standard deviation for many periods in a single pass.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param periods: The number of values to use to calculate each standard deviation.
+    :type periods: list.
+    :param ddof: Delta degrees of freedom.
+    :type ddof: int.
+    :param maxLen: The maximum number of values to hold for each period.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, periods, ddof=0, maxLen=None):
+        assert min(periods) > 0, "Periods must be > 0"
+        super(StdDevBank, self).__init__(dataSeries, periods, max(periods), maxLen)
+        self.__ddof = ddof
+
+    def calculate(self, values, count):
+        periods = self.getPeriods()
+        ready = periods <= count
+        # Values are shifted by the last one to avoid catastrophic cancellation.
+        values = values - values[-1]
+        positions = np.minimum(periods, len(values)) - 1
+        sums = trailing_sums(values)[positions]
+        sumsSq = trailing_sums(values * values)[positions]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variances = (sumsSq - sums * sums / periods) / (periods - self.__ddof)
+        return to_list(np.sqrt(np.maximum(variances, 0)), ready)
+
+
+class RSIBank(IndicatorBank):
+    """Calculates the Relative Strength Index for many periods in a single pass.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param periods: The periods. Must be integers greater than 1.
+    :type periods: list.
+    :param maxLen: The maximum number of values to hold for each period.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, dataSeries, periods, maxLen=None):
+        assert min(periods) > 1, "Periods must be > 1"
+        # We need N + 1 values to calculate N gains/losses.
+        super(RSIBank, self).__init__(dataSeries, periods, max(periods) + 1, maxLen)
+        self.__avgGains = np.zeros(len(periods))
+        self.__avgLosses = np.zeros(len(periods))
+
+    def calculate(self, values, count):
+        periods = self.getPeriods()
+        if count > 1:
+            changes = np.diff(values[-max(periods) - 1:])
+            gains = np.maximum(changes, 0)
+            losses = np.maximum(-changes, 0)
+
+            # The first averages are simple averages, and the rest are smoothed.
+            first = periods + 1 == count
+            if first.any():
+                positions = periods[first] - 1
+                self.__avgGains[first] = trailing_sums(gains)[positions] / periods[first]
+                self.__avgLosses[first] = trailing_sums(losses)[positions] / periods[first]
+            rest = periods + 1 < count
+            self.__avgGains[rest] = (self.__avgGains[rest] * (periods[rest] - 1) + gains[-1]) / periods[rest]
+            self.__avgLosses[rest] = (self.__avgLosses[rest] * (periods[rest] - 1) + losses[-1]) / periods[rest]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(self.__avgLosses == 0, 100, 100 - 100 / (1 + self.__avgGains / self.__avgLosses))
+        return to_list(rsi, periods < count)
@@ -19,10 +19,28 @@
 """
 
 from pyalgotrade import dataseries
-from pyalgotrade.technical import ma
 from pyalgotrade.technical import stats
 
 
+class BollingerBandsEventWindow(stats.RollingMomentsEventWindow):
+    def __init__(self, period, numStdDev):
+        assert(period > 1)
+        super(BollingerBandsEventWindow, self).__init__(period)
+        self.__numStdDev = numStdDev
+        self.__value = None
+
+    def onNewValue(self, dateTime, value):
+        super(BollingerBandsEventWindow, self).onNewValue(dateTime, value)
+        if value is not None and self.windowFull():
+            middle = self.getMean()
+            stdDev = self.getStdDev(0)
+            self.__value = (middle, middle + stdDev * self.__numStdDev, middle + stdDev * self.__numStdDev * -1)
+
+    # Returns a tuple with the middle, upper and lower bands, or None if the window is not full yet.
+    def getValue(self):
+        return self.__value
+
+
 class BollingerBands(object):
     """Bollinger Bands filter as described in http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:bollinger_bands.
 
@@ -36,31 +54,63 @@ class BollingerBands(object):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
+
+    .. note::
+        The three bands are calculated from a single window of values, in a single update.
     """
 
-    def __init__(self, dataSeries, period, numStdDev, maxLen=None):
-        self.__sma = ma.SMA(dataSeries, period, maxLen=maxLen)
-        self.__stdDev = stats.StdDev(dataSeries, period, maxLen=maxLen)
-        self.__upperBand = dataseries.SequenceDataSeries(maxLen)
-        self.__lowerBand = dataseries.SequenceDataSeries(maxLen)
-        self.__numStdDev = numStdDev
-        # It is important to subscribe after sma and stddev since we'll use those values.
+    def __init__(self, dataSeries, period, numStdDev, maxLen=None, dtype=None):
+        self.__eventWindow = BollingerBandsEventWindow(period, numStdDev)
+        self.__middleBand = dataseries.SequenceDataSeries(maxLen, dtype)
+        self.__upperBand = dataseries.SequenceDataSeries(maxLen, dtype)
+        self.__lowerBand = dataseries.SequenceDataSeries(maxLen, dtype)
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
+        if isinstance(dataSeries, dataseries.SequenceDataSeries):
+            dataSeries.getNewValuesEvent().subscribe(self.__onNewValues)
 
-    def __onNewValue(self, dataSeries, dateTime, value):
-        upperValue = None
-        lowerValue = None
-
-        if value is not None:
-            sma = self.__sma[-1]
-            if sma is not None:
-                stdDev = self.__stdDev[-1]
-                upperValue = sma + stdDev * self.__numStdDev
-                lowerValue = sma + stdDev * self.__numStdDev * -1
+    # The middle band keeps the last value when the new value is None, just like an SMA does.
+    def __getBands(self, value, bands):
+        if bands is None:
+            bands = (None, None, None)
+        elif value is None:
+            bands = (bands[0], None, None)
+        return bands
 
+    def __onNewValue(self, dataSeries, dateTime, value):
+        self.__eventWindow.onNewValue(dateTime, value)
+        middleValue, upperValue, lowerValue = self.__getBands(value, self.__eventWindow.getValue())
+        self.__middleBand.appendWithDateTime(dateTime, middleValue)
         self.__upperBand.appendWithDateTime(dateTime, upperValue)
         self.__lowerBand.appendWithDateTime(dateTime, lowerValue)
 
+    def __onNewValues(self, dataSeries, dateTimes, values):
+        newValues = self.__eventWindow.onNewValues(dateTimes, values)
+        newValues = [self.__getBands(value, bands) for value, bands in zip(values, newValues)]
+        self.__middleBand.extendWithDateTimes(dateTimes, [bands[0] for bands in newValues])
+        self.__upperBand.extendWithDateTimes(dateTimes, [bands[1] for bands in newValues])
+        self.__lowerBand.extendWithDateTimes(dateTimes, [bands[2] for bands in newValues])
+
+    def getState(self):
+        """Returns a picklable dictionary with the state of the indicator, that can be used to restore it using
+        :meth:`setState`."""
+        return {
+            "eventWindow": self.__eventWindow.getState(),
+            "middleBand": self.__middleBand.getState(),
+            "upperBand": self.__upperBand.getState(),
+            "lowerBand": self.__lowerBand.getState(),
+        }
+
+    def setState(self, state):
+        """Restores the state of the indicator from the one returned by :meth:`getState`.
+        No new value events are emitted."""
+        self.__eventWindow.setState(state["eventWindow"])
+        self.__middleBand.setState(state["middleBand"])
+        self.__upperBand.setState(state["upperBand"])
+        self.__lowerBand.setState(state["lowerBand"])
+
     def getUpperBand(self):
         """
         Returns the upper band as a :class:`pyalgotrade.dataseries.DataSeries`.
@@ -71,7 +121,7 @@ class BollingerBands(object):
         """
         Returns the middle band as a :class:`pyalgotrade.dataseries.DataSeries`.
         """
-        return self.__sma
+        return self.__middleBand
 
     def getLowerBand(self):
         """
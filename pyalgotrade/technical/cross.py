@@ -18,6 +18,15 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
+from pyalgotrade import dataseries
+from pyalgotrade.dataseries import aligned
+
+
+# The number of values from which sign changes are checked using numpy.
+VECTORIZE_MIN_LEN = 50
+
 
 def compute_diff(values1, values2):
     assert(len(values1) == len(values2))
@@ -47,19 +56,55 @@ def _get_stripped(values1, values2, alignLeft):
     return values1, values2
 
 
-def _cross_impl(values1, values2, start, end, signCheck):
+# Returns 1 if diff crosses above 0, -1 if it crosses below 0, or 0 otherwise.
+# prevDiff is the last difference that was not 0, and None differences are never crossed.
+def _get_cross_sign(prevDiff, diff):
+    ret = 0
+    if prevDiff is not None and diff is not None:
+        if prevDiff < 0 and diff > 0:
+            ret = 1
+        elif prevDiff > 0 and diff < 0:
+            ret = -1
+    return ret
+
+
+def cross_signs(values1, values2):
+    """Returns a numpy.array with 1 where values1 crossed above values2, -1 where values1 crossed below values2, and 0
+    otherwise. Values are compared by position, and None values are not crossed.
+
+    :param values1: The values that cross.
+    :type values1: list or numpy.array.
+    :param values2: The values being crossed.
+    :type values2: list or numpy.array.
+    """
+    # None values are converted to NaN.
+    diffs = np.asarray(values1, dtype=float) - np.asarray(values2, dtype=float)
+    ret = np.zeros(len(diffs), dtype=int)
+    # Differences equal to 0 don't change the sign, so they're skipped.
+    positions = np.flatnonzero(diffs != 0)
+    diffs = diffs[positions]
+    prevDiffs = diffs[:-1]
+    diffs = diffs[1:]
+    ret[positions[1:][(prevDiffs < 0) & (diffs > 0)]] = 1
+    ret[positions[1:][(prevDiffs > 0) & (diffs < 0)]] = -1
+    return ret
+
+
+def _cross_impl(values1, values2, start, end, sign):
     # Get both set of values.
     values1, values2 = _get_stripped(values1[start:end], values2[start:end], start > 0)
 
-    # Compute differences and check sign changes.
+    # Checking sign changes in Python is faster for a few values.
+    if len(values1) > VECTORIZE_MIN_LEN:
+        return int((cross_signs(values1, values2) == sign).sum())
+
     ret = 0
-    diffs = compute_diff(values1, values2)
-    diffs = filter(lambda x: x != 0, diffs)
     prevDiff = None
-    for diff in diffs:
-        if prevDiff is not None and not signCheck(prevDiff) and signCheck(diff):
-            ret += 1
-        prevDiff = diff
+    for diff in compute_diff(values1, values2):
+        if diff != 0:
+            if _get_cross_sign(prevDiff, diff) == sign:
+                ret += 1
+            prevDiff = diff
     return ret
 
 
@@ -94,7 +139,7 @@ def cross_above(values1, values2, start=-2, end=None):
     .. note::
         The default start and end values check for cross above conditions over the last 2 values.
     """
-    return _cross_impl(values1, values2, start, end, lambda x: x > 0)
+    return _cross_impl(values1, values2, start, end, 1)
 
 
 def cross_below(values1, values2, start=-2, end=None):
@@ -114,4 +159,47 @@ def cross_below(values1, values2, start=-2, end=None):
     .. note::
         The default start and end values check for cross below conditions over the last 2 values.
     """
-    return _cross_impl(values1, values2, start, end, lambda x: x < 0)
+    return _cross_impl(values1, values2, start, end, -1)
+
+
+class CrossOver(dataseries.SequenceDataSeries):
+    """A DataSeries with 1 when values1 crosses above values2, -1 when values1 crosses below values2, and 0 otherwise.
+    Values from both DataSeries are compared when both have a value for the same datetime, and checking for a cross
+    is O(1) for each new value.
+
+    :param values1: The DataSeries that crosses.
+    :type values1: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values2: The DataSeries being crossed.
+    :type values2: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        Summing the values of this DataSeries gives the same results as :func:`cross_above` and :func:`cross_below`
+        over the whole history.
+    """
+
+    def __init__(self, values1, values2, maxLen=None):
+        super(CrossOver, self).__init__(maxLen)
+        self.__prevDiff = None
+        # Only the last aligned values are needed.
+        self.__values1, self.__values2 = aligned.datetime_aligned(values1, values2, maxLen=1)
+        # Aligned values are added in order, so values1 is already there when values2 gets a new value.
+        self.__values2.getNewValueEvent().subscribe(self.__onNewValue)
+
+    def __onNewValue(self, dataSeries, dateTime, value):
+        value1 = self.__values1[-1]
+        sign = 0
+        if value1 is None or value is None:
+            # Just like in cross_above and cross_below, None values are not crossed and the next value can't cross
+            # either.
+            self.__prevDiff = None
+        else:
+            # Comparisons with NaN are False, so NaN differences are handled just like None ones.
+            diff = value1 - value
+            if diff != 0:
+                sign = _get_cross_sign(self.__prevDiff, diff)
+                self.__prevDiff = diff
+        self.appendWithDateTime(dateTime, sign)
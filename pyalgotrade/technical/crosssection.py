@@ -0,0 +1,276 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+from pyalgotrade import dataseries
+from pyalgotrade import observer
+from pyalgotrade.utils import collections
+
+
+class CrossSection(object):
+    """A CrossSection class is responsible for keeping the prices of many instruments in a (time x instrument) matrix,
+    so that cross-sectional indicators can be calculated for every datetime using vectorized operations.
+
+    :param barFeed: The bar feed that provides the bars.
+    :type barFeed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+    :param instruments: The instruments to include. If None, all the instruments registered in the bar feed are used.
+    :type instruments: list.
+    :param maxLen: The maximum number of rows to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        Prices are taken from :meth:`pyalgotrade.bar.Bar.getPrice`, and they're NaN for instruments that have no bar
+        for a given datetime.
+        Rows are added when the :class:`pyalgotrade.dataseries.bards.BarDataSeries` for the instruments get new bars,
+        so everything is up to date by the time the bar feed emits the new bars.
+    """
+
+    def __init__(self, barFeed, instruments=None, maxLen=None):
+        if instruments is None:
+            instruments = barFeed.getRegisteredInstruments()
+        assert len(instruments) > 0, "No instruments"
+        assert len(set(instruments)) == len(instruments), "Duplicate instruments"
+
+        maxLen = dataseries.get_checked_max_len(maxLen)
+        self.__barFeed = barFeed
+        self.__instruments = list(instruments)
+        self.__values = collections.NumPyDeque(maxLen, width=len(instruments))
+        self.__dateTimes = collections.DateTimeDeque(maxLen)
+        self.__lastDateTime = None
+        self.__newRowEvent = observer.Event()
+        for instrument in instruments:
+            barFeed[instrument].getNewValueEvent().subscribe(self.__onNewBar)
+
+    def __onNewBar(self, dataSeries, dateTime, bar):
+        # Every instrument gets a new bar for the same datetime, but the whole row is built from the current bars the
+        # first time.
+        if dateTime == self.__lastDateTime:
+            return
+        self.__lastDateTime = dateTime
+
+        bars = self.__barFeed.getCurrentBars()
+        row = np.empty(len(self.__instruments))
+        row.fill(np.nan)
+        for i, instrument in enumerate(self.__instruments):
+            bar = bars.getBar(instrument)
+            if bar is not None:
+                row[i] = bar.getPrice()
+
+        self.__values.append(row)
+        self.__dateTimes.append(dateTime)
+        self.__newRowEvent.emit(dateTime, row)
+
+    # Event handler receives:
+    # 1: The datetime for the new row
+    # 2: A numpy.array with the prices for every instrument
+    def getNewRowEvent(self):
+        return self.__newRowEvent
+
+    def getInstruments(self):
+        """Returns the list of instruments. Columns in the matrix follow this order."""
+        return self.__instruments
+
+    def getValues(self):
+        """Returns a (time x instrument) numpy.array view with the prices.
+
+        .. note::
+            The array should not be modified.
+        """
+        return self.__values.data()
+
+    def getDateTimes(self):
+        """Returns a list of :class:`datetime.datetime` associated with each row."""
+        return self.__dateTimes.data()
+
+
+class CrossSectionalIndicator(object):
+    """A CrossSectionalIndicator class is responsible for calculating a value for every instrument in a
+    :class:`CrossSection` each time a new row is added. Values for each instrument are available as a regular
+    DataSeries.
+
+    :param crossSection: The CrossSection with the prices.
+    :type crossSection: :class:`CrossSection`.
+    :param maxLen: The maximum number of values to hold for each instrument.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    def __init__(self, crossSection, maxLen=None):
+        self.__dataSeries = dict(
+            (instrument, dataseries.SequenceDataSeries(maxLen)) for instrument in crossSection.getInstruments()
+        )
+        self.__instruments = crossSection.getInstruments()
+        self.__lastValues = None
+        crossSection.getNewRowEvent().subscribe(self.__onNewRow)
+
+    def __onNewRow(self, dateTime, row):
+        values = np.asarray(self.calculate(row), dtype=float)
+        self.__lastValues = values
+        for instrument, value in zip(self.__instruments, values.tolist()):
+            if value != value:  # NaN
+                value = None
+            self.__dataSeries[instrument].appendWithDateTime(dateTime, value)
+
+    def getDataSeries(self, instrument):
+        """Returns the :class:`pyalgotrade.dataseries.DataSeries` with the values for a given instrument."""
+        return self.__dataSeries[instrument]
+
+    def getLastValues(self):
+        """Returns a numpy.array with the last values for every instrument, in the order of
+        :meth:`CrossSection.getInstruments`, or None if no values were calculated yet. Missing values are NaN."""
+        return self.__lastValues
+
+    def calculate(self, values):
+        """Override to calculate the values for every instrument.
+
+        :param values: The prices for every instrument. Missing prices are NaN.
+        :type values: numpy.array.
+        :rtype: A numpy.array with one value for every instrument, using NaN for missing values.
+        """
+        raise NotImplementedError()
+
+
+# Returns the ranks, starting from 1, of the values that are not NaN. Ties get the average rank.
+def rank_values(values, ascending=True):
+    ret = np.empty(len(values))
+    ret.fill(np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid):
+        from scipy import stats
+
+        validValues = values[valid]
+        if not ascending:
+            validValues = -validValues
+        ret[valid] = stats.rankdata(validValues)
+    return ret
+
+
+class Rank(CrossSectionalIndicator):
+    """Ranks the prices of the instruments for every datetime. The lowest price gets rank 1, and ties get the average
+    rank.
+
+    :param crossSection: The CrossSection with the prices.
+    :type crossSection: :class:`CrossSection`.
+    :param ascending: False to give rank 1 to the highest price instead.
+    :type ascending: boolean.
+    :param pct: True to divide the ranks by the number of instruments with prices.
+    :type pct: boolean.
+    :param maxLen: The maximum number of values to hold for each instrument.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, crossSection, ascending=True, pct=False, maxLen=None):
+        super(Rank, self).__init__(crossSection, maxLen)
+        self.__ascending = ascending
+        self.__pct = pct
+
+    def calculate(self, values):
+        ret = rank_values(values, self.__ascending)
+        if self.__pct:
+            ret /= np.count_nonzero(~np.isnan(values))
+        return ret
+
+
+class ZScore(CrossSectionalIndicator):
+    """Calculates the Z-Score of the prices of the instruments for every datetime.
+
+    :param crossSection: The CrossSection with the prices.
+    :type crossSection: :class:`CrossSection`.
+    :param ddof: Delta degrees of freedom to use for the standard deviation.
+    :type ddof: int.
+    :param maxLen: The maximum number of values to hold for each instrument.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, crossSection, ddof=0, maxLen=None):
+        super(ZScore, self).__init__(crossSection, maxLen)
+        self.__ddof = ddof
+
+    def calculate(self, values):
+        valid = values[~np.isnan(values)]
+        if len(valid) <= self.__ddof:
+            return np.full(len(values), np.nan)
+        stdDev = valid.std(ddof=self.__ddof)
+        if stdDev == 0:
+            return np.where(np.isnan(values), np.nan, 0.0)
+        return (values - valid.mean()) / stdDev
+
+
+class Demean(CrossSectionalIndicator):
+    """Subtracts the mean price of the instruments from each price, for every datetime.
+
+    :param crossSection: The CrossSection with the prices.
+    :type crossSection: :class:`CrossSection`.
+    :param maxLen: The maximum number of values to hold for each instrument.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def calculate(self, values):
+        valid = values[~np.isnan(values)]
+        if len(valid) == 0:
+            return values
+        return values - valid.mean()
+
+
+class TopK(CrossSectionalIndicator):
+    """Flags the instruments with the k highest (or lowest) prices for every datetime. Values are 1 for the instruments
+    that are in, and 0 for the rest. Ties are broken by the order of the instruments.
+
+    :param crossSection: The CrossSection with the prices.
+    :type crossSection: :class:`CrossSection`.
+    :param k: The number of instruments to flag. Must be > 0.
+    :type k: int.
+    :param largest: False to flag the instruments with the lowest prices instead.
+    :type largest: boolean.
+    :param maxLen: The maximum number of values to hold for each instrument.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, crossSection, k, largest=True, maxLen=None):
+        assert k > 0, "k must be > 0"
+        super(TopK, self).__init__(crossSection, maxLen)
+        self.__k = k
+        self.__largest = largest
+
+    def calculate(self, values):
+        ret = np.where(np.isnan(values), np.nan, 0.0)
+        valid = np.flatnonzero(~np.isnan(values))
+        validValues = values[valid]
+        if self.__largest:
+            validValues = -validValues
+        # A stable sort keeps the order of the instruments for ties.
+        top = valid[np.argsort(validValues, kind="mergesort")[:self.__k]]
+        ret[top] = 1
+        return ret
@@ -47,7 +47,10 @@ class CumulativeReturn(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, maxLen=None):
-        super(CumulativeReturn, self).__init__(dataSeries, CumRetEventWindow(), maxLen)
+    def __init__(self, dataSeries, maxLen=None, dtype=None):
+        super(CumulativeReturn, self).__init__(dataSeries, CumRetEventWindow(), maxLen, dtype)
@@ -19,21 +19,39 @@
 """
 
 from pyalgotrade import technical
+from pyalgotrade.utils import collections
 
 
 class HighLowEventWindow(technical.EventWindow):
     def __init__(self, windowSize, useMin):
         super(HighLowEventWindow, self).__init__(windowSize)
         self.__useMin = useMin
+        self.__extremum = collections.RollingExtremum(windowSize, useMin)
+
+    def onNewValue(self, dateTime, value):
+        super(HighLowEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__extremum.append(value)
+
+    def onNewValues(self, dateTimes, values):
+        ret = super(HighLowEventWindow, self).onNewValues(dateTimes, values)
+        # Values may have been calculated at once, so the extremum needs to be rebuilt from the window.
+        self.__extremum = collections.RollingExtremum(self.getWindowSize(), self.__useMin)
+        self.__extremum.extend(self.getValues())
+        return ret
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            if self.__useMin:
-                ret = values.min()
-            else:
-                ret = values.max()
+            ret = self.__extremum.getValue()
+        return ret
+
+    def computeValues(self, values):
+        windows = technical.rolling_windows(values, self.getWindowSize())
+        if self.__useMin:
+            ret = windows.min(axis=1)
+        else:
+            ret = windows.max(axis=1)
         return ret
 
 
@@ -48,10 +66,13 @@ class High(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, period, maxLen=None):
-        super(High, self).__init__(dataSeries, HighLowEventWindow(period, False), maxLen)
+    def __init__(self, dataSeries, period, maxLen=None, dtype=None):
+        super(High, self).__init__(dataSeries, HighLowEventWindow(period, False), maxLen, dtype)
 
 
 class Low(technical.EventBasedFilter):
@@ -65,7 +86,10 @@ class Low(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, period, maxLen=None):
-        super(Low, self).__init__(dataSeries, HighLowEventWindow(period, True), maxLen)
+    def __init__(self, dataSeries, period, maxLen=None, dtype=None):
+        super(Low, self).__init__(dataSeries, HighLowEventWindow(period, True), maxLen, dtype)
@@ -23,42 +23,77 @@ import numpy as np
 from pyalgotrade import technical
 
 
+# Returns the weights to calculate the slope of a least-squares regression line over log10(lags) as a dot product.
+def get_slope_weights(lags):
+    x = np.log10(lags)
+    x = x - x.mean()
+    return x / (x * x).sum()
+
+
 # Code Tom Starke for the Hurst Exponent.
 def hurst_exp(p, minLags, maxLags):
-    tau = []
-    lagvec = []
-
-    #  Step through the different lags
-    for lag in range(minLags, maxLags):
-        #  produce price difference with lag
-        pp = np.subtract(p[lag:], p[:-lag])
-        #  Write the different lags into a vector
-        lagvec.append(lag)
-        #  Calculate the variance of the differnce vector
-        tau.append(np.sqrt(np.std(pp)))
+    lags = np.arange(minLags, maxLags)
+    #  Calculate the variance of the price difference for each lag
+    tau = [np.sqrt(np.std(np.subtract(p[lag:], p[:-lag]))) for lag in lags]
     # linear fit to double-log graph (gives power)
-    m = np.polyfit(np.log10(lagvec), np.log10(tau), 1)
+    slope = get_slope_weights(lags).dot(np.log10(tau))
     # calculate hurst
-    hurst = m[0]*2
+    hurst = slope*2
     return hurst
 
 
 class HurstExponentEventWindow(technical.EventWindow):
+    # The sum and the sum of squares of the price differences for every lag are updated as the window slides, and
+    # recalculated from the window every REANCHOR_PERIOD updates to bound the floating point drift.
+    REANCHOR_PERIOD = 1000
+
     def __init__(self, period, minLags, maxLags, logValues=True):
         super(HurstExponentEventWindow, self).__init__(period)
-        self.__minLags = minLags
-        self.__maxLags = maxLags
+        self.__lags = np.arange(minLags, maxLags)
+        self.__counts = period - self.__lags
+        self.__slopeWeights = get_slope_weights(self.__lags)
         self.__logValues = logValues
+        self.__sums = None
+        self.__sumsSq = None
+        self.__updates = 0
+
+    def __recalculate(self):
+        values = self.getValues()
+        diffs = [values[lag:] - values[:-lag] for lag in self.__lags]
+        self.__sums = np.array([diff.sum() for diff in diffs])
+        self.__sumsSq = np.array([(diff * diff).sum() for diff in diffs])
+        self.__updates = 0
 
     def onNewValue(self, dateTime, value):
         if value is not None and self.__logValues:
             value = np.log10(value)
+
+        firstValue = None
+        if value is not None and self.windowFull():
+            firstValue = self.getValues()[0]
+
         super(HurstExponentEventWindow, self).onNewValue(dateTime, value)
 
+        if value is None or not self.windowFull():
+            return
+
+        if firstValue is None or self.__updates >= self.REANCHOR_PERIOD:
+            self.__recalculate()
+        else:
+            values = self.getValues()
+            removed = values[self.__lags - 1] - firstValue
+            added = values[-1] - values[-1 - self.__lags]
+            self.__sums += added - removed
+            self.__sumsSq += added * added - removed * removed
+            self.__updates += 1
+
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = hurst_exp(self.getValues(), self.__minLags, self.__maxLags)
+            means = self.__sums / self.__counts
+            variances = np.maximum(self.__sumsSq / self.__counts - means * means, 0)
+            # log10(sqrt(std)) == log10(variance) / 4
+            ret = self.__slopeWeights.dot(np.log10(variances) / 4) * 2
         return ret
 
 
@@ -77,9 +112,12 @@ class HurstExponent(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded
         from the opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, period, minLags=2, maxLags=20, logValues=True, maxLen=None):
+    def __init__(self, dataSeries, period, minLags=2, maxLags=20, logValues=True, maxLen=None, dtype=None):
         assert period > 0, "period must be > 0"
         assert minLags >= 2, "minLags must be >= 2"
         assert maxLags > minLags, "maxLags must be > minLags"
@@ -87,5 +125,6 @@ class HurstExponent(technical.EventBasedFilter):
         super(HurstExponent, self).__init__(
             dataSeries,
             HurstExponentEventWindow(period, minLags, maxLags, logValues),
-            maxLen
+            maxLen,
+            dtype
         )
@@ -23,37 +23,119 @@ from pyalgotrade.utils import collections
 from pyalgotrade.utils import dt
 
 import numpy as np
-from scipy import stats
 
 
 # Using scipy.stats.linregress instead of numpy.linalg.lstsq because of this:
 # http://stackoverflow.com/questions/20736255/numpy-linalg-lstsq-with-big-values
 def lsreg(x, y):
+    from scipy import stats
+
     x = np.asarray(x)
     y = np.asarray(y)
     res = stats.linregress(x, y)
     return res[0], res[1]
 
 
+# Keeps the sums needed to fit a least-squares regression line over the last windowSize (x, y) pairs, so that the line
+# can be updated in O(1) instead of fitting it from scratch.
+# x and y values are shifted by anchor values to avoid catastrophic cancellation with big values (like timestamps), and
+# sums are recalculated every REANCHOR_PERIOD updates to bound the floating point drift.
+class RollingLinearRegression(object):
+    REANCHOR_PERIOD = 1000
+
+    def __init__(self, windowSize):
+        assert(windowSize > 0)
+        self.__x = collections.NumPyDeque(windowSize)
+        self.__y = collections.NumPyDeque(windowSize)
+        self.__windowSize = windowSize
+        self.__anchorX = None
+        self.__anchorY = None
+        self.__sumX = 0
+        self.__sumY = 0
+        self.__sumXX = 0
+        self.__sumXY = 0
+        self.__updates = 0
+
+    def __len__(self):
+        return len(self.__x)
+
+    def __update(self, x, y, sign):
+        x -= self.__anchorX
+        y -= self.__anchorY
+        self.__sumX += sign * x
+        self.__sumY += sign * y
+        self.__sumXX += sign * x * x
+        self.__sumXY += sign * x * y
+
+    def __reanchor(self):
+        x = self.__x.data()
+        y = self.__y.data()
+        self.__anchorX = x.mean()
+        self.__anchorY = y.mean()
+        x = x - self.__anchorX
+        y = y - self.__anchorY
+        self.__sumX = x.sum()
+        self.__sumY = y.sum()
+        self.__sumXX = (x * x).sum()
+        self.__sumXY = (x * y).sum()
+        self.__updates = 0
+
+    def append(self, x, y):
+        if self.__anchorX is None:
+            self.__anchorX = x
+            self.__anchorY = y
+        if len(self.__x) == self.__windowSize:
+            self.__update(self.__x[0], self.__y[0], -1)
+        self.__x.append(x)
+        self.__y.append(y)
+        self.__update(x, y, 1)
+
+        self.__updates += 1
+        if self.__updates >= self.REANCHOR_PERIOD:
+            self.__reanchor()
+
+    def getLastX(self):
+        return self.__x[-1]
+
+    # Returns the slope and the intercept of the line, but relative to the anchor values.
+    # The slope is NaN if there is only one point, just like scipy.stats.linregress returns.
+    def __getCoefficients(self):
+        count = float(len(self.__x))
+        varianceX = self.__sumXX - self.__sumX * self.__sumX / count
+        covariance = self.__sumXY - self.__sumX * self.__sumY / count
+        if count > 1:
+            slope = covariance / varianceX
+        else:
+            slope = np.nan
+        intercept = (self.__sumY - slope * self.__sumX) / count
+        return slope, intercept
+
+    def getSlope(self):
+        return self.__getCoefficients()[0]
+
+    def getValueAt(self, x):
+        slope, intercept = self.__getCoefficients()
+        return slope * (x - self.__anchorX) + intercept + self.__anchorY
+
+
 class LeastSquaresRegressionWindow(technical.EventWindow):
     def __init__(self, windowSize):
         assert(windowSize > 1)
         super(LeastSquaresRegressionWindow, self).__init__(windowSize)
-        self._timestamps = collections.NumPyDeque(windowSize)
+        self.__regression = RollingLinearRegression(windowSize)
 
     def onNewValue(self, dateTime, value):
         technical.EventWindow.onNewValue(self, dateTime, value)
         if value is not None:
             timestamp = dt.datetime_to_timestamp(dateTime)
-            if len(self._timestamps):
-                assert(timestamp > self._timestamps[-1])
-            self._timestamps.append(timestamp)
+            if len(self.__regression):
+                assert(timestamp > self.__regression.getLastX())
+            self.__regression.append(timestamp, value)
 
     def __getValueAtImpl(self, timestamp):
         ret = None
         if self.windowFull():
-            a, b = lsreg(self._timestamps.data(), self.getValues())
-            ret = a * timestamp + b
+            ret = self.__regression.getValueAt(timestamp)
         return ret
 
     def getValueAt(self, dateTime):
@@ -62,7 +144,7 @@ class LeastSquaresRegressionWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = self.__getValueAtImpl(self._timestamps.data()[-1])
+            ret = self.__getValueAtImpl(self.__regression.getLastX())
         return ret
 
 
@@ -77,9 +159,14 @@ class LeastSquaresRegression(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
-    def __init__(self, dataSeries, windowSize, maxLen=None):
-        super(LeastSquaresRegression, self).__init__(dataSeries, LeastSquaresRegressionWindow(windowSize), maxLen)
+    def __init__(self, dataSeries, windowSize, maxLen=None, dtype=None):
+        super(LeastSquaresRegression, self).__init__(
+            dataSeries, LeastSquaresRegressionWindow(windowSize), maxLen, dtype
+        )
 
     def getValueAt(self, dateTime):
         """Calculates the value at a given time based on the regression line.
@@ -94,13 +181,19 @@ class LeastSquaresRegression(technical.EventBasedFilter):
 class SlopeEventWindow(technical.EventWindow):
     def __init__(self, windowSize):
         super(SlopeEventWindow, self).__init__(windowSize)
-        self.__x = np.asarray(range(windowSize))
+        self.__regression = RollingLinearRegression(windowSize)
+        self.__position = 0
+
+    def onNewValue(self, dateTime, value):
+        super(SlopeEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__regression.append(self.__position, value)
+            self.__position += 1
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            y = self.getValues()
-            ret = lsreg(self.__x, y)[0]
+            ret = self.__regression.getSlope()
         return ret
 
 
@@ -115,13 +208,16 @@ class Slope(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
 
     .. note::
         This filter ignores the time elapsed between the different values.
     """
 
-    def __init__(self, dataSeries, period, maxLen=None):
-        super(Slope, self).__init__(dataSeries, SlopeEventWindow(period), maxLen)
+    def __init__(self, dataSeries, period, maxLen=None, dtype=None):
+        super(Slope, self).__init__(dataSeries, SlopeEventWindow(period), maxLen, dtype)
 
 
 class TrendEventWindow(SlopeEventWindow):
@@ -146,5 +242,7 @@ class TrendEventWindow(SlopeEventWindow):
 
 
 class Trend(technical.EventBasedFilter):
-    def __init__(self, dataSeries, trendDays, positiveThreshold=0, negativeThreshold=0, maxLen=None):
-        super(Trend, self).__init__(dataSeries, TrendEventWindow(trendDays, positiveThreshold, negativeThreshold), maxLen)
+    def __init__(self, dataSeries, trendDays, positiveThreshold=0, negativeThreshold=0, maxLen=None, dtype=None):
+        super(Trend, self).__init__(
+            dataSeries, TrendEventWindow(trendDays, positiveThreshold, negativeThreshold), maxLen, dtype
+        )
@@ -19,6 +19,7 @@
 """
 
 import numpy as np
+
 from pyalgotrade import technical
 
 
@@ -59,6 +60,23 @@ class SMAEventWindow(technical.EventWindow):
             else:
                 self.__value = self.__value + value / float(self.getWindowSize()) - firstValue / float(self.getWindowSize())
 
+    def computeValues(self, values):
+        # The averages are updated in the same order as in onNewValue, so the results match exactly.
+        windowSize = self.getWindowSize()
+        if len(values) < windowSize:
+            return []
+
+        value = self.__value
+        if value is None:
+            value = values[:windowSize].mean()
+        ret = [value]
+        values = values.tolist()
+        for i in range(windowSize, len(values)):
+            value = value + values[i] / float(windowSize) - values[i - windowSize] / float(windowSize)
+            ret.append(value)
+        self.__value = value
+        return ret
+
     def getValue(self):
         return self.__value
 
@@ -74,9 +92,12 @@ class SMA(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
-    def __init__(self, dataSeries, period, maxLen=None):
-        super(SMA, self).__init__(dataSeries, SMAEventWindow(period), maxLen)
+    def __init__(self, dataSeries, period, maxLen=None, dtype=None):
+        super(SMA, self).__init__(dataSeries, SMAEventWindow(period), maxLen, dtype)
 
 
 class EMAEventWindow(technical.EventWindow):
@@ -96,6 +117,22 @@ class EMAEventWindow(technical.EventWindow):
             else:
                 self.__value = (value - self.__value) * self.__multiplier + self.__value
 
+    def computeValues(self, values):
+        # The averages are updated in the same order as in onNewValue, so the results match exactly.
+        windowSize = self.getWindowSize()
+        if len(values) < windowSize:
+            return []
+
+        value = self.__value
+        if value is None:
+            value = values[:windowSize].mean()
+        ret = [value]
+        for newValue in values[windowSize:].tolist():
+            value = (newValue - value) * self.__multiplier + value
+            ret.append(value)
+        self.__value = value
+        return ret
+
     def getValue(self):
         return self.__value
 
@@ -111,10 +148,13 @@ class EMA(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, period, maxLen=None):
-        super(EMA, self).__init__(dataSeries, EMAEventWindow(period), maxLen)
+    def __init__(self, dataSeries, period, maxLen=None, dtype=None):
+        super(EMA, self).__init__(dataSeries, EMAEventWindow(period), maxLen, dtype)
 
 
 class WMAEventWindow(technical.EventWindow):
@@ -131,6 +171,10 @@ class WMAEventWindow(technical.EventWindow):
             ret = accum / float(weightSum)
         return ret
 
+    def computeValues(self, values):
+        windows = technical.rolling_windows(values, self.getWindowSize())
+        return (windows * self.__weights).sum(axis=1) / float(self.__weights.sum())
+
 
 class WMA(technical.EventBasedFilter):
     """Weighted Moving Average filter.
@@ -143,7 +187,10 @@ class WMA(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, weights, maxLen=None):
-        super(WMA, self).__init__(dataSeries, WMAEventWindow(weights), maxLen)
+    def __init__(self, dataSeries, weights, maxLen=None, dtype=None):
+        super(WMA, self).__init__(dataSeries, WMAEventWindow(weights), maxLen, dtype)
@@ -18,10 +18,36 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
-from pyalgotrade.technical import ma
+import copy
+
+import numpy as np
+
 from pyalgotrade import dataseries
 
 
+# Keeps the EMA as a scalar instead of using an ma.EMAEventWindow, since values are only needed to calculate the first
+# one.
+class _EMA(object):
+    def __init__(self, period):
+        assert(period > 1)
+        self.__period = period
+        self.__multiplier = (2.0 / (period + 1))
+        self.__firstValues = []
+        self.__value = None
+
+    def update(self, value):
+        # None values are skipped, just like EventWindows do.
+        if value is not None:
+            if self.__value is not None:
+                self.__value = (value - self.__value) * self.__multiplier + self.__value
+            else:
+                self.__firstValues.append(value)
+                if len(self.__firstValues) == self.__period:
+                    self.__value = np.mean(self.__firstValues)
+                    self.__firstValues = None
+        return self.__value
+
+
 class MACD(dataseries.SequenceDataSeries):
     """Moving Average Convergence-Divergence indicator as described in http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:moving_average_convergence_divergence_macd.
 
@@ -37,26 +63,35 @@ class MACD(dataseries.SequenceDataSeries):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
+
+    .. note::
+        The three EMAs are updated together, and the signal and histogram values are appended before the MACD value,
+        so they are up to date when subscribers to the MACD get the new value.
     """
-    def __init__(self, dataSeries, fastEMA, slowEMA, signalEMA, maxLen=None):
+    def __init__(self, dataSeries, fastEMA, slowEMA, signalEMA, maxLen=None, dtype=None):
         assert(fastEMA > 0)
         assert(slowEMA > 0)
         assert(fastEMA < slowEMA)
         assert(signalEMA > 0)
 
-        super(MACD, self).__init__(maxLen)
+        super(MACD, self).__init__(maxLen, dtype)
 
         # We need to skip some values when calculating the fast EMA in order for both EMA
         # to calculate their first values at the same time.
         # I'M FORCING THIS BEHAVIOUR ONLY TO MAKE THIS FITLER MATCH TA-Lib MACD VALUES.
         self.__fastEMASkip = slowEMA - fastEMA
 
-        self.__fastEMAWindow = ma.EMAEventWindow(fastEMA)
-        self.__slowEMAWindow = ma.EMAEventWindow(slowEMA)
-        self.__signalEMAWindow = ma.EMAEventWindow(signalEMA)
-        self.__signal = dataseries.SequenceDataSeries(maxLen)
-        self.__histogram = dataseries.SequenceDataSeries(maxLen)
+        self.__fastEMA = _EMA(fastEMA)
+        self.__slowEMA = _EMA(slowEMA)
+        self.__signalEMA = _EMA(signalEMA)
+        self.__signal = dataseries.SequenceDataSeries(maxLen, dtype)
+        self.__histogram = dataseries.SequenceDataSeries(maxLen, dtype)
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
+        if isinstance(dataSeries, dataseries.SequenceDataSeries):
+            dataSeries.getNewValuesEvent().subscribe(self.__onNewValues)
 
     def getSignal(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the EMA over the MACD."""
@@ -66,31 +101,57 @@ class MACD(dataseries.SequenceDataSeries):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the histogram (the difference between the MACD and the Signal)."""
         return self.__histogram
 
-    def __onNewValue(self, dataSeries, dateTime, value):
+    def getState(self):
+        """Returns a picklable dictionary with the state of the indicator, that can be used to restore it using
+        :meth:`setState`."""
+        ret = super(MACD, self).getState()
+        ret["emas"] = copy.deepcopy((self.__fastEMASkip, self.__fastEMA, self.__slowEMA, self.__signalEMA))
+        ret["signal"] = self.__signal.getState()
+        ret["histogram"] = self.__histogram.getState()
+        return ret
+
+    def setState(self, state):
+        """Restores the state of the indicator from the one returned by :meth:`getState`.
+        No new value events are emitted."""
+        super(MACD, self).setState(state)
+        self.__fastEMASkip, self.__fastEMA, self.__slowEMA, self.__signalEMA = copy.deepcopy(state["emas"])
+        self.__signal.setState(state["signal"])
+        self.__histogram.setState(state["histogram"])
+
+    # Returns the MACD, signal and histogram values.
+    def __update(self, value):
         diff = None
         macdValue = None
-        signalValue = None
         histogramValue = None
 
         # We need to skip some values when calculating the fast EMA in order for both EMA
         # to calculate their first values at the same time.
         # I'M FORCING THIS BEHAVIOUR ONLY TO MAKE THIS FITLER MATCH TA-Lib MACD VALUES.
-        self.__slowEMAWindow.onNewValue(dateTime, value)
+        slowValue = self.__slowEMA.update(value)
         if self.__fastEMASkip > 0:
             self.__fastEMASkip -= 1
         else:
-            self.__fastEMAWindow.onNewValue(dateTime, value)
-            if self.__fastEMAWindow.windowFull():
-                diff = self.__fastEMAWindow.getValue() - self.__slowEMAWindow.getValue()
+            fastValue = self.__fastEMA.update(value)
+            if fastValue is not None:
+                diff = fastValue - slowValue
 
         # Make the first MACD value available as soon as the first signal value is available.
         # I'M FORCING THIS BEHAVIOUR ONLY TO MAKE THIS FITLER MATCH TA-Lib MACD VALUES.
-        self.__signalEMAWindow.onNewValue(dateTime, diff)
-        if self.__signalEMAWindow.windowFull():
+        signalValue = self.__signalEMA.update(diff)
+        if signalValue is not None:
             macdValue = diff
-            signalValue = self.__signalEMAWindow.getValue()
             histogramValue = macdValue - signalValue
 
-        self.appendWithDateTime(dateTime, macdValue)
+        return macdValue, signalValue, histogramValue
+
+    def __onNewValue(self, dataSeries, dateTime, value):
+        macdValue, signalValue, histogramValue = self.__update(value)
         self.__signal.appendWithDateTime(dateTime, signalValue)
         self.__histogram.appendWithDateTime(dateTime, histogramValue)
+        self.appendWithDateTime(dateTime, macdValue)
+
+    def __onNewValues(self, dataSeries, dateTimes, values):
+        newValues = [self.__update(value) for value in values]
+        self.__signal.extendWithDateTimes(dateTimes, [newValue[1] for newValue in newValues])
+        self.__histogram.extendWithDateTimes(dateTimes, [newValue[2] for newValue in newValues])
+        self.extendWithDateTimes(dateTimes, [newValue[0] for newValue in newValues])
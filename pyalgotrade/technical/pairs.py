@@ -0,0 +1,226 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+from pyalgotrade import dataseries
+from pyalgotrade.dataseries import aligned
+from pyalgotrade.utils import collections
+
+
+class PairSpread(object):
+    """The hedge ratio, the spread and the spread Z-Score for a pair of legs in a :class:`PairLegs`.
+
+    .. note::
+        This class should not be instantiated directly. Use :meth:`PairLegs.addPair` instead.
+    """
+
+    def __init__(self, maxLen):
+        self.__hedgeRatio = dataseries.SequenceDataSeries(maxLen)
+        self.__spread = dataseries.SequenceDataSeries(maxLen)
+        self.__zScore = dataseries.SequenceDataSeries(maxLen)
+
+    def appendWithDateTime(self, dateTime, hedgeRatio, spread, zScore):
+        self.__hedgeRatio.appendWithDateTime(dateTime, hedgeRatio)
+        self.__spread.appendWithDateTime(dateTime, spread)
+        self.__zScore.appendWithDateTime(dateTime, zScore)
+
+    def getHedgeRatio(self):
+        """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the hedge ratio. That is, the slope of the least
+        squares regression line, with no intercept, of the first leg on the second one."""
+        return self.__hedgeRatio
+
+    def getSpread(self):
+        """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the spread. That is, the first leg minus the second
+        one times the hedge ratio."""
+        return self.__spread
+
+    def getZScore(self):
+        """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the Z-Score of the last spread, relative to the
+        spreads over the window calculated using the last hedge ratio."""
+        return self.__zScore
+
+
+# Keeps the values in the window for every leg, along with the sums and sums of squares for every leg and the sums of
+# the products for every pair, so hedge ratios, spreads and Z-Scores for all the pairs can be updated in O(1) per pair
+# using numpy. Like in stats.RollingMomentsEventWindow, values are shifted by an anchor value for every leg to avoid
+# catastrophic cancellation when calculating the spread variance, and sums are recalculated every RECALC_PERIOD updates,
+# using the mean values as anchors, to bound the floating point drift.
+class PairLegs(object):
+    """A PairLegs class is responsible for calculating the rolling hedge ratio, spread and spread Z-Score for many
+    pairs of DataSeries, sharing the state for the DataSeries (the legs) that are part of more than one pair.
+
+    :param dataSeries: The DataSeries for the legs.
+    :type dataSeries: list.
+    :param windowSize: The number of values to use in the calculation. Must be > 1.
+    :type windowSize: int.
+    :param maxLen: The maximum number of values to hold for each pair.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        Legs are aligned by datetime, so values are calculated only for the datetimes in all the DataSeries. Datetimes
+        where any of the legs has a None value are skipped.
+    """
+
+    RECALC_PERIOD = 1000
+
+    def __init__(self, dataSeries, windowSize, maxLen=None):
+        assert len(dataSeries) > 0, "No DataSeries"
+        assert windowSize > 1, "windowSize must be > 1"
+
+        self.__legs = dict((id(ds), i) for i, ds in enumerate(dataSeries))
+        assert len(self.__legs) == len(dataSeries), "Duplicate DataSeries"
+
+        # Keep a reference to the DataSeries so their ids are not reused.
+        self.__dataSeries = list(dataSeries)
+        self.__windowSize = windowSize
+        self.__maxLen = maxLen
+        self.__values = collections.NumPyDeque(windowSize, width=len(dataSeries))
+        self.__anchors = None
+        self.__sums = np.zeros(len(dataSeries))
+        self.__sumsSq = np.zeros(len(dataSeries))
+        self.__updates = 0
+
+        self.__pairs = []
+        self.__pairLegs1 = np.zeros(0, dtype=int)
+        self.__pairLegs2 = np.zeros(0, dtype=int)
+        self.__pairSumsXY = np.zeros(0)
+
+        # Only the last aligned values are needed.
+        self.__aligned = aligned.multi_datetime_aligned(dataSeries, maxLen=1)
+        # Aligned values are added in order, so all of them are there when the last one gets a new value.
+        self.__aligned[-1].getNewValueEvent().subscribe(self.__onNewValue)
+
+    def __getLeg(self, ds):
+        ret = self.__legs.get(id(ds))
+        if ret is None:
+            raise Exception("The DataSeries is not one of the legs")
+        return ret
+
+    # Returns the values in the window shifted by the anchors.
+    def __getShiftedValues(self):
+        ret = self.__values.data()
+        if self.__anchors is not None:
+            ret = ret - self.__anchors
+        return ret
+
+    def __recalc(self):
+        self.__anchors = self.__values.data().mean(axis=0)
+        shifted = self.__getShiftedValues()
+        self.__sums = shifted.sum(axis=0)
+        self.__sumsSq = (shifted * shifted).sum(axis=0)
+        self.__pairSumsXY = (shifted[:, self.__pairLegs1] * shifted[:, self.__pairLegs2]).sum(axis=0)
+        self.__updates = 0
+
+    def addPair(self, dataSeries1, dataSeries2):
+        """Adds a pair and returns a :class:`PairSpread` with the hedge ratio, the spread and the spread Z-Score.
+
+        :param dataSeries1: The DataSeries for the first leg. Must be one of the legs.
+        :type dataSeries1: :class:`pyalgotrade.dataseries.DataSeries`.
+        :param dataSeries2: The DataSeries for the second leg. Must be one of the legs.
+        :type dataSeries2: :class:`pyalgotrade.dataseries.DataSeries`.
+        :rtype: :class:`PairSpread`.
+        """
+        leg1 = self.__getLeg(dataSeries1)
+        leg2 = self.__getLeg(dataSeries2)
+        assert leg1 != leg2, "Both legs are the same"
+
+        ret = PairSpread(self.__maxLen)
+        self.__pairs.append(ret)
+        self.__pairLegs1 = np.append(self.__pairLegs1, leg1)
+        self.__pairLegs2 = np.append(self.__pairLegs2, leg2)
+        shifted = self.__getShiftedValues()
+        self.__pairSumsXY = np.append(self.__pairSumsXY, (shifted[:, leg1] * shifted[:, leg2]).sum())
+        return ret
+
+    def __update(self, row):
+        legs1 = self.__pairLegs1
+        legs2 = self.__pairLegs2
+        if self.__anchors is None:
+            self.__anchors = row
+        if len(self.__values) == self.__windowSize:
+            oldRow = self.__values[0] - self.__anchors
+            self.__sums -= oldRow
+            self.__sumsSq -= oldRow * oldRow
+            self.__pairSumsXY -= oldRow[legs1] * oldRow[legs2]
+        self.__values.append(row)
+        row = row - self.__anchors
+        self.__sums += row
+        self.__sumsSq += row * row
+        self.__pairSumsXY += row[legs1] * row[legs2]
+
+        self.__updates += 1
+        if self.__updates >= self.RECALC_PERIOD:
+            self.__recalc()
+
+    def __onNewValue(self, dataSeries, dateTime, value):
+        row = [ds[-1] for ds in self.__aligned]
+        if None in row:
+            return
+        row = np.asarray(row, dtype=float)
+        self.__update(row)
+
+        if len(self.__values) < self.__windowSize:
+            for pair in self.__pairs:
+                pair.appendWithDateTime(dateTime, None, None, None)
+            return
+
+        # The first leg (y) is regressed on the second one (x), with no intercept.
+        legs1 = self.__pairLegs1
+        legs2 = self.__pairLegs2
+        count = float(self.__windowSize)
+        # Sums of the values shifted by the anchors (ax and ay).
+        ax = self.__anchors[legs2]
+        ay = self.__anchors[legs1]
+        sumsX = self.__sums[legs2]
+        sumsY = self.__sums[legs1]
+        sumsXX = self.__sumsSq[legs2]
+        sumsYY = self.__sumsSq[legs1]
+        sumsXY = self.__pairSumsXY
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # The regression needs the sums of the values, not the shifted ones.
+            rawSumsXY = sumsXY + ay * sumsX + ax * sumsY + count * ax * ay
+            rawSumsXX = sumsXX + 2 * ax * sumsX + count * ax * ax
+            hedgeRatios = rawSumsXY / rawSumsXX
+            spreads = row[legs1] - hedgeRatios * row[legs2]
+            # Mean and sample standard deviation of y - hedgeRatio * x over the window. The sums of the squared
+            # deviations are calculated from the shifted values, since shifting doesn't change them.
+            means = ay + sumsY / count - hedgeRatios * (ax + sumsX / count)
+            devSqX = sumsXX - sumsX * sumsX / count
+            devSqY = sumsYY - sumsY * sumsY / count
+            devXY = sumsXY - sumsX * sumsY / count
+            sumsSqDev = devSqY - 2 * hedgeRatios * devXY + hedgeRatios * hedgeRatios * devSqX
+            stdDevs = np.sqrt(np.maximum(sumsSqDev, 0) / (count - 1))
+            # If the spread varies a lot less than the first leg, the result would be dominated by rounding errors, so
+            # in that case it gets calculated from the values.
+            exact = np.flatnonzero(sumsSqDev <= devSqY * 1e-6)
+            if len(exact):
+                values = self.__values.data()
+                windowSpreads = values[:, legs1[exact]] - hedgeRatios[exact] * values[:, legs2[exact]]
+                means[exact] = windowSpreads.mean(axis=0)
+                stdDevs[exact] = windowSpreads.std(axis=0, ddof=1)
+            zScores = (spreads - means) / stdDevs
+
+        for pair, hedgeRatio, spread, zScore in zip(self.__pairs, hedgeRatios.tolist(), spreads.tolist(), zScores.tolist()):
+            if zScore != zScore or abs(zScore) == float("inf"):
+                zScore = None
+            pair.appendWithDateTime(dateTime, hedgeRatio, spread, zScore)
@@ -38,5 +38,5 @@ class RatioEventWindow(technical.EventWindow):
 # Calculates the ratio between a value and the previous one.
 # The ratio can't be calculated if a previous value is 0.
 class Ratio(technical.EventBasedFilter):
-    def __init__(self, dataSeries, maxLen=None):
-        super(Ratio, self).__init__(dataSeries, RatioEventWindow(), maxLen)
+    def __init__(self, dataSeries, maxLen=None, dtype=None):
+        super(Ratio, self).__init__(dataSeries, RatioEventWindow(), maxLen, dtype)
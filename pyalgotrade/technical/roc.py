@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade import technical
 
 
@@ -38,6 +40,16 @@ class ROCEventWindow(technical.EventWindow):
                     ret = diff / prev
         return ret
 
+    def computeValues(self, values):
+        windows = technical.rolling_windows(values, self.getWindowSize())
+        prev = windows[:, 0]
+        diff = windows[:, -1] - prev
+        zeros = prev == 0
+        # The rate of change can't be calculated in this case.
+        if (diff[zeros] != 0).any():
+            return None
+        return np.where(diff == 0, 0.0, diff / np.where(zeros, 1, prev))
+
 
 class RateOfChange(technical.EventBasedFilter):
     """Rate of change filter as described in http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:rate_of_change_roc_and_momentum.
@@ -50,8 +62,11 @@ class RateOfChange(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, valuesAgo, maxLen=None):
+    def __init__(self, dataSeries, valuesAgo, maxLen=None, dtype=None):
         assert(valuesAgo > 0)
-        super(RateOfChange, self).__init__(dataSeries, ROCEventWindow(valuesAgo + 1), maxLen)
+        super(RateOfChange, self).__init__(dataSeries, ROCEventWindow(valuesAgo + 1), maxLen, dtype)
@@ -69,6 +69,13 @@ def avg_gain_loss(values, begin, end):
     return (gain/float(rangeLen-1), loss/float(rangeLen-1))
 
 
+def rsi_value(avgGain, avgLoss):
+    if avgLoss == 0:
+        return 100
+    rs = avgGain / avgLoss
+    return 100 - 100 / (1 + rs)
+
+
 class RSIEventWindow(technical.EventWindow):
     def __init__(self, period):
         assert(period > 1)
@@ -96,15 +103,35 @@ class RSIEventWindow(technical.EventWindow):
                 avgGain = (self.__prevGain * (self.__period-1) + currGain) / float(self.__period)
                 avgLoss = (self.__prevLoss * (self.__period-1) + currLoss) / float(self.__period)
 
-            if avgLoss == 0:
-                self.__value = 100
-            else:
-                rs = avgGain / avgLoss
-                self.__value = 100 - 100 / (1 + rs)
-
+            self.__value = rsi_value(avgGain, avgLoss)
             self.__prevGain = avgGain
             self.__prevLoss = avgLoss
 
+    def computeValues(self, values):
+        # The averages are updated in the same order as in onNewValue, so the results match exactly.
+        windowSize = self.getWindowSize()
+        if len(values) < windowSize:
+            return []
+
+        avgGain = self.__prevGain
+        avgLoss = self.__prevLoss
+        value = self.__value
+        if avgGain is None:
+            avgGain, avgLoss = avg_gain_loss(values, 0, windowSize)
+            value = rsi_value(avgGain, avgLoss)
+        ret = [value]
+        values = values.tolist()
+        for i in xrange(windowSize, len(values)):
+            currGain, currLoss = gain_loss_one(values[i-1], values[i])
+            avgGain = (avgGain * (self.__period-1) + currGain) / float(self.__period)
+            avgLoss = (avgLoss * (self.__period-1) + currLoss) / float(self.__period)
+            value = rsi_value(avgGain, avgLoss)
+            ret.append(value)
+        self.__value = value
+        self.__prevGain = avgGain
+        self.__prevLoss = avgLoss
+        return ret
+
     def getValue(self):
         return self.__value
 
@@ -120,7 +147,10 @@ class RSI(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, period, maxLen=None):
-        super(RSI, self).__init__(dataSeries, RSIEventWindow(period), maxLen)
+    def __init__(self, dataSeries, period, maxLen=None, dtype=None):
+        super(RSI, self).__init__(dataSeries, RSIEventWindow(period), maxLen, dtype)
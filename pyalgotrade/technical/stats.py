@@ -18,10 +18,79 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import math
+
 from pyalgotrade import technical
 
 
-class StdDevEventWindow(technical.EventWindow):
+class RollingMomentsEventWindow(technical.EventWindow):
+    # Keeps the mean and the sum of the squared deviations from the mean of the values in the window, updated using
+    # Welford's method, so the mean and the variance can be calculated in O(1) without the catastrophic cancellation of
+    # subtracting sums of squares. Values are shifted by an anchor value to keep the mean small, and everything is
+    # recalculated from the values in the window every REANCHOR_PERIOD updates to bound the floating point drift, or
+    # earlier if the variance drops a lot, since rounding errors are relative to the variance they were made with.
+    REANCHOR_PERIOD = 1000
+
+    def __init__(self, period):
+        super(RollingMomentsEventWindow, self).__init__(period)
+        self.__anchor = None
+        # Mean of the values shifted by the anchor.
+        self.__mean = 0
+        self.__sumSqDev = 0
+        self.__maxSumSqDev = 0
+        self.__updates = 0
+
+    def __reanchor(self):
+        values = self.getValues()
+        if len(values):
+            self.__anchor = values.mean()
+            deviations = values - self.__anchor
+            self.__mean = deviations.mean()
+            deviations = deviations - self.__mean
+            self.__sumSqDev = (deviations * deviations).sum()
+        self.__maxSumSqDev = self.__sumSqDev
+        self.__updates = 0
+
+    def onNewValue(self, dateTime, value):
+        firstValue = None
+        if value is not None and self.windowFull():
+            firstValue = self.getValues()[0]
+
+        super(RollingMomentsEventWindow, self).onNewValue(dateTime, value)
+
+        if value is not None:
+            if self.__anchor is None:
+                self.__anchor = self.getValues()[-1]
+            newValue = self.getValues()[-1] - self.__anchor
+            mean = self.__mean
+            if firstValue is None:
+                # The window grows.
+                self.__mean += (newValue - mean) / float(len(self.getValues()))
+                self.__sumSqDev += (newValue - mean) * (newValue - self.__mean)
+            else:
+                # The first value gets replaced.
+                firstValue -= self.__anchor
+                self.__mean += (newValue - firstValue) / float(len(self.getValues()))
+                self.__sumSqDev += (newValue - firstValue) * (newValue - self.__mean + firstValue - mean)
+
+            self.__maxSumSqDev = max(self.__maxSumSqDev, self.__sumSqDev)
+            self.__updates += 1
+            if self.__updates >= self.REANCHOR_PERIOD or self.__sumSqDev < self.__maxSumSqDev * 1e-3:
+                self.__reanchor()
+
+    def getMean(self):
+        return self.__anchor + self.__mean
+
+    def getStdDev(self, ddof):
+        count = len(self.getValues())
+        if count <= ddof:
+            # Let numpy deal with this, just like it used to.
+            return self.getValues().std(ddof=ddof)
+        # Rounding errors may yield tiny negative values.
+        return math.sqrt(max(self.__sumSqDev, 0) / float(count - ddof))
+
+
+class StdDevEventWindow(RollingMomentsEventWindow):
     def __init__(self, period, ddof):
         assert(period > 0)
         super(StdDevEventWindow, self).__init__(period)
@@ -30,7 +99,7 @@ class StdDevEventWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = self.getValues().std(ddof=self.__ddof)
+            ret = self.getStdDev(self.__ddof)
         return ret
 
 
@@ -47,13 +116,16 @@ class StdDev(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, period, ddof=0, maxLen=None):
-        super(StdDev, self).__init__(dataSeries, StdDevEventWindow(period, ddof), maxLen)
+    def __init__(self, dataSeries, period, ddof=0, maxLen=None, dtype=None):
+        super(StdDev, self).__init__(dataSeries, StdDevEventWindow(period, ddof), maxLen, dtype)
 
 
-class ZScoreEventWindow(technical.EventWindow):
+class ZScoreEventWindow(RollingMomentsEventWindow):
     def __init__(self, period, ddof):
         assert(period > 1)
         super(ZScoreEventWindow, self).__init__(period)
@@ -62,11 +134,8 @@ class ZScoreEventWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            lastValue = values[-1]
-            mean = values.mean()
-            std = values.std(ddof=self.__ddof)
-            ret = (lastValue - mean) / float(std)
+            lastValue = self.getValues()[-1]
+            ret = (lastValue - self.getMean()) / float(self.getStdDev(self.__ddof))
         return ret
 
 
@@ -83,7 +152,10 @@ class ZScore(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, period, ddof=0, maxLen=None):
-        super(ZScore, self).__init__(dataSeries, ZScoreEventWindow(period, ddof), maxLen)
+    def __init__(self, dataSeries, period, ddof=0, maxLen=None, dtype=None):
+        super(ZScore, self).__init__(dataSeries, ZScoreEventWindow(period, ddof), maxLen, dtype)
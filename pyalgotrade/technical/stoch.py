@@ -18,9 +18,11 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+from pyalgotrade import dataseries
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
 from pyalgotrade.technical import ma
+from pyalgotrade.utils import collections
 
 
 def get_low_high_values(useAdjusted, bars):
@@ -34,17 +36,27 @@ def get_low_high_values(useAdjusted, bars):
     return (lowestLow, highestHigh)
 
 
+# The window holds the close prices, and the lowest low and highest high are tracked separately.
 class SOEventWindow(technical.EventWindow):
     def __init__(self, period, useAdjustedValues):
         assert(period > 1)
-        super(SOEventWindow, self).__init__(period, dtype=object)
+        super(SOEventWindow, self).__init__(period)
         self.__useAdjusted = useAdjustedValues
+        self.__lowestLow = collections.RollingExtremum(period, True)
+        self.__highestHigh = collections.RollingExtremum(period, False)
+
+    def onNewValue(self, dateTime, value):
+        if value is not None:
+            super(SOEventWindow, self).onNewValue(dateTime, value.getClose(self.__useAdjusted))
+            self.__lowestLow.append(value.getLow(self.__useAdjusted))
+            self.__highestHigh.append(value.getHigh(self.__useAdjusted))
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            lowestLow, highestHigh = get_low_high_values(self.__useAdjusted, self.getValues())
-            currentClose = self.getValues()[-1].getClose(self.__useAdjusted)
+            lowestLow = self.__lowestLow.getValue()
+            highestHigh = self.__highestHigh.getValue()
+            currentClose = self.getValues()[-1]
             closeDelta = currentClose - lowestLow
             if closeDelta:
                 ret = closeDelta / float(highestHigh - lowestLow) * 100
@@ -70,15 +82,52 @@ class StochasticOscillator(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
+
+    .. note::
+        %K and %D are calculated in a single update, and %D is appended before %K.
     """
 
-    def __init__(self, barDataSeries, period, dSMAPeriod=3, useAdjustedValues=False, maxLen=None):
+    def __init__(self, barDataSeries, period, dSMAPeriod=3, useAdjustedValues=False, maxLen=None, dtype=None):
         assert dSMAPeriod > 1, "dSMAPeriod must be > 1"
         assert isinstance(barDataSeries, bards.BarDataSeries), \
             "barDataSeries must be a dataseries.bards.BarDataSeries instance"
 
-        super(StochasticOscillator, self).__init__(barDataSeries, SOEventWindow(period, useAdjustedValues), maxLen)
-        self.__d = ma.SMA(self, dSMAPeriod, maxLen)
+        # %D is calculated from %K values as they're calculated, instead of using an SMA over this DataSeries.
+        self.__dEventWindow = ma.SMAEventWindow(dSMAPeriod)
+        self.__d = dataseries.SequenceDataSeries(maxLen, dtype)
+        super(StochasticOscillator, self).__init__(
+            barDataSeries, SOEventWindow(period, useAdjustedValues), maxLen, dtype
+        )
+
+    def appendWithDateTime(self, dateTime, value):
+        # %D is appended first so it's up to date when subscribers get the new %K value.
+        self.__dEventWindow.onNewValue(dateTime, value)
+        self.__d.appendWithDateTime(dateTime, self.__dEventWindow.getValue())
+        super(StochasticOscillator, self).appendWithDateTime(dateTime, value)
+
+    def extendWithDateTimes(self, dateTimes, values):
+        self.__d.extendWithDateTimes(dateTimes, self.__dEventWindow.onNewValues(dateTimes, values))
+        super(StochasticOscillator, self).extendWithDateTimes(dateTimes, values)
+
+    def getState(self):
+        ret = super(StochasticOscillator, self).getState()
+        ret["dEventWindow"] = self.__dEventWindow.getState()
+        ret["d"] = self.__d.getState()
+        return ret
+
+    def setState(self, state):
+        super(StochasticOscillator, self).setState(state)
+        self.__dEventWindow.setState(state["dEventWindow"])
+        self.__d.setState(state["d"])
+
+    def setLazy(self, lazy):
+        # %D values are held in a different DataSeries, so they can't be calculated when this one is accessed.
+        if lazy:
+            raise Exception("Lazy evaluation is not supported")
+        super(StochasticOscillator, self).setLazy(lazy)
 
     def getD(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the %D values."""
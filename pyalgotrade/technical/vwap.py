@@ -20,27 +20,48 @@
 
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
+from pyalgotrade.utils import collections
 
 
+# Keeps the prices times the volumes in the window, and the volumes in a separate buffer, along with their sums, so the
+# VWAP can be calculated in O(1). Sums are recalculated every RECALC_PERIOD updates to bound the floating point drift.
 class VWAPEventWindow(technical.EventWindow):
+    RECALC_PERIOD = 1000
+
     def __init__(self, windowSize, useTypicalPrice):
-        super(VWAPEventWindow, self).__init__(windowSize, dtype=object)
+        super(VWAPEventWindow, self).__init__(windowSize)
         self.__useTypicalPrice = useTypicalPrice
+        self.__volumes = collections.NumPyDeque(windowSize)
+        self.__cumTotal = 0
+        self.__cumVolume = 0
+        self.__updates = 0
+
+    def onNewValue(self, dateTime, value):
+        if value is not None:
+            if self.__useTypicalPrice:
+                price = value.getTypicalPrice()
+            else:
+                price = value.getPrice()
+            volume = value.getVolume()
+
+            if self.windowFull():
+                self.__cumTotal -= self.getValues()[0]
+                self.__cumVolume -= self.__volumes[0]
+            super(VWAPEventWindow, self).onNewValue(dateTime, price * volume)
+            self.__volumes.append(volume)
+            self.__cumTotal += self.getValues()[-1]
+            self.__cumVolume += self.__volumes[-1]
+
+            self.__updates += 1
+            if self.__updates >= self.RECALC_PERIOD:
+                self.__cumTotal = self.getValues().sum()
+                self.__cumVolume = self.__volumes.data().sum()
+                self.__updates = 0
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            cumTotal = 0
-            cumVolume = 0
-
-            for bar in self.getValues():
-                if self.__useTypicalPrice:
-                    cumTotal += bar.getTypicalPrice() * bar.getVolume()
-                else:
-                    cumTotal += bar.getPrice() * bar.getVolume()
-                cumVolume += bar.getVolume()
-
-            ret = cumTotal / float(cumVolume)
+            ret = self.__cumTotal / float(self.__cumVolume)
         return ret
 
 
@@ -57,10 +78,13 @@ class VWAP(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param dtype: If not None, the data-type used to store the calculated values.
+        Check :class:`pyalgotrade.dataseries.SequenceDataSeries`.
+    :type dtype: data-type.
     """
 
-    def __init__(self, dataSeries, period, useTypicalPrice=False, maxLen=None):
+    def __init__(self, dataSeries, period, useTypicalPrice=False, maxLen=None, dtype=None):
         assert isinstance(dataSeries, bards.BarDataSeries), \
             "dataSeries must be a dataseries.bards.BarDataSeries instance"
 
-        super(VWAP, self).__init__(dataSeries, VWAPEventWindow(period, useTypicalPrice), maxLen)
+        super(VWAP, self).__init__(dataSeries, VWAPEventWindow(period, useTypicalPrice), maxLen, dtype)
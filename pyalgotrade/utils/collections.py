@@ -18,8 +18,17 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+from __future__ import absolute_import
+
+import itertools
+import numbers
+import tempfile
+from collections import deque
+
 import numpy as np
 
+from pyalgotrade.utils import dt
+
 
 def lt(v1, v2):
     if v1 is None:
@@ -56,51 +65,153 @@ def intersect(values1, values2, skipNone=False):
     return (values, ix1, ix2)
 
 
+# Returns (values, [ix1, ix2, ..., ixN]) for N sorted arrays.
+# values is a numpy.array with the values that are in every array, and each ix is a numpy.array with the positions of
+# those values in the corresponding array. If a value is repeated, the position of its first occurrence is used.
+# Arrays are expected to be numpy.arrays (like int64 timestamps or datetime64 values) or sequences that can be converted.
+def intersect_arrays(arrays):
+    assert len(arrays) > 0, "No arrays to intersect"
+
+    arrays = [np.asarray(values) for values in arrays]
+    # Remove duplicates from each array, and count in how many arrays each value shows up.
+    uniques = []
+    for values in arrays:
+        if len(values) > 1:
+            values = values[np.concatenate(([True], values[1:] != values[:-1]))]
+        uniques.append(values)
+    allValues, counts = np.unique(np.concatenate(uniques), return_counts=True)
+    values = allValues[counts == len(arrays)]
+    return (values, [np.searchsorted(array, values) for array in arrays])
+
+
+# Keeps track of the minimum or maximum of the last windowSize values using a monotonic deque, so updates are amortized
+# O(1) instead of O(windowSize).
+# The deque holds (position, value) pairs for the values that can still become the extreme value, sorted by position
+# and value. Values that are beaten by a newer one are discarded, and so are values that fall out of the window.
+class RollingExtremum(object):
+    def __init__(self, windowSize, useMin):
+        assert windowSize > 0, "Invalid window size"
+        self.__windowSize = windowSize
+        self.__useMin = useMin
+        self.__candidates = deque()
+        self.__position = 0
+
+    def __len__(self):
+        return min(self.__position, self.__windowSize)
+
+    def append(self, value):
+        candidates = self.__candidates
+        if self.__useMin:
+            while candidates and candidates[-1][1] >= value:
+                candidates.pop()
+        else:
+            while candidates and candidates[-1][1] <= value:
+                candidates.pop()
+        candidates.append((self.__position, value))
+        if candidates[0][0] <= self.__position - self.__windowSize:
+            candidates.popleft()
+        self.__position += 1
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def getWindowSize(self):
+        return self.__windowSize
+
+    # Returns the extreme value in the window, or None if no values were added.
+    def getValue(self):
+        ret = None
+        if self.__candidates:
+            ret = self.__candidates[0][1]
+        return ret
+
+
 # Like a collections.deque but using a numpy.array.
+# The array is over-allocated so that, once full, new values are written after the last one and the window just slides
+# to the right. Values are moved back to the beginning of the array only when the end is reached, which makes appends
+# amortized O(1) while still being able to return the values as a contiguous array without copying.
 class NumPyDeque(object):
-    def __init__(self, maxLen, dtype=float):
+    # How many times bigger than maxLen the underlying array is.
+    GROWTH_FACTOR = 2
+
+    def __init__(self, maxLen, dtype=float, width=None):
         assert maxLen > 0, "Invalid maximum length"
 
-        self.__values = np.empty(maxLen, dtype=dtype)
+        # If width is set, each value is a row of width values.
+        self.__rowShape = () if width is None else (width,)
+        self.__values = np.empty((maxLen * NumPyDeque.GROWTH_FACTOR,) + self.__rowShape, dtype=dtype)
         self.__maxLen = maxLen
+        # Values live in self.__values[self.__startPos:self.__nextPos].
+        self.__startPos = 0
         self.__nextPos = 0
 
     def getMaxLen(self):
         return self.__maxLen
 
     def append(self, value):
-        if self.__nextPos < self.__maxLen:
-            self.__values[self.__nextPos] = value
-            self.__nextPos += 1
-        else:
-            # Shift items to the left and put the last value.
-            # I'm not using np.roll to avoid creating a new array.
-            self.__values[0:-1] = self.__values[1:]
-            self.__values[self.__nextPos - 1] = value
+        if self.__nextPos == len(self.__values):
+            # Move the last maxLen - 1 values to the beginning to make room.
+            keep = self.__maxLen - 1
+            self.__values[0:keep] = self.__values[self.__nextPos - keep:self.__nextPos]
+            self.__startPos = 0
+            self.__nextPos = keep
+
+        self.__values[self.__nextPos] = value
+        self.__nextPos += 1
+        if self.__nextPos - self.__startPos > self.__maxLen:
+            self.__startPos += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.__values.dtype)
+        count = len(values)
+        if count >= self.__maxLen:
+            # Only the last maxLen values survive.
+            self.__values[0:self.__maxLen] = values[count - self.__maxLen:]
+            self.__startPos = 0
+            self.__nextPos = self.__maxLen
+            return
+
+        if self.__nextPos + count > len(self.__values):
+            # Move the values that will survive to the beginning to make room.
+            keep = min(self.__maxLen - count, len(self))
+            self.__values[0:keep] = self.__values[self.__nextPos - keep:self.__nextPos]
+            self.__startPos = 0
+            self.__nextPos = keep
+
+        self.__values[self.__nextPos:self.__nextPos + count] = values
+        self.__nextPos += count
+        self.__startPos = max(self.__startPos, self.__nextPos - self.__maxLen)
 
     def data(self):
-        # If all values are not initialized, return a portion of the array.
-        if self.__nextPos < self.__maxLen:
-            ret = self.__values[0:self.__nextPos]
-        else:
-            ret = self.__values
-        return ret
+        return self.__values[self.__startPos:self.__nextPos]
 
     def resize(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
         # Create empty, copy last values and swap.
-        values = np.empty(maxLen, dtype=self.__values.dtype)
-        lastValues = self.__values[0:self.__nextPos]
-        values[0:min(maxLen, len(lastValues))] = lastValues[-1*min(maxLen, len(lastValues)):]
+        lastValues = self.data()
+        count = min(maxLen, len(lastValues))
+        values = np.empty((maxLen * NumPyDeque.GROWTH_FACTOR,) + self.__rowShape, dtype=self.__values.dtype)
+        values[0:count] = lastValues[len(lastValues) - count:]
         self.__values = values
 
         self.__maxLen = maxLen
-        if self.__nextPos >= self.__maxLen:
-            self.__nextPos = self.__maxLen
+        self.__startPos = 0
+        self.__nextPos = count
 
     def __len__(self):
-        return self.__nextPos
+        return self.__nextPos - self.__startPos
+
+    # Only the values in the deque get pickled or copied, not the whole underlying array.
+    def __getstate__(self):
+        return {"maxLen": self.__maxLen, "values": self.data().copy()}
+
+    def __setstate__(self, state):
+        values = state["values"]
+        self.__init__(state["maxLen"], values.dtype, values.shape[1] if values.ndim > 1 else None)
+        self.__values[0:len(values)] = values
+        self.__nextPos = len(values)
 
     def __getitem__(self, key):
         return self.data()[key]
@@ -109,33 +220,424 @@ class NumPyDeque(object):
 # I'm not using collections.deque because:
 # 1: Random access is slower.
 # 2: Slicing is not supported.
+# Values are kept in a list that grows until maxLen is reached, and from then on it is used as a circular buffer, so
+# appending is O(1) regardless of maxLen.
 class ListDeque(object):
     def __init__(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
         self.__values = []
         self.__maxLen = maxLen
+        # Position of the oldest value in self.__values. Only != 0 once the buffer is full.
+        self.__head = 0
 
     def getMaxLen(self):
         return self.__maxLen
 
     def append(self, value):
-        self.__values.append(value)
+        if len(self.__values) < self.__maxLen:
+            self.__values.append(value)
+        else:
+            # Overwrite the oldest value.
+            self.__values[self.__head] = value
+            self.__head += 1
+            if self.__head == self.__maxLen:
+                self.__head = 0
+
+    def extend(self, values):
+        self.__rotate()
+        self.__values.extend(values)
         # Check bounds
         if len(self.__values) > self.__maxLen:
-            self.__values.pop(0)
+            self.__values = self.__values[-1*self.__maxLen:]
+
+    def __rotate(self):
+        # Put the values back in order so self.__values can be used directly.
+        if self.__head:
+            self.__values = self.__values[self.__head:] + self.__values[:self.__head]
+            self.__head = 0
 
     def data(self):
-        return self.__values
+        # Putting the values back in order would take O(maxLen) after every append, so a view is returned instead.
+        return ListDequeView(self)
 
     def resize(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
+        self.__rotate()
         self.__maxLen = maxLen
         self.__values = self.__values[-1*maxLen:]
 
     def __len__(self):
         return len(self.__values)
 
+    def __iter__(self):
+        head = self.__head
+        return itertools.chain(itertools.islice(self.__values, head, None), itertools.islice(self.__values, head))
+
+    def __getitem__(self, key):
+        head = self.__head
+        if head == 0:
+            return self.__values[key]
+
+        size = len(self.__values)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(size)
+            if step != 1:
+                return list(self)[key]
+            if start >= stop:
+                return []
+            # Map logical positions to physical ones, and join the two parts if the slice wraps around.
+            start += head
+            stop += head
+            if stop <= size:
+                return self.__values[start:stop]
+            elif start >= size:
+                return self.__values[start - size:stop - size]
+            else:
+                return self.__values[start:] + self.__values[:stop - size]
+        else:
+            # Indexing the underlying list first raises the appropriate exceptions for invalid keys.
+            self.__values[key]
+            if key < 0:
+                key += size
+            key += head
+            if key >= size:
+                key -= size
+            return self.__values[key]
+
+
+# A read-only sequence with the values in a ListDeque, in order. Like a numpy.array view, it doesn't copy the values
+# and it reflects any changes made to the ListDeque afterwards.
+class ListDequeView(object):
+    def __init__(self, listDeque):
+        self.__listDeque = listDeque
+
+    def __len__(self):
+        return len(self.__listDeque)
+
+    def __iter__(self):
+        return iter(self.__listDeque)
+
+    def __getitem__(self, key):
+        return self.__listDeque[key]
+
+    def __eq__(self, other):
+        if isinstance(other, ListDequeView):
+            other = other[:]
+        return self[:] == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self[:])
+
+
+# A list that holds up to maxLen values, discarding the oldest ones as new values are appended.
+# Unlike ListDeque, values are always kept in order in the list itself, so reading, which is inherited from list, is as
+# fast as it gets. The price is that appending to a full list moves the remaining values, so this is meant for values
+# that are read a lot more often than the cost of moving maxLen references around.
+class BoundedList(list):
+    def __init__(self, maxLen):
+        assert maxLen > 0, "Invalid maximum length"
+
+        super(BoundedList, self).__init__()
+        self.__maxLen = maxLen
+
+    def getMaxLen(self):
+        return self.__maxLen
+
+    def append(self, value):
+        super(BoundedList, self).append(value)
+        if len(self) > self.__maxLen:
+            del self[0]
+
+    def extend(self, values):
+        super(BoundedList, self).extend(values)
+        if len(self) > self.__maxLen:
+            del self[:len(self) - self.__maxLen]
+
+    def resize(self, maxLen):
+        assert maxLen > 0, "Invalid maximum length"
+
+        self.__maxLen = maxLen
+        if len(self) > maxLen:
+            del self[:len(self) - maxLen]
+
+
+# Returns an array of size items that is memory mapped to a new temporary file.
+# The mapping holds its own file descriptor, so the file is closed right away. The file gets deleted once the array,
+# and any views over it, are garbage collected.
+def memmap_temporary_file(dtype, size, directory=None):
+    with tempfile.TemporaryFile(dir=directory) as f:
+        f.truncate(size * dtype.itemsize)
+        return np.memmap(f, dtype=dtype, mode="r+", shape=(size,))
+
+
+# An unbounded, append only, NumPyDeque like collection that stores values in a memory mapped temporary file.
+# The operating system keeps recently used pages in memory, but old values don't need to be resident.
+class MemMapDeque(object):
+    INITIAL_SIZE = 4096
+
+    def __init__(self, dtype=float, directory=None):
+        self.__dtype = np.dtype(dtype)
+        assert self.__dtype.kind != "O", "Objects can't be memory mapped"
+
+        self.__directory = directory
+        self.__values = memmap_temporary_file(self.__dtype, MemMapDeque.INITIAL_SIZE, directory)
+        self.__nextPos = 0
+
+    def __grow(self, size):
+        # Values are copied to a bigger file. Arrays returned before growing keep pointing to the previous mapping,
+        # which is still valid.
+        values = memmap_temporary_file(self.__dtype, size, self.__directory)
+        values[0:self.__nextPos] = self.__values[0:self.__nextPos]
+        self.__values = values
+
+    def getMaxLen(self):
+        return None
+
+    def append(self, value):
+        if self.__nextPos == len(self.__values):
+            self.__grow(len(self.__values) * 2)
+        self.__values[self.__nextPos] = value
+        self.__nextPos += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.__dtype)
+        nextPos = self.__nextPos + len(values)
+        if nextPos > len(self.__values):
+            self.__grow(max(len(self.__values) * 2, nextPos))
+        self.__values[self.__nextPos:nextPos] = values
+        self.__nextPos = nextPos
+
+    def data(self):
+        return self.__values[0:self.__nextPos]
+
+    def resize(self, maxLen):
+        # Values are never discarded.
+        pass
+
+    def close(self):
+        # The file goes away once the arrays returned by data() are gone too.
+        self.__values = None
+
+    def __len__(self):
+        return self.__nextPos
+
+    def __getitem__(self, key):
+        return self.data()[key]
+
+
+# An unbounded, append only table with a structured data-type that stores all its rows in a single memory mapped
+# temporary file. Fields are appended to independently, through a MemMapField for each one, so a field can be used as
+# the storage for a TypedDeque or a DateTimeDeque.
+class MemMapTable(object):
+    INITIAL_SIZE = 4096
+
+    def __init__(self, fields, directory=None):
+        self.__dtype = np.dtype(fields)
+        self.__directory = directory
+        self.__lengths = dict((name, 0) for name in self.__dtype.names)
+        self.__values = None
+        self.__columns = None
+        self.__map(MemMapTable.INITIAL_SIZE)
+
+    def __map(self, size):
+        values = memmap_temporary_file(self.__dtype, size, self.__directory)
+        if self.__values is not None:
+            # Arrays returned before growing keep pointing to the previous mapping, which is still valid.
+            count = max(self.__lengths.values())
+            values[0:count] = self.__values[0:count]
+        self.__values = values
+        self.__columns = dict((name, values[name]) for name in self.__dtype.names)
+
+    def __reserve(self, size):
+        if size > len(self.__values):
+            self.__map(max(len(self.__values) * 2, size))
+
+    def getField(self, name):
+        return MemMapField(self, name)
+
+    def getFieldLength(self, name):
+        return self.__lengths[name]
+
+    def getFieldValues(self, name):
+        return self.__columns[name][0:self.__lengths[name]]
+
+    def appendToField(self, name, value):
+        pos = self.__lengths[name]
+        self.__reserve(pos + 1)
+        self.__columns[name][pos] = value
+        self.__lengths[name] = pos + 1
+
+    def extendField(self, name, values):
+        values = np.asarray(values, dtype=self.__dtype[name])
+        pos = self.__lengths[name]
+        self.__reserve(pos + len(values))
+        self.__columns[name][pos:pos + len(values)] = values
+        self.__lengths[name] = pos + len(values)
+
+
+# A MemMapDeque like view over one of the fields in a MemMapTable.
+class MemMapField(object):
+    def __init__(self, table, name):
+        self.__table = table
+        self.__name = name
+
+    def getMaxLen(self):
+        return None
+
+    def append(self, value):
+        self.__table.appendToField(self.__name, value)
+
+    def extend(self, values):
+        self.__table.extendField(self.__name, values)
+
+    def data(self):
+        return self.__table.getFieldValues(self.__name)
+
+    def resize(self, maxLen):
+        # Values are never discarded.
+        pass
+
+    def __len__(self):
+        return self.__table.getFieldLength(self.__name)
+
+    def __getitem__(self, key):
+        return self.data()[key]
+
+
+# A ListDeque like collection that stores values in a NumPyDeque.
+# None values are stored as NaN (if the data-type supports it) and translated back when read, so this can be used as a
+# drop in replacement for ListDeque.
+# If storage is set, values are stored there instead of in a NumPyDeque of maxLen values.
+class TypedDeque(object):
+    def __init__(self, maxLen, dtype=float, storage=None):
+        if storage is None:
+            storage = NumPyDeque(maxLen, dtype)
+        self.__values = storage
+        self.__nullable = np.dtype(dtype).kind in ("f", "c")
+        # Items in object arrays are returned as they are, and not as numpy scalars.
+        self.__objects = np.dtype(dtype).kind == "O"
+
+    def getMaxLen(self):
+        return self.__values.getMaxLen()
+
+    def append(self, value):
+        if value is None and self.__nullable:
+            value = np.nan
+        self.__values.append(value)
+
+    def extend(self, values):
+        if self.__objects:
+            # Building an object array from a list could create a multi-dimensional array if values are sequences.
+            for value in values:
+                self.__values.append(value)
+        else:
+            # Converting to a floating point numpy.array already turns None into NaN.
+            self.__values.extend(values)
+
+    def array(self):
+        """Returns a numpy.array view of the values."""
+        return self.__values.data()
+
+    def data(self):
+        return self[:]
+
+    def resize(self, maxLen):
+        self.__values.resize(maxLen)
+
+    def __len__(self):
+        return len(self.__values)
+
     def __getitem__(self, key):
-        return self.__values[key]
+        if isinstance(key, slice):
+            values = self.__values.data()[key]
+            ret = values.tolist()
+            if self.__nullable:
+                for i in np.flatnonzero(np.isnan(values)):
+                    ret[i] = None
+        elif isinstance(key, numbers.Integral):
+            ret = self.__values.data()[key]
+            if not self.__objects:
+                ret = ret.item()
+                if self.__nullable and ret != ret:
+                    ret = None
+        else:
+            raise TypeError("Invalid argument type")
+        return ret
+
+
+# A ListDeque like collection of datetime.datetime instances that stores them as int64 nanoseconds since the epoch.
+# All datetimes are expected to be naive, or to be in the same timezone.
+# If storage is set, timestamps are stored there instead of in a NumPyDeque of maxLen values.
+class DateTimeDeque(object):
+    NULL = np.iinfo(np.int64).min
+
+    def __init__(self, maxLen, storage=None):
+        if storage is None:
+            storage = NumPyDeque(maxLen, np.int64)
+        self.__timestamps = storage
+        self.__tzinfo = None
+        self.__last = None
+
+    def __toDateTime(self, timestamp):
+        if timestamp == DateTimeDeque.NULL:
+            return None
+        return dt.nanoseconds_to_datetime(timestamp, self.__tzinfo)
+
+    def getMaxLen(self):
+        return self.__timestamps.getMaxLen()
+
+    def append(self, dateTime):
+        if dateTime is None:
+            timestamp = DateTimeDeque.NULL
+        else:
+            if self.__tzinfo is None and not dt.datetime_is_naive(dateTime):
+                self.__tzinfo = dateTime.tzinfo
+            timestamp = dt.datetime_to_nanoseconds(dateTime)
+        self.__timestamps.append(timestamp)
+        self.__last = dateTime
+
+    def extend(self, dateTimes):
+        timestamps = []
+        for dateTime in dateTimes:
+            if dateTime is None:
+                timestamps.append(DateTimeDeque.NULL)
+            else:
+                if self.__tzinfo is None and not dt.datetime_is_naive(dateTime):
+                    self.__tzinfo = dateTime.tzinfo
+                timestamps.append(dt.datetime_to_nanoseconds(dateTime))
+        if len(timestamps):
+            self.__timestamps.extend(timestamps)
+            self.__last = dateTimes[-1]
+
+    def array(self):
+        """Returns a numpy.array view of the timestamps."""
+        return self.__timestamps.data()
+
+    def data(self):
+        return self[:]
+
+    def resize(self, maxLen):
+        self.__timestamps.resize(maxLen)
+
+    def __len__(self):
+        return len(self.__timestamps)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            ret = [self.__toDateTime(timestamp) for timestamp in self.__timestamps.data()[key]]
+        elif isinstance(key, numbers.Integral):
+            # The last datetime is checked every time a new one is appended, so avoid converting it back.
+            if key == -1 and len(self.__timestamps):
+                ret = self.__last
+            else:
+                ret = self.__toDateTime(self.__timestamps.data()[key])
+        else:
+            raise TypeError("Invalid argument type")
+        return ret
@@ -66,6 +66,24 @@ def timestamp_to_datetime(timeStamp, localized=True):
     return ret
 
 
+def datetime_to_nanoseconds(dateTime):
+    """ Converts a datetime.datetime to the number of nanoseconds since the epoch. Naive datetimes are taken as UTC."""
+    if datetime_is_naive(dateTime):
+        diff = dateTime.replace(tzinfo=None) - epoch_naive
+    else:
+        diff = dateTime - epoch_utc
+    return ((diff.days * 86400 + diff.seconds) * 1000000 + diff.microseconds) * 1000
+
+
+def nanoseconds_to_datetime(nanoSeconds, tzinfo=None):
+    """ Converts a number of nanoseconds since the epoch to a datetime.datetime.
+    If tzinfo is None a naive datetime is returned."""
+    ret = epoch_naive + datetime.timedelta(microseconds=int(nanoSeconds) // 1000)
+    if tzinfo is not None:
+        ret = pytz.utc.localize(ret).astimezone(tzinfo)
+    return ret
+
+
 def get_first_monday(year):
     ret = datetime.date(year, 1, 1)
     if ret.weekday() != 0:
@@ -82,4 +100,5 @@ def get_last_monday(year):
     return ret
 
 
-epoch_utc = as_utc(datetime.datetime(1970, 1, 1))
+epoch_naive = datetime.datetime(1970, 1, 1)
+epoch_utc = as_utc(epoch_naive)
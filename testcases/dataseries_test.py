@@ -19,7 +19,9 @@
 """
 
 import datetime
+import pickle
 
+import numpy as np
 from six.moves import xrange
 
 from . import common
@@ -28,6 +30,9 @@ from pyalgotrade import dataseries
 from pyalgotrade.dataseries import bards
 from pyalgotrade.dataseries import aligned
 from pyalgotrade import bar
+from pyalgotrade import marketsession
+from pyalgotrade.technical import ma
+from pyalgotrade.utils import dt
 
 
 class TestSequenceDataSeries(common.TestCase):
@@ -142,6 +147,269 @@ class TestSequenceDataSeries(common.TestCase):
         self.assertEqual(ds[0], 90)
         self.assertEqual(ds[-1], 99)
 
+    def testAsArray(self):
+        seq = list(xrange(10))
+        for dtype in [None, float]:
+            ds = dataseries.SequenceDataSeries(dtype=dtype)
+            for value in seq:
+                ds.append(value)
+
+            self.assertEqual(ds.asarray().tolist(), seq)
+            for start in xrange(-12, 12):
+                self.assertEqual(ds.asarray(start).tolist(), seq[start:])
+                self.assertEqual(ds.asarray(start, -2).tolist(), seq[start:-2])
+                self.assertEqual(ds.asarray(None, start).tolist(), seq[:start])
+            for count in xrange(12):
+                self.assertEqual(ds.tail(count).tolist(), seq[max(len(seq) - count, 0):])
+            self.assertEqual(ds.tail(3, float).dtype, np.float64)
+
+        ds.append(None)
+        self.assertTrue(np.isnan(ds.tail(1)[0]))
+        self.assertIsNotNone(ds.tail(5).base)
+
+    def testAsArrayWithNones(self):
+        ds = dataseries.SequenceDataSeries()
+        ds.append(None)
+        ds.append(1)
+        self.assertEqual(ds.tail(2).tolist(), [None, 1])
+        self.assertTrue(np.isnan(ds.tail(2, float)[0]))
+
+
+class TestExtendSequenceDataSeries(common.TestCase):
+    def __buildDateTimes(self, count, first=datetime.datetime(2018, 1, 1)):
+        return [first + datetime.timedelta(seconds=i) for i in xrange(count)]
+
+    def testExtend(self):
+        for dtype in [None, float]:
+            ds = dataseries.SequenceDataSeries(maxLen=10, dtype=dtype)
+            ds.appendWithDateTime(datetime.datetime(2017, 1, 1), 100)
+            dateTimes = self.__buildDateTimes(15)
+            ds.extendWithDateTimes(dateTimes[:5], list(xrange(5)))
+            self.assertEqual(ds[:], [100] + list(xrange(5)))
+            self.assertEqual(ds.getDateTimes(), [datetime.datetime(2017, 1, 1)] + dateTimes[:5])
+            ds.extendWithDateTimes(dateTimes[5:], list(xrange(5, 15)))
+            self.assertEqual(ds[:], list(xrange(5, 15)))
+            self.assertEqual(ds.getDateTimes(), dateTimes[5:])
+
+    def testInvalidDateTimes(self):
+        ds = dataseries.SequenceDataSeries()
+        dateTimes = self.__buildDateTimes(5)
+        ds.appendWithDateTime(dateTimes[2], 1)
+        with self.assertRaisesRegexp(Exception, "Invalid datetime.*"):
+            ds.extendWithDateTimes(dateTimes[3:] + dateTimes[:1], [1, 2, 3])
+        with self.assertRaisesRegexp(Exception, "Invalid datetime.*"):
+            ds.extendWithDateTimes(dateTimes[:1], [1])
+        with self.assertRaisesRegexp(Exception, "The number of datetimes and values doesn't match"):
+            ds.extendWithDateTimes(dateTimes[3:], [1])
+        # Nothing should have been added.
+        self.assertEqual(len(ds), 1)
+
+    def testBatchedEvent(self):
+        ds = dataseries.SequenceDataSeries()
+        values = []
+        batches = []
+
+        def onNewValue(ds_, dateTime, value):
+            values.append(value)
+
+        def onNewValues(ds_, dateTimes, values_):
+            batches.append(values_)
+
+        ds.getNewValueEvent().subscribe(onNewValue)
+        ds.getNewValuesEvent().subscribe(onNewValues)
+        ds.extendWithDateTimes(self.__buildDateTimes(3), [1, 2, 3])
+        self.assertEqual(values, [])
+        self.assertEqual(batches, [[1, 2, 3]])
+
+        # Once there is a subscriber that doesn't handle batches, values are replayed one by one.
+        ds.getNewValueEvent().subscribe(lambda ds_, dateTime, value: None)
+        ds.extendWithDateTimes(self.__buildDateTimes(3, datetime.datetime(2018, 2, 1)), [4, 5, 6])
+        self.assertEqual(values, [4, 5, 6])
+        self.assertEqual(batches, [[1, 2, 3]])
+
+    def testFilterCatchUp(self):
+        dateTimes = self.__buildDateTimes(50)
+        values = [float(i % 7) for i in xrange(50)]
+
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 5)
+        smaOfSma = ma.SMA(sma, 3)
+        for dateTime, value in zip(dateTimes, values):
+            ds.appendWithDateTime(dateTime, value)
+
+        batchDS = dataseries.SequenceDataSeries()
+        batchSma = ma.SMA(batchDS, 5)
+        batchSmaOfSma = ma.SMA(batchSma, 3)
+        batchDS.extendWithDateTimes(dateTimes[:20], values[:20])
+        batchDS.extendWithDateTimes(dateTimes[20:], values[20:])
+
+        # Batches are calculated using vectorized kernels so results may differ in the last decimals.
+        def round_values(values):
+            return [round(value, 10) if value is not None else None for value in values]
+
+        self.assertEqual(round_values(batchSma[:]), round_values(sma[:]))
+        self.assertEqual(round_values(batchSmaOfSma[:]), round_values(smaOfSma[:]))
+        self.assertEqual(batchSmaOfSma.getDateTimes(), dateTimes)
+
+    def testBarDataSeries(self):
+        dateTimes = self.__buildDateTimes(3)
+        ds = bards.BarDataSeries()
+        ds.extendWithDateTimes(dateTimes, [bar.BasicBar(dateTime, 1, 1, 1, 1, 1, 1, bar.Frequency.SECOND) for dateTime in dateTimes])
+        self.assertEqual(ds.getCloseDataSeries()[:], [1, 1, 1])
+        self.assertEqual(ds.getDateTimes(), dateTimes)
+
+
+class TestTypedSequenceDataSeries(common.TestCase):
+    def testSeqLikeOps(self):
+        seq = [float(i) for i in xrange(10)]
+        ds = dataseries.SequenceDataSeries(dtype=float)
+        for value in seq:
+            ds.append(value)
+
+        self.assertEqual(len(ds), len(seq))
+        for i in xrange(-len(seq), len(seq)):
+            self.assertEqual(ds[i], seq[i])
+        for i in xrange(-20, 20):
+            self.assertEqual(ds[i:], seq[i:])
+            self.assertEqual(ds[i::3], seq[i::3])
+        with self.assertRaises(IndexError):
+            ds[10]
+        with self.assertRaises(TypeError):
+            ds["a"]
+
+    def testNoneValues(self):
+        ds = dataseries.SequenceDataSeries(dtype=float)
+        ds.append(None)
+        ds.append(1)
+        self.assertEqual(ds[0], None)
+        self.assertEqual(ds[1], 1)
+        self.assertEqual(ds[:], [None, 1])
+        self.assertEqual(ds.getDateTimes(), [None, None])
+
+    def testBoundedAndResize(self):
+        ds = dataseries.SequenceDataSeries(maxLen=3, dtype=float)
+        now = datetime.datetime(2018, 1, 1)
+        for i in xrange(10):
+            ds.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+        self.assertEqual(ds[:], [7, 8, 9])
+        self.assertEqual(ds.getDateTimes(), [now + datetime.timedelta(seconds=i) for i in xrange(7, 10)])
+
+        ds.setMaxLen(2)
+        self.assertEqual(ds[:], [8, 9])
+        self.assertEqual(len(ds.getDateTimes()), 2)
+        with self.assertRaises(Exception):
+            ds.appendWithDateTime(now, 1)
+
+    def testDateTimes(self):
+        localizedDt = dt.localize(datetime.datetime(2000, 1, 1), marketsession.USEquities.getTimezone())
+        for firstDt in [datetime.datetime(2000, 1, 1, 1, 1, 1, 10), localizedDt]:
+            ds = dataseries.SequenceDataSeries(dtype=float)
+            dateTimes = [firstDt + datetime.timedelta(days=i * 30) for i in xrange(20)]
+            for dateTime in dateTimes:
+                ds.appendWithDateTime(dateTime, 1)
+            self.assertEqual(ds.getDateTimes(), dateTimes)
+            self.assertEqual(ds.timestamps().tolist(), [dt.datetime_to_nanoseconds(dateTime) for dateTime in dateTimes])
+
+    def testArraysAreViews(self):
+        ds = dataseries.SequenceDataSeries(maxLen=5, dtype=float)
+        now = datetime.datetime(2018, 1, 1)
+        for i in xrange(12):
+            ds.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+        self.assertEqual(ds.values().dtype, np.float64)
+        self.assertEqual(ds.values().tolist(), [7, 8, 9, 10, 11])
+        self.assertIsNotNone(ds.values().base)
+        self.assertEqual(ds.timestamps().dtype, np.int64)
+        self.assertIsNotNone(ds.timestamps().base)
+
+        untyped = dataseries.SequenceDataSeries()
+        untyped.appendWithDateTime(now, 1)
+        self.assertEqual(untyped.values().tolist(), [1])
+        self.assertEqual(untyped.timestamps().tolist(), [dt.datetime_to_nanoseconds(now)])
+
+    def testNewValueEvent(self):
+        events = []
+        ds = dataseries.SequenceDataSeries(dtype=float)
+        ds.getNewValueEvent().subscribe(lambda ds_, dateTime, value: events.append((dateTime, value)))
+        now = datetime.datetime(2018, 1, 1)
+        ds.appendWithDateTime(now, 1.5)
+        self.assertEqual(events, [(now, 1.5)])
+
+    def testBarDataSeries(self):
+        ds = bards.BarDataSeries(dtype=float)
+        now = datetime.datetime(2018, 1, 1)
+        for i in xrange(10):
+            ds.append(bar.BasicBar(now + datetime.timedelta(seconds=i), 2, 4, 1, 3, 10, 3, bar.Frequency.SECOND))
+        self.assertEqual(ds.getCloseDataSeries().getDType(), float)
+        self.assertEqual(ds.getCloseDataSeries().values().tolist(), [3] * 10)
+        self.assertEqual(ds.getVolumeDataSeries()[-1], 10)
+        self.assertEqual(ds.getHighDataSeries().getDateTimes(), ds.getDateTimes())
+
+    def testState(self):
+        ds = dataseries.SequenceDataSeries(maxLen=3, dtype=float)
+        now = datetime.datetime(2000, 1, 1)
+        for i in xrange(5):
+            ds.appendWithDateTime(now + datetime.timedelta(seconds=i), i if i != 3 else None)
+        state = ds.getState()
+
+        restored = dataseries.SequenceDataSeries(maxLen=3, dtype=float)
+        restored.getNewValueEvent().subscribe(lambda dataSeries, dateTime, value: self.fail("No events expected"))
+        restored.setState(state)
+        self.assertEqual(restored[:], [2, None, 4])
+        self.assertEqual(restored.getDateTimes(), ds.getDateTimes())
+        with self.assertRaises(Exception):
+            restored.appendWithDateTime(now, 5)
+
+
+class TestMemMapSequenceDataSeries(common.TestCase):
+    def testUnbounded(self):
+        ds = dataseries.SequenceDataSeries(maxLen=10, memMap=True)
+        self.assertEqual(ds.getMaxLen(), None)
+        self.assertEqual(ds.getDType(), float)
+
+        firstDt = datetime.datetime(2018, 1, 1)
+        dateTimes = [firstDt + datetime.timedelta(minutes=i) for i in xrange(10000)]
+        for dateTime, value in zip(dateTimes[:100], xrange(100)):
+            ds.appendWithDateTime(dateTime, value)
+        ds.extendWithDateTimes(dateTimes[100:], list(xrange(100, 10000)))
+        ds.setMaxLen(10)
+
+        self.assertEqual(len(ds), 10000)
+        self.assertEqual(ds[0], 0)
+        self.assertEqual(ds[-1], 9999)
+        self.assertEqual(ds[5000:5003], [5000, 5001, 5002])
+        self.assertEqual(ds.getDateTimes(), dateTimes)
+        self.assertEqual(ds.values().sum(), sum(xrange(10000)))
+
+    def testBarDataSeries(self):
+        ds = bards.BarDataSeries(maxLen=10, memMap=True)
+        firstDt = datetime.datetime(2018, 1, 1)
+        for i in xrange(100):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=i), i, i, i, i, 10, i, bar.Frequency.SECOND))
+
+        # Bars are bounded, but the values are not.
+        self.assertEqual(len(ds), 10)
+        self.assertEqual(len(ds.getDateTimes()), 10)
+        closeDS = ds.getCloseDataSeries()
+        self.assertEqual(len(closeDS), 100)
+        self.assertEqual(closeDS[:], list(xrange(100)))
+        self.assertEqual(closeDS.getDateTimes(), [firstDt + datetime.timedelta(seconds=i) for i in xrange(100)])
+        self.assertEqual(len(closeDS.timestamps()), 100)
+
+    def testBarDataSeriesState(self):
+        ds = bards.BarDataSeries(maxLen=10, memMap=True)
+        firstDt = datetime.datetime(2018, 1, 1)
+        for i in xrange(100):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=i), i, i, i, i, 10, i, bar.Frequency.SECOND))
+        state = ds.getState()
+
+        restored = bards.BarDataSeries(maxLen=10, memMap=True)
+        restored.setState(state)
+        self.assertEqual(len(restored), 10)
+        self.assertEqual(restored.getDateTimes(), ds.getDateTimes())
+        closeDS = restored.getCloseDataSeries()
+        self.assertEqual(closeDS[:], list(xrange(100)))
+        self.assertEqual(closeDS.getDateTimes(), ds.getCloseDataSeries().getDateTimes())
+
 
 class TestBarDataSeries(common.TestCase):
     def testEmpty(self):
@@ -214,6 +482,61 @@ class TestBarDataSeries(common.TestCase):
             self.assertEqual(ds[i].getDateTime(), ds.getDateTimes()[i])
             self.assertEqual(ds.getDateTimes()[i], firstDt + datetime.timedelta(seconds=i))
 
+    def testFieldDataSeries(self):
+        ds = bards.BarDataSeries(maxLen=5)
+        closeDS = ds.getCloseDataSeries()
+        self.assertEqual(ds.getCloseDataSeries(), closeDS)
+        self.assertEqual(ds.getPriceDataSeries(), closeDS)
+        events = []
+        closeDS.getNewValueEvent().subscribe(lambda ds_, dateTime, value: events.append((ds_, dateTime, value)))
+
+        firstDt = datetime.datetime(2018, 1, 1)
+        for i in xrange(10):
+            ds.append(bar.BasicBar(firstDt + datetime.timedelta(seconds=i), i, i, i, i, 10, None, bar.Frequency.SECOND))
+            self.assertEqual(events[-1], (closeDS, firstDt + datetime.timedelta(seconds=i), i))
+
+        # DataSeries built after values were added have all of them.
+        self.assertEqual(ds.getVolumeDataSeries()[:], [10] * 5)
+        self.assertEqual(ds.getAdjCloseDataSeries()[-1], None)
+        self.assertEqual(closeDS[:], [5, 6, 7, 8, 9])
+        self.assertEqual(closeDS.getDateTimes(), ds.getDateTimes())
+        self.assertEqual(closeDS.getValueAbsolute(5), None)
+
+        self.assertEqual(closeDS.tail(2).tolist(), [8, 9])
+        self.assertEqual(closeDS.asarray(-3, -1, float).tolist(), [7, 8])
+
+        ds.setMaxLen(2)
+        self.assertEqual(len(closeDS), 2)
+        self.assertEqual(closeDS[:], [8, 9])
+        self.assertEqual(len(ds.getOpenDataSeries()), 2)
+
+    def testState(self):
+        ds = bards.BarDataSeries(maxLen=5)
+        firstDt = datetime.datetime(2018, 1, 1)
+        for i in xrange(10):
+            ds.append(bar.BasicBar(
+                firstDt + datetime.timedelta(seconds=i), i, i + 2, i - 2, i + 1, 10, i, bar.Frequency.SECOND,
+                {"extra": i * 10}
+            ))
+        state = pickle.loads(pickle.dumps(ds.getState()))
+
+        restored = bards.BarDataSeries(maxLen=5)
+        # DataSeries built before restoring the state should also get the values.
+        closeDS = restored.getCloseDataSeries()
+        restored.getNewValueEvent().subscribe(lambda dataSeries, dateTime, value: self.fail("No events expected"))
+        closeDS.getNewValueEvent().subscribe(lambda dataSeries, dateTime, value: self.fail("No events expected"))
+        restored.setState(state)
+
+        self.assertEqual(len(restored), 5)
+        self.assertEqual(restored.getDateTimes(), ds.getDateTimes())
+        self.assertEqual([bar_.getClose() for bar_ in restored], [6, 7, 8, 9, 10])
+        self.assertEqual(closeDS[:], [6, 7, 8, 9, 10])
+        self.assertEqual(closeDS.getDateTimes(), ds.getDateTimes())
+        self.assertEqual(restored.getHighDataSeries()[:], [7, 8, 9, 10, 11])
+        self.assertEqual(restored.getLowDataSeries()[:], [3, 4, 5, 6, 7])
+        self.assertEqual(restored.getVolumeDataSeries()[:], [10] * 5)
+        self.assertEqual(restored.getExtraDataSeries("extra")[:], [50, 60, 70, 80, 90])
+
 
 class TestDateAlignedDataSeries(common.TestCase):
     def testNotAligned(self):
@@ -407,6 +730,45 @@ class TestDateAlignedDataSeries(common.TestCase):
         self.assertEqual(ads2[:], [2, 3])
 
 
+class TestMultiDateAlignedDataSeries(common.TestCase):
+    def testPartiallyAligned(self):
+        now = datetime.datetime(2018, 1, 1)
+        sources = [dataseries.SequenceDataSeries() for i in xrange(5)]
+        alignedDS = aligned.multi_datetime_aligned(sources)
+        self.assertEqual(len(alignedDS), len(sources))
+
+        # Each source skips a different set of datetimes, and values get pushed in a staggered order.
+        expectedDateTimes = []
+        for i in xrange(200):
+            dateTime = now + datetime.timedelta(seconds=i)
+            missing = False
+            for j, ds in enumerate(sources):
+                if i % (j + 2) == 1:
+                    missing = True
+                else:
+                    ds.appendWithDateTime(dateTime, i * 10 + j)
+            if not missing:
+                expectedDateTimes.append(dateTime)
+
+        for j, ds in enumerate(alignedDS):
+            self.assertEqual(ds.getDateTimes(), expectedDateTimes)
+            self.assertEqual(ds[:], [int((dateTime - now).total_seconds()) * 10 + j for dateTime in expectedDateTimes])
+
+    def testSourcesAhead(self):
+        now = datetime.datetime(2018, 1, 1)
+        sources = [dataseries.SequenceDataSeries() for i in xrange(3)]
+        alignedDS = aligned.multi_datetime_aligned(sources)
+
+        # The first source runs ahead of the others.
+        for i in xrange(10):
+            sources[0].appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+        for ds in sources[1:]:
+            for i in xrange(0, 10, 2):
+                ds.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+        for ds in alignedDS:
+            self.assertEqual(ds[:], [0, 2, 4, 6, 8])
+
+
 class TestUpdatedDefaultMaxLen(common.TestCase):
     def setUp(self):
         super(TestUpdatedDefaultMaxLen, self).setUp()
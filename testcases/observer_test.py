@@ -303,3 +303,139 @@ class EventTestCase(common.TestCase):
 
         event.emit()
         self.assertTrue(handlersData == [1, 1])
+
+    def testNestedEmitWhileChangingHandlers(self):
+        handlersData = []
+        event = observer.Event()
+
+        def handler3(depth):
+            handlersData.append((3, depth))
+
+        def handler2(depth):
+            handlersData.append((2, depth))
+
+        def handler1(depth):
+            handlersData.append((1, depth))
+            if depth == 0:
+                event.unsubscribe(handler2)
+                event.subscribe(handler3)
+                # Nested emissions use the handlers as they are now.
+                event.emit(depth + 1)
+
+        event.subscribe(handler1)
+        event.subscribe(handler2)
+        event.emit(0)
+        # The current emission keeps calling the handlers that were subscribed when it started.
+        self.assertEqual(handlersData, [(1, 0), (1, 1), (3, 1), (2, 0)])
+        self.assertEqual(event.getSubscriberCount(), 2)
+
+        handlersData = []
+        event.emit(1)
+        self.assertEqual(handlersData, [(1, 1), (3, 1)])
+
+    def testHandlersChangedWhileProfiling(self):
+        handlersData = []
+        event = observer.Event()
+
+        def handler2():
+            handlersData.append(2)
+
+        def handler1():
+            handlersData.append(1)
+            event.unsubscribe(handler1)
+            event.subscribe(handler2)
+
+        event.subscribe(handler1)
+        with observer.HandlerProfiler() as profiler:
+            event.emit()
+            event.emit()
+        self.assertEqual(handlersData, [1, 2])
+        self.assertEqual(
+            sorted([(name, calls) for name, calls, _ in profiler.getStats()]), [("handler1", 1), ("handler2", 1)]
+        )
+
+    def testUnsubscribeMissingHandler(self):
+        event = observer.Event()
+        with self.assertRaises(ValueError):
+            event.unsubscribe(lambda: None)
+
+    def testSubscriberCount(self):
+        def handler1():
+            pass
+
+        def handler2():
+            pass
+
+        event = observer.Event()
+        self.assertFalse(event.hasSubscribers())
+        event.subscribe(handler1)
+        event.subscribe(handler2)
+        event.subscribe(handler1)
+        self.assertEqual(event.getSubscriberCount(), 2)
+        event.unsubscribe(handler1)
+        self.assertEqual(event.getSubscriberCount(), 1)
+        event.unsubscribe(handler2)
+        self.assertFalse(event.hasSubscribers())
+
+
+class Handler(object):
+    def __init__(self, event):
+        self.calls = 0
+        event.subscribe(self.onEvent)
+
+    def onEvent(self, value):
+        self.calls += 1
+
+
+class HandlerProfilerTestCase(common.TestCase):
+    def testProfile(self):
+        event = observer.Event()
+        handler = Handler(event)
+
+        def otherHandler(value):
+            pass
+        event.subscribe(otherHandler)
+
+        profiler = observer.HandlerProfiler()
+        profiler.start()
+        try:
+            for i in range(10):
+                event.emit(i)
+        finally:
+            profiler.stop()
+        event.emit(10)
+
+        self.assertEqual(handler.calls, 11)
+        stats = profiler.getStats()
+        self.assertEqual(
+            sorted([(name, calls) for name, calls, _ in stats]),
+            [("Handler.onEvent", 10), ("otherHandler", 10)]
+        )
+        for _, _, elapsed in stats:
+            self.assertTrue(elapsed >= 0)
+
+        profiler.reset()
+        self.assertEqual(profiler.getStats(), [])
+
+    def testHandlerRaises(self):
+        def handler():
+            raise Exception("Error")
+
+        event = observer.Event()
+        event.subscribe(handler)
+        profiler = observer.HandlerProfiler()
+        with self.assertRaisesRegexp(Exception, "Error"):
+            with profiler:
+                event.emit()
+        self.assertEqual([(name, calls) for name, calls, _ in profiler.getStats()], [("handler", 1)])
+
+        # Profiling stopped when the exception was raised.
+        with self.assertRaisesRegexp(Exception, "Error"):
+            event.emit()
+        self.assertEqual([(name, calls) for name, calls, _ in profiler.getStats()], [("handler", 1)])
+
+        # And a new profiler can be started.
+        with observer.HandlerProfiler() as otherProfiler:
+            with self.assertRaisesRegexp(Exception, "Error"):
+                event.emit()
+        self.assertEqual([(name, calls) for name, calls, _ in otherProfiler.getStats()], [("handler", 1)])
@@ -19,6 +19,7 @@
 """
 
 import datetime
+import numpy
 import talib
 
 from six.moves import xrange
@@ -26,6 +27,7 @@ from six.moves import xrange
 from . import common
 
 from pyalgotrade.talibext import indicator
+from pyalgotrade.talibext import stream
 from pyalgotrade import bar
 from pyalgotrade import dataseries
 from pyalgotrade.dataseries import bards
@@ -214,6 +216,18 @@ class TestCase(common.TestCase):
     def assertAmountsAreEqual(self, first, second, precision=2):
         self.assertEqual(round(first, precision), round(second, precision))
 
+    def testValuesToNumPy(self):
+        ds = dataseries.SequenceDataSeries()
+        for value in [1, None, 2, float("nan"), 3]:
+            ds.append(value)
+        self.assertEqual(indicator.value_ds_to_numpy(ds, 1).tolist(), [3])
+        # NaN values are returned as they are.
+        values = indicator.value_ds_to_numpy(ds, 2)
+        self.assertTrue(numpy.isnan(values[0]))
+        self.assertEqual(values[1], 3)
+        # None values can't be converted.
+        self.assertEqual(indicator.value_ds_to_numpy(ds, 4), None)
+
     def testAD(self):
         barDs = self.__loadBarDS()
         self.assertAmountsAreEqual(indicator.AD(barDs, 252)[0], -1631000.00)
@@ -575,3 +589,86 @@ class TestCase(common.TestCase):
         self.assertAmountsAreEqual(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[2], 94.52)
         self.assertAmountsAreEqual(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[3], 94.86)  # Original value 94.85
         self.assertAmountsAreEqual(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[-1], 108.16)
+
+
+class TALibFilterTestCase(common.TestCase):
+    def __buildBarDS(self):
+        return bards.BarDataSeries(maxLen=len(OPEN_VALUES))
+
+    def __loadBars(self, barDs):
+        dateTime = datetime.datetime(2000, 1, 1)
+        for i in xrange(len(OPEN_VALUES)):
+            barDs.append(bar.BasicBar(dateTime, OPEN_VALUES[i], HIGH_VALUES[i], LOW_VALUES[i], CLOSE_VALUES[i], VOLUME_VALUES[i], CLOSE_VALUES[i], bar.Frequency.DAY))
+            dateTime += datetime.timedelta(days=1)
+
+    def testSMA(self):
+        barDs = self.__buildBarDS()
+        sma = stream.TALibFilter([barDs.getCloseDataSeries()], talib.SMA, timeperiod=10)
+        self.assertEqual(sma.getCount(), 10)
+        self.__loadBars(barDs)
+
+        expected = indicator.SMA(barDs.getCloseDataSeries(), 252, 10)
+        self.assertEqual(len(sma), 252)
+        self.assertEqual(sma[8], None)
+        for i in xrange(9, 252):
+            self.assertEqual(round(sma[i], 8), round(expected[i], 8))
+
+    def testADX(self):
+        barDs = self.__buildBarDS()
+        adx = stream.TALibFilter(
+            [barDs.getHighDataSeries(), barDs.getLowDataSeries(), barDs.getCloseDataSeries()], talib.ADX, count=252,
+            timeperiod=14
+        )
+        self.__loadBars(barDs)
+        self.assertEqual(adx[-2], None)
+        self.assertEqual(round(adx[-1], 8), round(indicator.ADX(barDs, 252, 14)[-1], 8))
+
+    def testRecursiveFunctions(self):
+        barDs = self.__buildBarDS()
+        closeDs = barDs.getCloseDataSeries()
+        # Using the minimum number of values would silently give wrong values.
+        with self.assertRaisesRegexp(Exception, "EMA is calculated recursively"):
+            stream.TALibFilter([closeDs], talib.EMA, timeperiod=10)
+        with self.assertRaisesRegexp(Exception, "ADX is calculated recursively"):
+            stream.TALibFilter([barDs.getHighDataSeries(), barDs.getLowDataSeries(), closeDs], talib.ADX, timeperiod=14)
+        with self.assertRaisesRegexp(Exception, "MACD is calculated recursively"):
+            stream.TALibFilter([closeDs], talib.MACD)
+        with self.assertRaisesRegexp(Exception, "BBANDS is calculated recursively"):
+            stream.TALibFilter([closeDs], talib.BBANDS, timeperiod=5, matype=talib.MA_Type.EMA)
+
+        ema = stream.TALibFilter([closeDs], talib.EMA, count=len(OPEN_VALUES), timeperiod=10)
+        self.__loadBars(barDs)
+        self.assertEqual(round(ema[-1], 8), round(indicator.EMA(closeDs, 252, 10)[-1], 8))
+
+    def testMultipleOutputs(self):
+        barDs = self.__buildBarDS()
+        lower = stream.TALibFilter([barDs.getCloseDataSeries()], talib.BBANDS, output=2, timeperiod=5)
+        self.__loadBars(barDs)
+        expected = indicator.BBANDS(barDs.getCloseDataSeries(), 252, 5)[2]
+        self.assertEqual(round(lower[-1], 8), round(expected[-1], 8))
+
+    def testNoneValues(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = stream.TALibFilter([ds], talib.SMA, timeperiod=2)
+        for value in [1, 2, None, 3, 4]:
+            ds.append(value)
+        self.assertEqual(sma[:], [None, 1.5, None, None, 3.5])
+
+    def testEmptyInputs(self):
+        highDs = dataseries.SequenceDataSeries()
+        lowDs = dataseries.SequenceDataSeries()
+        midPrice = stream.TALibFilter([highDs, lowDs], talib.MEDPRICE)
+        # The low values come in before the high ones.
+        lowDs.append(1)
+        self.assertEqual(midPrice[:], [None])
+        highDs.append(3)
+        lowDs.append(2)
+        self.assertEqual(midPrice[:], [None, 2.5])
+
+    def testBatch(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = stream.TALibFilter([ds], talib.SMA, timeperiod=2)
+        dateTimes = [datetime.datetime(2000, 1, i) for i in xrange(1, 5)]
+        ds.extendWithDateTimes(dateTimes, [1, 2, 3, 4])
+        self.assertEqual(sma[:], [None, 1.5, 2.5, 3.5])
+        self.assertEqual(sma.getDateTimes(), dateTimes)
@@ -0,0 +1,118 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import random
+
+from six.moves import xrange
+
+from . import common
+
+from pyalgotrade import dataseries
+from pyalgotrade.technical import bank
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stats
+
+
+class LastValueBank(bank.IndicatorBank):
+    def __init__(self, dataSeries, periods):
+        super(LastValueBank, self).__init__(dataSeries, periods, 1)
+
+    def calculate(self, values, count):
+        ret = None
+        if count > 1:
+            ret = [values[-1] for period in self.getPeriods()]
+        return ret
+
+
+class IndicatorBankTestCase(common.TestCase):
+    def __buildValues(self, count):
+        random.seed(1234)
+        ret = [100.0]
+        for i in xrange(count - 1):
+            ret.append(ret[-1] + random.choice([-1, 0, 1]) * random.random())
+        return ret
+
+    def __checkBank(self, buildBank, buildFilter, periods, batch=False):
+        values = self.__buildValues(300)
+        # Interleave some None values.
+        for i in xrange(50, len(values), 30):
+            values[i] = None
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i) for i in xrange(len(values))]
+
+        ds = dataseries.SequenceDataSeries()
+        indicatorBank = buildBank(ds, periods)
+        filters = [buildFilter(ds, period) for period in periods]
+        if batch:
+            ds.extendWithDateTimes(dateTimes, values)
+        else:
+            for dateTime, value in zip(dateTimes, values):
+                ds.appendWithDateTime(dateTime, value)
+
+        for period, expected in zip(periods, filters):
+            actual = indicatorBank.getDataSeries(period)
+            self.assertEqual(len(actual), len(expected))
+            self.assertEqual(actual.getDateTimes(), expected.getDateTimes())
+            for expectedValue, actualValue in zip(expected, actual):
+                if expectedValue is None:
+                    self.assertEqual(actualValue, None)
+                else:
+                    self.assertEqual(round(actualValue, 8), round(expectedValue, 8))
+
+    def testSMA(self):
+        self.__checkBank(bank.SMABank, ma.SMA, [1, 2, 5, 20, 50])
+
+    def testEMA(self):
+        self.__checkBank(bank.EMABank, ma.EMA, [2, 5, 20, 50])
+
+    def testStdDev(self):
+        self.__checkBank(bank.StdDevBank, stats.StdDev, [1, 2, 5, 20, 50])
+        self.__checkBank(
+            lambda ds, periods: bank.StdDevBank(ds, periods, ddof=1),
+            lambda ds, period: stats.StdDev(ds, period, ddof=1),
+            [2, 5, 20, 50]
+        )
+
+    def testRSI(self):
+        self.__checkBank(bank.RSIBank, rsi.RSI, [2, 5, 14, 50])
+
+    def testBatch(self):
+        self.__checkBank(bank.SMABank, ma.SMA, [2, 5, 20, 50], batch=True)
+        self.__checkBank(bank.EMABank, ma.EMA, [2, 5, 20, 50], batch=True)
+
+    def testPeriods(self):
+        ds = dataseries.SequenceDataSeries()
+        smaBank = bank.SMABank(ds, [3, 2])
+        self.assertEqual(smaBank.getPeriods().tolist(), [3, 2])
+        for value in [1, 2, 3]:
+            ds.append(value)
+        self.assertEqual(smaBank.getDataSeries(2)[:], [None, 1.5, 2.5])
+        self.assertEqual(smaBank.getDataSeries(3)[:], [None, None, 2])
+        with self.assertRaises(KeyError):
+            smaBank.getDataSeries(4)
+
+    def testCalculateReturnsNone(self):
+        ds = dataseries.SequenceDataSeries()
+        lastValueBank = LastValueBank(ds, [1, 2])
+        for value in [1, None, 2]:
+            ds.append(value)
+        self.assertEqual(lastValueBank.getDataSeries(1)[:], [None, None, 2])
+        self.assertEqual(lastValueBank.getDataSeries(2)[:], [None, None, 2])
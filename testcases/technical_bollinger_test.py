@@ -75,3 +75,27 @@ class TestCase(common.TestCase):
         self.assertEqual(len(bBands.getLowerBand()), 3)
         self.assertEqual(len(bBands.getLowerBand()[:]), 3)
         self.assertEqual(len(bBands.getLowerBand().getDateTimes()), 3)
+
+    def testBatchAndNoneValues(self):
+        prices = [86.1557, 89.0867, 88.7829, 90.3228, 89.0671, 91.1453, 89.4397, 89.1750, 86.9302, 87.6752, 86.9596, 89.4299, 89.3221, 88.7241, 87.4497, 87.2634, 89.4985, 87.9006, 89.1260, 90.7043, 92.9001, 92.9784, 91.8021, 92.6647, 92.6843, 92.3021, 92.7725, 92.5373, 92.9490, 93.2039, 91.0669, 89.8318, 89.7435, 90.3994, 90.7387, 88.0177, 88.0867, 88.8439, 90.7781, 90.5416, 91.3894, 90.6500]
+
+        seqDS = dataseries.SequenceDataSeries()
+        bBands = bollinger.BollingerBands(seqDS, 20, 2)
+        for value in prices:
+            seqDS.append(value)
+
+        batchDS = dataseries.SequenceDataSeries()
+        batchBBands = bollinger.BollingerBands(batchDS, 20, 2)
+        batchDS.extendWithDateTimes([None] * 30, prices[:30])
+        batchDS.extendWithDateTimes([None] * (len(prices) - 30), prices[30:])
+
+        for i in xrange(len(prices)):
+            self.assertEqual(common.safe_round(batchBBands.getMiddleBand()[i], 8), common.safe_round(bBands.getMiddleBand()[i], 8))
+            self.assertEqual(common.safe_round(batchBBands.getUpperBand()[i], 8), common.safe_round(bBands.getUpperBand()[i], 8))
+            self.assertEqual(common.safe_round(batchBBands.getLowerBand()[i], 8), common.safe_round(bBands.getLowerBand()[i], 8))
+
+        # The middle band keeps the last value, like an SMA does, but the other bands don't.
+        seqDS.append(None)
+        self.assertEqual(bBands.getMiddleBand()[-1], bBands.getMiddleBand()[-2])
+        self.assertEqual(bBands.getUpperBand()[-1], None)
+        self.assertEqual(bBands.getLowerBand()[-1], None)
@@ -18,6 +18,9 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
+import random
+
 from . import common
 
 from pyalgotrade.technical import cross
@@ -191,3 +194,62 @@ class TestCase(common.TestCase):
         self.assertEqual(cross.cross_above([0, 0, 0, 1, 2], [1, 1, 1], -3), 1)
         self.assertEqual(cross.cross_above([0, 0, 0, 1, 2], [1, 1], -3), 0)
         self.assertEqual(cross.cross_above([0, 0, 0, 0, 2], [1, 1], -3), 1)
+
+    def testCrossOver(self):
+        random.seed(1234)
+        values1 = [random.choice([None, 0, 1, 2, 3]) for i in range(300)]
+        values2 = [random.choice([None, 1, 2]) for i in range(300)]
+        ds1 = dataseries.SequenceDataSeries(maxLen=300)
+        ds2 = dataseries.SequenceDataSeries(maxLen=300)
+        crossOver = cross.CrossOver(ds1, ds2, maxLen=300)
+        dateTime = datetime.datetime(2000, 1, 1)
+        for value1, value2 in zip(values1, values2):
+            ds1.appendWithDateTime(dateTime, value1)
+            ds2.appendWithDateTime(dateTime, value2)
+            dateTime += datetime.timedelta(days=1)
+
+        self.assertEqual(crossOver[:], cross.cross_signs(values1, values2).tolist())
+        self.assertEqual(crossOver[:].count(1), cross.cross_above(ds1, ds2, 0))
+        self.assertEqual(crossOver[:].count(-1), cross.cross_below(ds1, ds2, 0))
+        self.assertTrue(crossOver[:].count(1) > 0)
+        self.assertTrue(crossOver[:].count(-1) > 0)
+
+        # Python and numpy implementations should match.
+        for end in range(1, len(values1), 10):
+            for start in range(max(0, end - cross.VECTORIZE_MIN_LEN), end, 7):
+                vectorized = cross.cross_signs(values1[start:end], values2[start:end])
+                self.assertEqual(cross.cross_above(values1, values2, start, end), (vectorized == 1).sum())
+                self.assertEqual(cross.cross_below(values1, values2, start, end), (vectorized == -1).sum())
+
+    def testCrossOverNaNAndNone(self):
+        values1 = [0, float("nan"), 2, 0, None, 2, 0, 2, float("nan"), 0]
+        values2 = [1] * len(values1)
+        expected = [0, 0, 0, -1, 0, 0, -1, 1, 0, 0]
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossOver = cross.CrossOver(ds1, ds2)
+        dateTime = datetime.datetime(2000, 1, 1)
+        for value1, value2 in zip(values1, values2):
+            ds1.appendWithDateTime(dateTime, value1)
+            ds2.appendWithDateTime(dateTime, value2)
+            dateTime += datetime.timedelta(days=1)
+
+        self.assertEqual(crossOver[:], expected)
+        self.assertEqual(cross.cross_signs(values1, values2).tolist(), expected)
+        self.assertEqual(cross.cross_above(ds1, ds2, 0), 1)
+        self.assertEqual(cross.cross_below(ds1, ds2, 0), 2)
+        # Vectorized checks should also match.
+        self.assertEqual(cross.cross_above(values1 * 10, values2 * 10, 0), 10)
+        self.assertEqual(cross.cross_below(values1 * 10, values2 * 10, 0), 20)
+
+    def testCrossOverNotAligned(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossOver = cross.CrossOver(ds1, ds2)
+        ds1.appendWithDateTime(datetime.datetime(2000, 1, 1), 1)
+        ds1.appendWithDateTime(datetime.datetime(2000, 1, 2), 2)
+        ds2.appendWithDateTime(datetime.datetime(2000, 1, 2), 3)
+        ds2.appendWithDateTime(datetime.datetime(2000, 1, 3), 3)
+        ds1.appendWithDateTime(datetime.datetime(2000, 1, 3), 4)
+        self.assertEqual(crossOver[:], [0, 1])
+        self.assertEqual(crossOver.getDateTimes(), [datetime.datetime(2000, 1, 2), datetime.datetime(2000, 1, 3)])
@@ -0,0 +1,105 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+
+import numpy as np
+
+from . import common
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import membf
+from pyalgotrade.technical import crosssection
+
+
+class TestBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+def build_feed(prices):
+    ret = TestBarFeed(bar.Frequency.DAY)
+    for instrument, instrumentPrices in prices.items():
+        bars = []
+        for i, price in enumerate(instrumentPrices):
+            if price is not None:
+                dateTime = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i)
+                bars.append(bar.BasicBar(dateTime, price, price, price, price, 10, None, bar.Frequency.DAY))
+        ret.addBarsFromSequence(instrument, bars)
+    return ret
+
+
+class CrossSectionTestCase(common.TestCase):
+    def setUp(self):
+        self.__feed = build_feed({
+            "a": [1, 2, 3, None],
+            "b": [3, 2, 1, 5],
+            "c": [2, 2, 5, 6],
+        })
+
+    def testMatrix(self):
+        cs = crosssection.CrossSection(self.__feed, ["a", "b", "c"], maxLen=3)
+        self.__feed.loadAll()
+        self.assertEqual(cs.getInstruments(), ["a", "b", "c"])
+        self.assertEqual(cs.getValues().shape, (3, 3))
+        self.assertEqual(cs.getValues()[0].tolist(), [2, 2, 2])
+        self.assertTrue(np.isnan(cs.getValues()[-1, 0]))
+        self.assertEqual(cs.getValues()[-1, 1:].tolist(), [5, 6])
+        self.assertEqual(cs.getDateTimes()[-1], datetime.datetime(2000, 1, 4))
+
+    def testIndicators(self):
+        cs = crosssection.CrossSection(self.__feed)
+        rank = crosssection.Rank(cs)
+        pctRank = crosssection.Rank(cs, ascending=False, pct=True)
+        zscore = crosssection.ZScore(cs)
+        demean = crosssection.Demean(cs)
+        top = crosssection.TopK(cs, 1)
+        bottom = crosssection.TopK(cs, 2, largest=False)
+        self.__feed.loadAll()
+
+        self.assertEqual(rank.getDataSeries("a")[:], [1, 2, 2, None])
+        self.assertEqual(rank.getDataSeries("b")[:], [3, 2, 1, 1])
+        self.assertEqual(rank.getDataSeries("c")[:], [2, 2, 3, 2])
+        self.assertEqual(pctRank.getDataSeries("b")[:], [1 / 3.0, 2 / 3.0, 1, 1])
+        self.assertEqual(pctRank.getDataSeries("c")[-1], 0.5)
+
+        self.assertEqual(common.safe_round(zscore.getDataSeries("a")[0], 4), round(-1 / np.std([1, 3, 2]), 4))
+        self.assertEqual(zscore.getDataSeries("a")[1], 0)
+        self.assertEqual(zscore.getDataSeries("b")[-1], -1)
+        self.assertEqual(zscore.getDataSeries("a")[-1], None)
+
+        self.assertEqual(demean.getDataSeries("c")[:], [0, 0, 2, 0.5])
+        self.assertEqual(top.getDataSeries("a")[:], [0, 1, 0, None])
+        self.assertEqual(top.getDataSeries("b")[:], [1, 0, 0, 0])
+        self.assertEqual(bottom.getDataSeries("c")[:], [1, 0, 0, 1])
+        self.assertEqual(bottom.getLastValues()[1:].tolist(), [1, 1])
+        self.assertEqual(rank.getDataSeries("a").getDateTimes(), cs.getDateTimes())
+
+    def testUpdatedBeforeFeedEvent(self):
+        ranks = []
+        # Subscribe to the bar feed before building the cross section, just like a strategy would.
+        self.__feed.getNewValuesEvent().subscribe(lambda dateTime, bars: ranks.append(rank.getDataSeries("b")[-1]))
+        cs = crosssection.CrossSection(self.__feed)
+        rank = crosssection.Rank(cs)
+
+        self.__feed.start()
+        while not self.__feed.eof():
+            self.__feed.dispatch()
+        self.assertEqual(ranks, [3, 2, 1, 1])
@@ -70,3 +70,17 @@ class TestCase(common.TestCase):
         hds = build_hurst(values, num_values - 10, 2, 20)
         self.assertEquals(round(hds[-1], 1), 0)
         self.assertEquals(round(hds[-2], 1), 0)
+
+    def testMatchesHurstExpFun(self):
+        np.random.seed(1234)
+        values = np.cumsum(np.random.randn(3000)) + 1000
+        period = 200
+        ds = dataseries.SequenceDataSeries()
+        hds = hurst.HurstExponent(ds, period, 2, 20, maxLen=len(values))
+        for value in values:
+            ds.append(value)
+
+        logValues = np.log10(values)
+        for i in range(period - 1, len(values), 50):
+            expected = hurst.hurst_exp(logValues[i - period + 1:i + 1], 2, 20)
+            self.assertEqual(round(hds[i], 8), round(expected, 8))
@@ -19,11 +19,13 @@
 """
 
 import datetime
+import random
 
 from . import common
 
 from pyalgotrade.technical import linreg
 from pyalgotrade import dataseries
+from pyalgotrade.utils import dt
 
 
 class LeastSquaresRegressionTestCase(common.TestCase):
@@ -79,3 +81,33 @@ class LeastSquaresRegressionTestCase(common.TestCase):
         nextDateTime = nextDateTime + datetime.timedelta(milliseconds=50)
         seqDS.appendWithDateTime(nextDateTime, 5)
         self.assertEqual(round(lsReg[-1], 2), 5)
+
+    def testMatchesLsreg(self):
+        random.seed(1234)
+        windowSize = 20
+        seqDS = dataseries.SequenceDataSeries()
+        lsReg = linreg.LeastSquaresRegression(seqDS, windowSize, maxLen=3000)
+        slope = linreg.Slope(seqDS, windowSize, maxLen=3000)
+
+        timestamps = []
+        values = []
+        nextDateTime = datetime.datetime(2012, 1, 1)
+        for i in range(3000):
+            nextDateTime = nextDateTime + datetime.timedelta(minutes=random.randint(1, 10))
+            value = 100 + i * 0.01 + random.random()
+            seqDS.appendWithDateTime(nextDateTime, value)
+            timestamps.append(dt.datetime_to_timestamp(nextDateTime))
+            values.append(value)
+
+        for i in range(windowSize - 1, len(values), 97):
+            x = timestamps[i - windowSize + 1:i + 1]
+            y = values[i - windowSize + 1:i + 1]
+            a, b = linreg.lsreg(x, y)
+            self.assertEqual(round(lsReg[i], 6), round(a * x[-1] + b, 6))
+            self.assertEqual(round(slope[i], 6), round(linreg.lsreg(range(windowSize), y)[0], 6))
+
+        a, b = linreg.lsreg(timestamps[-windowSize:], values[-windowSize:])
+        futureDateTime = nextDateTime + datetime.timedelta(hours=1)
+        self.assertEqual(
+            round(lsReg.getValueAt(futureDateTime), 6), round(a * dt.datetime_to_timestamp(futureDateTime) + b, 6)
+        )
@@ -227,3 +227,16 @@ class EMATestCase(common.TestCase):
         self.assertEqual(len(ema), 2)
         self.assertEqual(len(ema[:]), 2)
         self.assertEqual(len(ema.getDateTimes()), 2)
+
+    def testBatchLongSeries(self):
+        values = [100 + (i % 7) * 0.5 for i in xrange(5000)]
+        for period in [2, 10]:
+            streamDS = dataseries.SequenceDataSeries()
+            streamed = ma.EMA(streamDS, period)
+            for value in values:
+                streamDS.append(value)
+            batchDS = dataseries.SequenceDataSeries()
+            batched = ma.EMA(batchDS, period)
+            batchDS.extendWithDateTimes([None] * len(values), values)
+
+            self.assertEqual(batched[:], streamed[:])
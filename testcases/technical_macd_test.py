@@ -39,3 +39,26 @@ class MACDTestCase(common.TestCase):
             self.assertEqual(common.safe_round(macdDs[i], 4), macdValues[i])
             self.assertEqual(common.safe_round(macdDs.getSignal()[i], 4), signalValues[i])
             self.assertEqual(common.safe_round(macdDs.getHistogram()[i], 4), histogramValues[i])
+
+    def testBatchAndEventOrder(self):
+        values = [16.39, 16.4999, 16.45, 16.43, 16.52, 16.51, 16.423, 16.41, 16.47, 16.45, 16.32, 16.36, 16.34, 16.59, 16.54, 16.52, 16.44, 16.47, 16.5, 16.45, 16.28, 16.07, 16.08, 16.1, 16.1, 16.09, 16.43, 16.4899, 16.59, 16.65, 16.78, 16.86, 16.86, 16.76]
+        ds = dataseries.SequenceDataSeries()
+        macdDs = macd.MACD(ds, 5, 13, 6)
+
+        # The signal and histogram should be up to date when the MACD gets a new value.
+        def onNewValue(dataSeries, dateTime, value):
+            self.assertEqual(len(macdDs.getSignal()), len(macdDs))
+            self.assertEqual(len(macdDs.getHistogram()), len(macdDs))
+            if value is not None:
+                self.assertEqual(value - macdDs.getSignal()[-1], macdDs.getHistogram()[-1])
+        macdDs.getNewValueEvent().subscribe(onNewValue)
+
+        for value in values:
+            ds.append(value)
+
+        batchDs = dataseries.SequenceDataSeries()
+        batchMacdDs = macd.MACD(batchDs, 5, 13, 6)
+        batchDs.extendWithDateTimes([None] * len(values), values)
+        self.assertEqual(batchMacdDs[:], macdDs[:])
+        self.assertEqual(batchMacdDs.getSignal()[:], macdDs.getSignal()[:])
+        self.assertEqual(batchMacdDs.getHistogram()[:], macdDs.getHistogram()[:])
@@ -0,0 +1,160 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import random
+
+import numpy as np
+
+from . import common
+
+from pyalgotrade import dataseries
+from pyalgotrade.technical import pairs
+
+
+def expected_values(values1, values2):
+    values1 = np.asarray(values1, dtype=float)
+    values2 = np.asarray(values2, dtype=float)
+    hedgeRatio = np.dot(values1, values2) / np.dot(values2, values2)
+    spreads = values1 - hedgeRatio * values2
+    zScore = (spreads[-1] - spreads.mean()) / spreads.std(ddof=1)
+    return hedgeRatio, spreads[-1], zScore
+
+
+class PairsTestCase(common.TestCase):
+    def __buildDataSeries(self, count):
+        return [dataseries.SequenceDataSeries() for i in range(count)]
+
+    def __assertPair(self, pair, values1, values2, windowSize):
+        for i in range(len(values1)):
+            if i + 1 < windowSize:
+                self.assertEqual(pair.getHedgeRatio()[i], None)
+                self.assertEqual(pair.getZScore()[i], None)
+            else:
+                begin = i + 1 - windowSize
+                hedgeRatio, spread, zScore = expected_values(values1[begin:i+1], values2[begin:i+1])
+                self.assertEqual(round(pair.getHedgeRatio()[i], 6), round(hedgeRatio, 6))
+                self.assertEqual(round(pair.getSpread()[i], 6), round(spread, 6))
+                self.assertEqual(round(pair.getZScore()[i], 6), round(zScore, 6))
+
+    def testSharedLegs(self):
+        random.seed(1234)
+        windowSize = 10
+        ds1, ds2, ds3 = self.__buildDataSeries(3)
+        legs = pairs.PairLegs([ds1, ds2, ds3], windowSize)
+        pair12 = legs.addPair(ds1, ds2)
+        pair32 = legs.addPair(ds3, ds2)
+
+        values = [[], [], []]
+        now = datetime.datetime(2000, 1, 1)
+        for i in range(100):
+            dateTime = now + datetime.timedelta(days=i)
+            for ds, dsValues in zip([ds1, ds2, ds3], values):
+                value = random.uniform(10, 20)
+                dsValues.append(value)
+                ds.appendWithDateTime(dateTime, value)
+
+        self.assertEqual(len(pair12.getHedgeRatio()), 100)
+        self.assertEqual(pair12.getSpread().getDateTimes(), ds1.getDateTimes())
+        self.__assertPair(pair12, values[0], values[1], windowSize)
+        self.__assertPair(pair32, values[2], values[1], windowSize)
+
+    def testAddPairLater(self):
+        random.seed(1234)
+        windowSize = 5
+        ds1, ds2 = self.__buildDataSeries(2)
+        legs = pairs.PairLegs([ds1, ds2], windowSize)
+        values1 = [random.uniform(10, 20) for i in range(20)]
+        values2 = [random.uniform(10, 20) for i in range(20)]
+        now = datetime.datetime(2000, 1, 1)
+        for i in range(20):
+            dateTime = now + datetime.timedelta(days=i)
+            ds1.appendWithDateTime(dateTime, values1[i])
+            ds2.appendWithDateTime(dateTime, values2[i])
+            if i == 7:
+                pair = legs.addPair(ds2, ds1)
+
+        self.assertEqual(len(pair.getZScore()), 12)
+        hedgeRatio, spread, zScore = expected_values(values2[-windowSize:], values1[-windowSize:])
+        self.assertEqual(round(pair.getHedgeRatio()[-1], 6), round(hedgeRatio, 6))
+        self.assertEqual(round(pair.getZScore()[-1], 6), round(zScore, 6))
+
+    def testUnalignedDateTimes(self):
+        ds1, ds2 = self.__buildDataSeries(2)
+        legs = pairs.PairLegs([ds1, ds2], 2)
+        pair = legs.addPair(ds1, ds2)
+        now = datetime.datetime(2000, 1, 1)
+        ds1.appendWithDateTime(now, 1)
+        ds1.appendWithDateTime(now + datetime.timedelta(days=1), 2)
+        ds2.appendWithDateTime(now + datetime.timedelta(days=1), 1)
+        ds1.appendWithDateTime(now + datetime.timedelta(days=2), 3)
+        ds2.appendWithDateTime(now + datetime.timedelta(days=2), 2)
+        ds2.appendWithDateTime(now + datetime.timedelta(days=3), 3)
+
+        self.assertEqual(pair.getHedgeRatio().getDateTimes(), [now + datetime.timedelta(days=1), now + datetime.timedelta(days=2)])
+        self.assertEqual(pair.getHedgeRatio()[0], None)
+        hedgeRatio, spread, zScore = expected_values([2, 3], [1, 2])
+        self.assertEqual(round(pair.getHedgeRatio()[-1], 6), round(hedgeRatio, 6))
+        self.assertEqual(round(pair.getSpread()[-1], 6), round(spread, 6))
+
+    def testRecalc(self):
+        random.seed(1234)
+        windowSize = 3
+        ds1, ds2 = self.__buildDataSeries(2)
+        legs = pairs.PairLegs([ds1, ds2], windowSize)
+        pair = legs.addPair(ds1, ds2)
+        values1 = [random.uniform(1000, 2000) for i in range(pairs.PairLegs.RECALC_PERIOD + 10)]
+        values2 = [random.uniform(1000, 2000) for i in range(pairs.PairLegs.RECALC_PERIOD + 10)]
+        now = datetime.datetime(2000, 1, 1)
+        for i in range(len(values1)):
+            dateTime = now + datetime.timedelta(days=i)
+            ds1.appendWithDateTime(dateTime, values1[i])
+            ds2.appendWithDateTime(dateTime, values2[i])
+
+        hedgeRatio, spread, zScore = expected_values(values1[-windowSize:], values2[-windowSize:])
+        self.assertEqual(round(pair.getHedgeRatio()[-1], 6), round(hedgeRatio, 6))
+        self.assertEqual(round(pair.getZScore()[-1], 4), round(zScore, 4))
+
+    def testHighPricedLegsWithTightSpread(self):
+        random.seed(1234)
+        windowSize = 50
+        count = pairs.PairLegs.RECALC_PERIOD + 200
+        ds1, ds2 = self.__buildDataSeries(2)
+        legs = pairs.PairLegs([ds1, ds2], windowSize, maxLen=count)
+        pair = legs.addPair(ds1, ds2)
+        values1 = []
+        values2 = []
+        value2 = 1000
+        now = datetime.datetime(2000, 1, 1)
+        for i in range(count):
+            value2 += random.gauss(0, 1)
+            values1.append(1.5 * value2 + random.gauss(0, 0.001))
+            values2.append(value2)
+            dateTime = now + datetime.timedelta(days=i)
+            ds1.appendWithDateTime(dateTime, values1[-1])
+            ds2.appendWithDateTime(dateTime, values2[-1])
+
+        self.__assertPair(pair, values1, values2, windowSize)
+
+    def testInvalidLeg(self):
+        ds1, ds2, ds3 = self.__buildDataSeries(3)
+        legs = pairs.PairLegs([ds1, ds2], 2)
+        with self.assertRaisesRegexp(Exception, "not one of the legs"):
+            legs.addPair(ds1, ds3)
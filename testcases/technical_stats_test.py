@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import warnings
+
 import numpy
 
 from . import common
@@ -70,3 +72,55 @@ class TestCase(common.TestCase):
             if i >= 4:
                 self.assertEqual(round(zscore[-1], 4), round(expected[i], 4))
             i += 1
+
+    def __testAccuracy(self, values, period):
+        seqDS = dataseries.SequenceDataSeries()
+        stdDev = stats.StdDev(seqDS, period, ddof=1, maxLen=len(values))
+        zscore = stats.ZScore(seqDS, period, maxLen=len(values))
+        for value in values:
+            seqDS.append(value)
+
+        for i in range(period - 1, len(values)):
+            window = values[i - period + 1:i + 1]
+            expectedStdDev = window.std(ddof=1)
+            self.assertTrue(abs(stdDev[i] - expectedStdDev) <= expectedStdDev * 1e-9)
+            # The mean calculated by numpy has rounding errors of its own, and those get amplified when the variance
+            # is low, so the Z-Score can't be checked as tightly.
+            expectedZScore = (window[-1] - window.mean()) / window.std()
+            self.assertTrue(abs(zscore[i] - expectedZScore) <= 1e-6)
+
+    def testAccuracy(self):
+        # Running moments must not drift from the values calculated over the whole window.
+        numpy.random.seed(1234)
+        self.__testAccuracy(10000 + numpy.cumsum(numpy.random.normal(0, 0.01, 5000)), 20)
+
+    def testAccuracyLowVariance(self):
+        numpy.random.seed(1234)
+        self.__testAccuracy(1e6 + numpy.random.normal(0, 0.001, 3000), 20)
+
+    def testAccuracyAfterVarianceDrops(self):
+        numpy.random.seed(1234)
+        values = numpy.concatenate((
+            1000 + numpy.random.normal(0, 10, 500),
+            1000 + numpy.random.normal(0, 0.001, 500),
+            1000 + numpy.random.normal(0, 10, 500),
+        ))
+        self.__testAccuracy(values, 20)
+
+    def testStdDevNotEnoughValues(self):
+        seqDS = dataseries.SequenceDataSeries()
+        stdDev = stats.StdDev(seqDS, 2, ddof=2)
+        with warnings.catch_warnings():
+            # numpy warns about the degrees of freedom.
+            warnings.simplefilter("ignore")
+            seqDS.append(1)
+            seqDS.append(2)
+            # Just like numpy.std does.
+            self.assertEqual(stdDev[-1], numpy.array([1, 2]).std(ddof=2))
+
+    def testStdDevConstantValues(self):
+        seqDS = dataseries.SequenceDataSeries()
+        stdDev = stats.StdDev(seqDS, 3)
+        for value in [100.1, 99.7, 100.3, 100.3, 100.3, 100.3]:
+            seqDS.append(value)
+        self.assertEqual(stdDev[-1], 0)
@@ -116,6 +116,21 @@ class TestCase(common.TestCase):
             self.assertEqual(round(stochFilter[i], 4), kValues[i])
             self.assertEqual(round(stochFilter.getD()[i], 4), dValues[i])
 
+    def testDUpToDateWithK(self):
+        highPrices = [3, 3, 3, 4, 5, 4]
+        lowPrices = [1, 1, 1, 2, 2, 1]
+        closePrices = [2, 2, 3, 4, 3, 2]
+
+        barDS = bards.BarDataSeries()
+        stochFilter = stoch.StochasticOscillator(barDS, 2, 2)
+        dValues = []
+        stochFilter.getNewValueEvent().subscribe(lambda ds, dateTime, value: dValues.append(stochFilter.getD()[-1]))
+        self.__fillBarDataSeries(barDS, closePrices, highPrices, lowPrices)
+
+        self.assertEqual(dValues, stochFilter.getD()[:])
+        self.assertEqual(len(stochFilter.getD()), len(closePrices))
+        self.assertTrue(values_equal(stochFilter.getD()[2], 75))
+
     def testZeroDivision(self):
         highPrices = [1, 1, 1]
         lowPrices = [1, 1, 1]
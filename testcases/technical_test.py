@@ -18,10 +18,32 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
+import os
+import random
+
+from six.moves import xrange
+
 from . import common
 
+from pyalgotrade import bar
 from pyalgotrade import technical
 from pyalgotrade import dataseries
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.dataseries import bards
+from pyalgotrade.technical import atr
+from pyalgotrade.technical import bollinger
+from pyalgotrade.technical import highlow
+from pyalgotrade.technical import hurst
+from pyalgotrade.technical import linebreak
+from pyalgotrade.technical import linreg
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import macd
+from pyalgotrade.technical import roc
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stats
+from pyalgotrade.technical import stoch
+from pyalgotrade.technical import vwap
 
 
 class TestEventWindow(technical.EventWindow):
@@ -33,8 +55,8 @@ class TestEventWindow(technical.EventWindow):
 
 
 class TestFilter(technical.EventBasedFilter):
-    def __init__(self, dataSeries):
-        technical.EventBasedFilter.__init__(self, dataSeries, TestEventWindow())
+    def __init__(self, dataSeries, dtype=None):
+        technical.EventBasedFilter.__init__(self, dataSeries, TestEventWindow(), dtype=dtype)
 
 
 class DataSeriesFilterTest(common.TestCase):
@@ -68,3 +90,392 @@ class DataSeriesFilterTest(common.TestCase):
         for i in range(0, len(testFilter)):
             self.assertEqual(testFilter[i], ds[i])
             self.assertEqual(testFilter.getDataSeries()[i], ds[i])
+
+    def testTypedFilter(self):
+        ds = dataseries.SequenceDataSeries()
+        testFilter = TestFilter(ds, dtype=float)
+        for i in range(10):
+            ds.append(i)
+            ds.append(None)
+
+        self.assertEqual(testFilter.getDType(), float)
+        self.assertEqual(testFilter[:], ds[:])
+        self.assertEqual(len(testFilter.values()), len(ds))
+
+    def testTypedIndicators(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 3)
+        typedSMA = ma.SMA(ds, 3, dtype=float)
+        typedStdDev = stats.StdDev(ds, 3, dtype=float)
+        typedMACD = macd.MACD(ds, 2, 3, 2, dtype=float)
+        typedBands = bollinger.BollingerBands(ds, 3, 2, dtype=float)
+        for i in range(10):
+            ds.append(i * 1.5)
+
+        self.assertEqual(sma.getDType(), None)
+        self.assertEqual(typedSMA.getDType(), float)
+        self.assertEqual(typedSMA[:], sma[:])
+        self.assertEqual(typedSMA.values().dtype, float)
+        self.assertEqual(typedStdDev.getDType(), float)
+        self.assertEqual(typedMACD.getSignal().getDType(), float)
+        self.assertEqual(typedBands.getUpperBand().getDType(), float)
+
+
+class CountingEventWindow(technical.EventWindow):
+    def __init__(self):
+        technical.EventWindow.__init__(self, 2)
+        self.updates = 0
+
+    def onNewValue(self, dateTime, value):
+        technical.EventWindow.onNewValue(self, dateTime, value)
+        self.updates += 1
+
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = self.getValues().sum()
+        return ret
+
+    def computeValues(self, values):
+        return technical.rolling_windows(values, 2).sum(axis=1)
+
+
+class LazyEvaluationTest(common.TestCase):
+    def testValuesCalculatedOnAccess(self):
+        ds = dataseries.SequenceDataSeries()
+        eventWindow = CountingEventWindow()
+        lazyFilter = technical.EventBasedFilter(ds, eventWindow)
+        lazyFilter.setLazy(True)
+        self.assertTrue(lazyFilter.isLazy())
+
+        for i in range(10):
+            ds.appendWithDateTime(datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i), i)
+        self.assertEqual(eventWindow.updates, 0)
+
+        self.assertEqual(lazyFilter[-1], 17)
+        # Values were calculated at once, not one by one.
+        self.assertEqual(eventWindow.updates, 0)
+        self.assertEqual(len(lazyFilter), 10)
+        self.assertEqual(lazyFilter[:], [None] + [i + i + 1 for i in range(9)])
+        self.assertEqual(lazyFilter.getDateTimes(), ds.getDateTimes())
+
+        ds.appendWithDateTime(datetime.datetime(2001, 1, 1), None)
+        self.assertEqual(lazyFilter[-1], 17)
+        self.assertEqual(eventWindow.updates, 1)
+
+    def testMatchesEagerEvaluation(self):
+        random.seed(1234)
+        ds = dataseries.SequenceDataSeries()
+        eager = ma.EMA(ds, 10)
+        lazy = ma.EMA(ds, 10)
+        lazy.setLazy(True)
+        for i in range(200):
+            ds.append(random.choice([None, random.random()]))
+            if i % 17 == 0:
+                self.assertEqual(lazy[-1], eager[-1])
+        self.assertEqual(lazy[:], eager[:])
+
+    def testSubscribersDisableDeferral(self):
+        ds = dataseries.SequenceDataSeries()
+        lazyFilter = ma.SMA(ds, 2)
+        lazyFilter.setLazy(True)
+        ds.append(1)
+        ds.append(2)
+        # Chained filters need every value as it gets calculated.
+        chained = ma.SMA(lazyFilter, 1)
+        ds.append(3)
+        self.assertEqual(chained[:], [None, 1.5, 2.5])
+
+    def testBoundedPending(self):
+        ds = dataseries.SequenceDataSeries()
+        eventWindow = CountingEventWindow()
+        lazyFilter = technical.EventBasedFilter(ds, eventWindow, maxLen=5)
+        lazyFilter.setLazy(True)
+        for i in range(12):
+            ds.append(None)
+        self.assertEqual(eventWindow.updates, 10)
+        lazyFilter.setLazy(False)
+        self.assertEqual(eventWindow.updates, 12)
+        self.assertEqual(len(lazyFilter), 5)
+
+
+class BatchEvaluationTest(common.TestCase):
+    def __buildValues(self, count):
+        random.seed(1234)
+        ret = [100.0]
+        for i in xrange(count - 1):
+            ret.append(ret[-1] + random.choice([-1, 0, 1]) * random.random())
+        return ret
+
+    def __checkBatch(self, buildFilter, values, chunkSize):
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i) for i in xrange(len(values))]
+
+        ds = dataseries.SequenceDataSeries()
+        streamed = buildFilter(ds)
+        for dateTime, value in zip(dateTimes, values):
+            ds.appendWithDateTime(dateTime, value)
+
+        # Load values in chunks, and stream the last ones to check that the window state is consistent.
+        ds = dataseries.SequenceDataSeries()
+        batched = buildFilter(ds)
+        streamFrom = len(values) - 5
+        for i in xrange(0, streamFrom, chunkSize):
+            end = min(i + chunkSize, streamFrom)
+            ds.extendWithDateTimes(dateTimes[i:end], values[i:end])
+        for dateTime, value in zip(dateTimes[streamFrom:], values[streamFrom:]):
+            ds.appendWithDateTime(dateTime, value)
+
+        self.assertEqual(len(batched), len(streamed))
+        self.assertEqual(batched.getDateTimes(), streamed.getDateTimes())
+        for expected, actual in zip(streamed, batched):
+            self.assertEqual(actual, expected)
+
+    def __testFilter(self, buildFilter):
+        values = self.__buildValues(200)
+        for chunkSize in [1, 3, 10, 195]:
+            self.__checkBatch(buildFilter, values, chunkSize)
+
+    def testSMA(self):
+        self.__testFilter(lambda ds: ma.SMA(ds, 15))
+
+    def testEMA(self):
+        self.__testFilter(lambda ds: ma.EMA(ds, 10))
+
+    def testWMA(self):
+        self.__testFilter(lambda ds: ma.WMA(ds, [1, 2, 3, 4]))
+
+    def testStdDev(self):
+        self.__testFilter(lambda ds: stats.StdDev(ds, 20, ddof=1))
+
+    def testZScore(self):
+        self.__testFilter(lambda ds: stats.ZScore(ds, 20))
+
+    def testROC(self):
+        self.__testFilter(lambda ds: roc.RateOfChange(ds, 12))
+
+    def testLongSeries(self):
+        # Batched values must be exactly the same as the streamed ones, not just close to them.
+        values = self.__buildValues(20000)
+        for buildFilter in [
+            lambda ds: ma.SMA(ds, 20), lambda ds: ma.EMA(ds, 20), lambda ds: ma.WMA(ds, range(1, 21)),
+            lambda ds: rsi.RSI(ds, 14), lambda ds: stats.StdDev(ds, 20)
+        ]:
+            self.__checkBatch(buildFilter, values, 5000)
+
+    def testROCWithZeros(self):
+        self.__checkBatch(lambda ds: roc.RateOfChange(ds, 1), [0, 0, 1, 0, 1, 2, 2, 0, 0, 0], 4)
+
+    def testHigh(self):
+        self.__testFilter(lambda ds: highlow.High(ds, 10))
+
+    def testLow(self):
+        self.__testFilter(lambda ds: highlow.Low(ds, 10))
+
+    def testRSI(self):
+        self.__testFilter(lambda ds: rsi.RSI(ds, 14))
+
+    def testWithoutKernel(self):
+        self.__testFilter(lambda ds: linreg.Slope(ds, 10))
+
+    def testChainedFilters(self):
+        self.__testFilter(lambda ds: ma.SMA(ma.EMA(ds, 5), 10))
+
+    def testNoneValues(self):
+        values = self.__buildValues(50)
+        for i in xrange(0, len(values), 7):
+            values[i] = None
+        for chunkSize in [1, 10, 45]:
+            self.__checkBatch(lambda ds: ma.SMA(ds, 5), values, chunkSize)
+            self.__checkBatch(lambda ds: ma.EMA(ds, 5), values, chunkSize)
+
+
+class PreloadTest(common.TestCase):
+    def __buildFeed(self):
+        ret = yahoofeed.Feed()
+        ret.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        return ret
+
+    def __checkPreload(self, buildFilter):
+        feed = self.__buildFeed()
+        streamed = buildFilter(feed["orcl"])
+        feed.loadAll()
+
+        feed = self.__buildFeed()
+        preloaded = buildFilter(feed["orcl"])
+        feed.preload(preloaded)
+        feed.loadAll()
+
+        self.assertEqual(len(preloaded), len(streamed))
+        self.assertEqual(preloaded.getDateTimes(), streamed.getDateTimes())
+        self.assertEqual(preloaded[:], streamed[:])
+        # The window is up to date once all the values were replayed.
+        self.assertEqual(preloaded.getEventWindow().getValue(), streamed.getEventWindow().getValue())
+
+    def testFieldFilters(self):
+        self.__checkPreload(lambda barDS: ma.SMA(barDS.getCloseDataSeries(), 15))
+        self.__checkPreload(lambda barDS: ma.EMA(barDS.getHighDataSeries(), 10))
+        self.__checkPreload(lambda barDS: rsi.RSI(barDS.getCloseDataSeries(), 14))
+
+    def testBarFilters(self):
+        self.__checkPreload(lambda barDS: atr.ATR(barDS, 14))
+        self.__checkPreload(lambda barDS: vwap.VWAP(barDS, 10))
+
+    def testValuesReplayed(self):
+        feed = self.__buildFeed()
+        eventWindow = CountingEventWindow()
+        preloaded = technical.EventBasedFilter(feed["orcl"].getCloseDataSeries(), eventWindow)
+        feed.preload(preloaded)
+        feed.loadAll()
+        self.assertEqual(eventWindow.updates, 0)
+        self.assertEqual(preloaded[-1], sum(feed["orcl"].getCloseDataSeries()[-2:]))
+
+    def testMismatch(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 2)
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i) for i in xrange(4)]
+        sma.preload(dateTimes, [1, 2, 3, 4])
+        ds.appendWithDateTime(dateTimes[0], 1)
+        ds.appendWithDateTime(dateTimes[1], 2)
+        # The rest of the preloaded values get discarded.
+        ds.appendWithDateTime(dateTimes[2], 5)
+        ds.appendWithDateTime(dateTimes[3], 4)
+        self.assertEqual(sma[:], [None, 1.5, 3.5, 4.5])
+
+    def testInvalidFilter(self):
+        feed = self.__buildFeed()
+        with self.assertRaisesRegexp(Exception, "not over the bars"):
+            feed.preload(ma.SMA(dataseries.SequenceDataSeries(), 2))
+
+
+class IndicatorRegistryTest(common.TestCase):
+    def testShared(self):
+        registry = technical.IndicatorRegistry()
+        ds = dataseries.SequenceDataSeries()
+        sma = registry.get(ma.SMA, ds, 2)
+        self.assertEqual(registry.get(ma.SMA, ds, 2), sma)
+        # Parameters are matched by name, with the defaults applied.
+        self.assertEqual(registry.get(ma.SMA, ds, period=2), sma)
+        self.assertEqual(registry.get(ma.SMA, ds, 2, maxLen=None), sma)
+        self.assertEqual(registry.get(ma.SMA, ds, 2, None), sma)
+        self.assertEqual(registry.get(ma.SMA, ds, 2, maxLen=10) == sma, False)
+        self.assertEqual(registry.get(ma.SMA, ds, 3) == sma, False)
+        self.assertEqual(registry.get(ma.EMA, ds, 2) == sma, False)
+        self.assertEqual(registry.get(ma.SMA, dataseries.SequenceDataSeries(), 2) == sma, False)
+        self.assertEqual(registry.get(ma.WMA, ds, [1, 2]), registry.get(ma.WMA, ds, weights=[1, 2]))
+        self.assertEqual(registry.get(stats.StdDev, ds, 2), registry.get(stats.StdDev, ds, 2, ddof=0))
+        self.assertEqual(registry.getIndicatorCount(), 7)
+        with self.assertRaises(TypeError):
+            registry.get(ma.SMA, ds, 2, invalid=1)
+
+        for i in xrange(5):
+            ds.append(i)
+        self.assertEqual(sma[:], [None, 0.5, 1.5, 2.5, 3.5])
+
+    def testSavedEvaluations(self):
+        registry = technical.IndicatorRegistry()
+        ds = dataseries.SequenceDataSeries()
+        registry.get(ma.SMA, ds, 2)
+        ds.appendWithDateTime(datetime.datetime(2000, 1, 1), 1)
+        self.assertEqual(registry.getSavedEvaluations(), 0)
+
+        registry.get(ma.SMA, ds, 2)
+        registry.get(ma.SMA, ds, 2)
+        registry.get(stats.StdDev, ds, 2)
+        ds.appendWithDateTime(datetime.datetime(2000, 1, 2), 2)
+        self.assertEqual(registry.getSavedEvaluations(), 2)
+        ds.extendWithDateTimes([datetime.datetime(2000, 1, 3), datetime.datetime(2000, 1, 4)], [3, 4])
+        self.assertEqual(registry.getSavedEvaluations(), 6)
+
+
+class StateTest(common.TestCase):
+    def __buildIndicators(self, ds, barDS):
+        return {
+            "sma": ma.SMA(ds, 10),
+            "ema": ma.EMA(ds, 10),
+            "wma": ma.WMA(ds, [1, 2, 3]),
+            "stddev": stats.StdDev(ds, 10),
+            "zscore": stats.ZScore(ds, 10),
+            "roc": roc.RateOfChange(ds, 5),
+            "rsi": rsi.RSI(ds, 14),
+            "high": highlow.High(ds, 10),
+            "slope": linreg.Slope(ds, 10),
+            "hurst": hurst.HurstExponent(ds, 50),
+            "macd": macd.MACD(ds, 5, 13, 6),
+            "bbands": bollinger.BollingerBands(ds, 20, 2),
+            "atr": atr.ATR(barDS, 14),
+            "stoch": stoch.StochasticOscillator(barDS, 14),
+            "vwap": vwap.VWAP(barDS, 10),
+            "linebreak": linebreak.LineBreak(barDS, 3),
+        }
+
+    def __getValues(self, indicators):
+        ret = {}
+        for name, indicator in indicators.items():
+            if name == "bbands":
+                values = indicator.getUpperBand()[:] + indicator.getMiddleBand()[:] + indicator.getLowerBand()[:]
+            elif name == "macd":
+                values = indicator[:] + indicator.getSignal()[:] + indicator.getHistogram()[:]
+            elif name == "stoch":
+                values = indicator[:] + indicator.getD()[:]
+            elif name == "linebreak":
+                values = [(line.getLow(), line.getHigh(), line.isWhite()) for line in indicator[:]]
+            else:
+                values = indicator[:]
+            ret[name] = [common.safe_round(value, 6) if isinstance(value, float) else value for value in values]
+        return ret
+
+    def testSaveAndLoad(self):
+        random.seed(1234)
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i) for i in xrange(200)]
+        values = [100.0]
+        for i in xrange(len(dateTimes) - 1):
+            values.append(values[-1] + random.choice([-1, 1]) * random.random())
+        bars = [
+            bar.BasicBar(dateTime, value, value + 1, value - 1, value, random.randint(1, 1000), value, bar.Frequency.DAY)
+            for dateTime, value in zip(dateTimes, values)
+        ]
+
+        # Process all the values.
+        ds = dataseries.SequenceDataSeries(maxLen=150)
+        barDS = bards.BarDataSeries(maxLen=150)
+        indicators = self.__buildIndicators(ds, barDS)
+        for i in xrange(len(dateTimes)):
+            if i == 100:
+                with common.TmpDir() as tmpPath:
+                    fileName = os.path.join(tmpPath, "states.pickle")
+                    technical.save_states(fileName, indicators)
+                    # Saving again replaces the file.
+                    technical.save_states(fileName, indicators)
+                    # Restore the state in new indicators and process the remaining values.
+                    restoredDS = dataseries.SequenceDataSeries(maxLen=150)
+                    restoredBarDS = bards.BarDataSeries(maxLen=150)
+                    restored = self.__buildIndicators(restoredDS, restoredBarDS)
+                    technical.load_states(fileName, restored)
+                    self.assertEqual(self.__getValues(restored), self.__getValues(indicators))
+                    restoredDS.setState(ds.getState())
+                    restoredBarDS.setState(barDS.getState())
+            ds.appendWithDateTime(dateTimes[i], values[i])
+            barDS.append(bars[i])
+            if i >= 100:
+                restoredDS.appendWithDateTime(dateTimes[i], values[i])
+                restoredBarDS.append(bars[i])
+
+        self.assertEqual(self.__getValues(restored), self.__getValues(indicators))
+        self.assertEqual(restored["sma"].getDateTimes(), indicators["sma"].getDateTimes())
+        self.assertEqual(restoredDS[:], ds[:])
+        self.assertEqual(restoredBarDS.getCloseDataSeries()[:], barDS.getCloseDataSeries()[:])
+
+    def testLazyAndNoEvents(self):
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 2)
+        sma.setLazy(True)
+        for i in xrange(5):
+            ds.append(i)
+        # Queued values are saved too.
+        state = sma.getState()
+
+        restored = ma.SMA(dataseries.SequenceDataSeries(), 2)
+        chained = ma.SMA(restored, 1)
+        restored.setState(state)
+        self.assertEqual(restored[:], [None, 0.5, 1.5, 2.5, 3.5])
+        self.assertEqual(len(chained), 0)
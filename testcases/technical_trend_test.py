@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import math
+
 from . import common
 
 from pyalgotrade.technical import linreg
@@ -45,6 +47,13 @@ class SlopeTest(common.TestCase):
         self.assertEqual(slope[0], 0.0)
         self.assertEqual(slope[1], -1.0)
 
+    def testSlopeSinglePoint(self):
+        # A line can't be fit to a single point, so the slope is NaN.
+        slope = self.__buildSlope([1, 2, 3], 1)
+        self.assertEqual(len(slope), 3)
+        for value in slope:
+            self.assertTrue(math.isnan(value))
+
 
 class TrendTest(common.TestCase):
     def __buildTrend(self, values, trendDays, positiveThreshold, negativeThreshold, trendMaxLen=None):
@@ -84,6 +93,10 @@ class TrendTest(common.TestCase):
         self.assertEqual(trend[1], False)
         self.assertEqual(len(trend), 2)
 
+    def testTrendSinglePoint(self):
+        trend = self.__buildTrend([1, 2, 3], 1, 0, 0)
+        self.assertEqual(trend[:], [None, None, None])
+
     def testInvalidThreshold(self):
         seqDS = dataseries.SequenceDataSeries()
         with self.assertRaisesRegexp(Exception, "Invalid thresholds"):
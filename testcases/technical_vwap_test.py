@@ -98,3 +98,15 @@ class VWAPTestCase(common.TestCase):
         outputValues = [14.605005665747331, 14.605416923506045]
         for i in xrange(2):
             self.assertEqual(round(vwap_[i], 4), round(outputValues[i], 4))
+
+    def testRollingSums(self):
+        barFeed = self.__getFeed()
+        bars = barFeed[VWAPTestCase.Instrument]
+        vwap_ = vwap.VWAP(bars, 20, True)
+        barFeed.loadAll()
+        for i in xrange(19, len(bars)):
+            window = [bars[j] for j in xrange(i - 19, i + 1)]
+            expected = sum([bar.getTypicalPrice() * bar.getVolume() for bar in window]) / float(sum([bar.getVolume() for bar in window]))
+            self.assertEqual(round(vwap_[i], 5), round(expected, 5))
+        # The window holds numbers instead of bars.
+        self.assertEqual(vwap_.getEventWindow().getValues().dtype.kind, "f")
@@ -19,7 +19,10 @@
 """
 
 import datetime
+import random
 
+import numpy as np
+import pytz
 from six.moves import xrange
 
 from . import common
@@ -185,6 +188,65 @@ class IntersectTestCase(common.TestCase):
         self.assertEqual(ix1, ix2)
 
 
+class IntersectArraysTestCase(common.TestCase):
+    def testMatchesIntersect(self):
+        cases = [
+            ([1, 2, 3], [4, 5, 6]),
+            ([], []),
+            ([1, 2, 3], [1, 2, 3]),
+            ([0, 2, 4], [1, 2, 3]),
+            ([1, 2, 5], [1, 3, 5]),
+            ([1, 2, 3], [3, 6]),
+            ([1, 1, 2, 2, 3, 3], [1, 2, 3]),
+        ]
+        for v1, v2 in cases:
+            values, ix1, ix2 = collections.intersect(v1, v2)
+            arrayValues, (arrayIx1, arrayIx2) = collections.intersect_arrays([v1, v2])
+            self.assertEqual(arrayValues.tolist(), values)
+            self.assertEqual(arrayIx1.tolist(), ix1)
+            self.assertEqual(arrayIx2.tolist(), ix2)
+
+    def testManyArrays(self):
+        arrays = [np.arange(0, 1000, step, dtype=np.int64) for step in [2, 3, 5]]
+        values, indexes = collections.intersect_arrays(arrays)
+        self.assertEqual(values.tolist(), list(xrange(0, 1000, 30)))
+        self.assertEqual(len(indexes), 3)
+        for array, ix in zip(arrays, indexes):
+            self.assertTrue((array[ix] == values).all())
+
+    def testDateTimes(self):
+        dateTimes = np.arange("2018-01-01", "2018-03-01", dtype="datetime64[D]")
+        values, (ix1, ix2) = collections.intersect_arrays([dateTimes, dateTimes[::7]])
+        self.assertTrue((values == dateTimes[::7]).all())
+        self.assertEqual(ix1.tolist(), list(xrange(0, len(dateTimes), 7)))
+        self.assertEqual(ix2.tolist(), list(xrange(len(values))))
+
+
+class RollingExtremumTestCase(common.TestCase):
+    def __testValues(self, values, windowSize):
+        lowest = collections.RollingExtremum(windowSize, True)
+        highest = collections.RollingExtremum(windowSize, False)
+        self.assertEqual(lowest.getValue(), None)
+        for i, value in enumerate(values):
+            lowest.append(value)
+            highest.append(value)
+            window = values[max(i - windowSize + 1, 0):i + 1]
+            self.assertEqual(len(lowest), len(window))
+            self.assertEqual(lowest.getValue(), min(window))
+            self.assertEqual(highest.getValue(), max(window))
+
+    def testRandom(self):
+        random.seed(1234)
+        values = [random.randint(0, 20) for i in xrange(500)]
+        for windowSize in [1, 2, 5, 50, 1000]:
+            self.__testValues(values, windowSize)
+
+    def testMonotonic(self):
+        values = list(xrange(100))
+        self.__testValues(values, 10)
+        self.__testValues(values[::-1], 10)
+
+
 class CollectionTestCaseBase(common.TestCase):
     def buildCollection(self, maxLen):
         raise NotImplementedError()
@@ -259,6 +321,24 @@ class CollectionTestCaseBase(common.TestCase):
         self.assertEqual(d[3], 20)
         self.assertEqual(d[-1], 20)
 
+    def _testExtendImpl(self):
+        for maxLen in [1, 3, 10]:
+            for chunkSize in [1, 2, 5, 12]:
+                d = self.buildCollection(maxLen)
+                seq = []
+                for i in xrange(0, 40, chunkSize):
+                    chunk = list(xrange(i, i + chunkSize))
+                    d.extend(chunk)
+                    seq = (seq + chunk)[-maxLen:]
+                    self.assertEqual(len(d), len(seq))
+                    self.assertEqual([d[j] for j in xrange(len(d))], seq)
+                    d.append(i)
+                    seq = (seq + [i])[-maxLen:]
+                    self.assertEqual(d[-1], seq[-1])
+                    self.assertEqual(d[0], seq[0])
+                d.extend([])
+                self.assertEqual(len(d), len(seq))
+
     def _testResizeEmptyImpl(self):
         d = self.buildCollection(10)
         self.assertEqual(len(d), 0)
@@ -291,6 +371,9 @@ class NumPyDequeTestCase(CollectionTestCaseBase):
     def testResize(self):
         CollectionTestCaseBase._testResizeImpl(self)
 
+    def testExtend(self):
+        CollectionTestCaseBase._testExtendImpl(self)
+
     def testResizeEmpty(self):
         CollectionTestCaseBase._testResizeEmptyImpl(self)
 
@@ -301,6 +384,25 @@ class NumPyDequeTestCase(CollectionTestCaseBase):
             d.append(i)
         self.assertEqual(d[0:3].sum(), 3)
 
+    def testSlidingWindow(self):
+        for maxLen in [1, 2, 7]:
+            d = collections.NumPyDeque(maxLen)
+            seq = []
+            for i in xrange(50):
+                d.append(i)
+                seq.append(i)
+                seq = seq[-maxLen:]
+                self.assertEqual(len(d), len(seq))
+                self.assertEqual(d.data().tolist(), seq)
+                self.assertEqual(d[-1], i)
+
+    def testDataIsAView(self):
+        d = collections.NumPyDeque(5)
+        for i in xrange(23):
+            d.append(i)
+            self.assertTrue(d.data().flags["C_CONTIGUOUS"])
+            self.assertIsNotNone(d.data().base)
+
 
 class ListDequeTestCase(CollectionTestCaseBase):
     def buildCollection(self, maxLen):
@@ -312,11 +414,188 @@ class ListDequeTestCase(CollectionTestCaseBase):
     def testResize(self):
         CollectionTestCaseBase._testResizeImpl(self)
 
+    def testExtend(self):
+        CollectionTestCaseBase._testExtendImpl(self)
+
+    def testResizeEmpty(self):
+        CollectionTestCaseBase._testResizeEmptyImpl(self)
+
+    def testWrapAround(self):
+        maxLen = 7
+        d = collections.ListDeque(maxLen)
+        seq = []
+        for i in xrange(30):
+            d.append(i)
+            seq.append(i)
+            seq = seq[-maxLen:]
+
+            self.assertEqual(len(d), len(seq))
+            for j in xrange(-len(seq), len(seq)):
+                self.assertEqual(d[j], seq[j])
+            for start in xrange(-10, 10):
+                for stop in xrange(-10, 10):
+                    self.assertEqual(d[start:stop], seq[start:stop])
+                self.assertEqual(d[start:], seq[start:])
+                self.assertEqual(d[start::2], seq[start::2])
+        with self.assertRaises(IndexError):
+            d[maxLen]
+        with self.assertRaises(IndexError):
+            d[-maxLen - 1]
+
+        self.assertEqual(d.data(), seq)
+        d.append(30)
+        d.resize(3)
+        self.assertEqual(d.data(), [28, 29, 30])
+
+    def testDataIsAView(self):
+        d = collections.ListDeque(3)
+        data = d.data()
+        for i in xrange(5):
+            d.append(i)
+        # The view reflects the values appended after it was built, in order.
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data, [2, 3, 4])
+        self.assertEqual([2, 3, 4], data)
+        self.assertNotEqual(data, [2, 3])
+        self.assertEqual(list(data), [2, 3, 4])
+        self.assertEqual(data[0], 2)
+        self.assertEqual(data[-1], 4)
+        self.assertEqual(data[1:], [3, 4])
+        self.assertEqual(data, d.data())
+        self.assertEqual(repr(data), "[2, 3, 4]")
+
+
+class BoundedListTestCase(CollectionTestCaseBase):
+    def buildCollection(self, maxLen):
+        return collections.BoundedList(maxLen)
+
+    def testBasicOps(self):
+        CollectionTestCaseBase._testBasicOpsImpl(self)
+
+    def testResize(self):
+        CollectionTestCaseBase._testResizeImpl(self)
+
+    def testExtend(self):
+        CollectionTestCaseBase._testExtendImpl(self)
+
+    def testResizeEmpty(self):
+        CollectionTestCaseBase._testResizeEmptyImpl(self)
+
+    def testSlicing(self):
+        d = collections.BoundedList(3)
+        d.extend(range(5))
+        d.append(5)
+        self.assertEqual(d, [3, 4, 5])
+        self.assertEqual(d[-2:], [4, 5])
+        self.assertEqual(type(d[:]), list)
+
+
+class TypedDequeTestCase(CollectionTestCaseBase):
+    def buildCollection(self, maxLen):
+        return collections.TypedDeque(maxLen)
+
+    def testBasicOps(self):
+        CollectionTestCaseBase._testBasicOpsImpl(self)
+
+    def testResize(self):
+        CollectionTestCaseBase._testResizeImpl(self)
+
+    def testExtend(self):
+        CollectionTestCaseBase._testExtendImpl(self)
+
     def testResizeEmpty(self):
         CollectionTestCaseBase._testResizeEmptyImpl(self)
 
+    def testNone(self):
+        d = collections.TypedDeque(10)
+        d.append(None)
+        d.append(1)
+        self.assertEqual(d[0], None)
+        self.assertEqual(d[:], [None, 1])
+        self.assertTrue(np.isnan(d.array()[0]))
+
+        d = collections.TypedDeque(10, np.int64)
+        with self.assertRaises(TypeError):
+            d.append(None)
+
+
+class MemMapDequeTestCase(common.TestCase):
+    def testAppendAndExtend(self):
+        d = collections.MemMapDeque(np.int64)
+        self.assertEqual(d.getMaxLen(), None)
+        size = collections.MemMapDeque.INITIAL_SIZE * 3
+        for i in xrange(size):
+            d.append(i)
+        d.extend(list(xrange(size, size * 3)))
+        self.assertEqual(len(d), size * 3)
+        self.assertEqual(d[0], 0)
+        self.assertEqual(d[-1], size * 3 - 1)
+        self.assertTrue((d.data() == np.arange(size * 3)).all())
+
+        # Resizing never discards values.
+        d.resize(10)
+        self.assertEqual(len(d), size * 3)
+        d.close()
+
+    def testTypedDeque(self):
+        d = collections.TypedDeque(None, float, collections.MemMapDeque(float))
+        d.append(None)
+        d.extend([1, 2])
+        self.assertEqual(d[:], [None, 1, 2])
+        self.assertIsInstance(d.array(), np.memmap)
+
+
+class MemMapTableTestCase(common.TestCase):
+    def testFields(self):
+        table = collections.MemMapTable([("a", np.int64), ("b", float)])
+        a = table.getField("a")
+        b = collections.TypedDeque(None, float, table.getField("b"))
+        size = collections.MemMapTable.INITIAL_SIZE * 3
+        for i in xrange(size):
+            a.append(i)
+            b.append(None if i == 0 else i * 2)
+        a.extend(list(xrange(size, size * 2)))
+
+        self.assertEqual(a.getMaxLen(), None)
+        self.assertEqual(len(a), size * 2)
+        self.assertEqual(len(b), size)
+        self.assertEqual(a[-1], size * 2 - 1)
+        self.assertTrue((a.data() == np.arange(size * 2)).all())
+        self.assertEqual(b[0:3], [None, 2, 4])
+        self.assertEqual(b[-1], (size - 1) * 2)
+        self.assertIsInstance(b.array(), np.memmap)
+
+
+class DateTimeDequeTestCase(common.TestCase):
+    def testBasicOps(self):
+        d = collections.DateTimeDeque(3)
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(hours=i) for i in xrange(5)]
+        for dateTime in dateTimes:
+            d.append(dateTime)
+        self.assertEqual(len(d), 3)
+        self.assertEqual(d[0], dateTimes[2])
+        self.assertEqual(d[-1], dateTimes[-1])
+        self.assertEqual(d[-2], dateTimes[-2])
+        self.assertEqual(d.data(), dateTimes[2:])
+        self.assertEqual(d.array().dtype, np.int64)
+
+        d.append(None)
+        self.assertEqual(d[-1], None)
+        self.assertEqual(d.data(), dateTimes[3:] + [None])
+
 
 class DateTimeTestCase(common.TestCase):
+    def testNanoSecondsConversions(self):
+        dateTime = datetime.datetime(2000, 1, 1, 1, 1, 1, microsecond=10)
+        self.assertEqual(dt.nanoseconds_to_datetime(dt.datetime_to_nanoseconds(dateTime)), dateTime)
+        self.assertEqual(dt.datetime_to_nanoseconds(dateTime), int(dt.datetime_to_timestamp(dateTime) * 1e6) * 1000)
+
+        dateTime = dt.localize(datetime.datetime(2000, 1, 1, 1, 1, 1, microsecond=10), pytz.timezone("US/Eastern"))
+        ns = dt.datetime_to_nanoseconds(dateTime)
+        self.assertEqual(ns, dt.datetime_to_nanoseconds(dt.as_utc(dateTime)))
+        self.assertEqual(dt.nanoseconds_to_datetime(ns, dateTime.tzinfo), dateTime)
+        self.assertEqual(dt.nanoseconds_to_datetime(ns, dateTime.tzinfo).utcoffset(), dateTime.utcoffset())
+
     def testTimeStampConversions(self):
         dateTime = datetime.datetime(2000, 1, 1)
         self.assertEqual(dt.timestamp_to_datetime(dt.datetime_to_timestamp(dateTime), False), dateTime)
@@ -241,6 +241,37 @@ class FeedTestCase(common.TestCase):
         self.assertEqual(len(barDS.getLowDataSeries()), 2)
         self.assertEqual(len(barDS.getAdjCloseDataSeries()), 2)
 
+    def testDataSeriesDType(self):
+        typedFeed = yahoofeed.Feed()
+        typedFeed.setDataSeriesDType(float)
+        typedFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"), marketsession.USEquities.getTimezone())
+        typedFeed.loadAll()
+        with self.assertRaisesRegexp(Exception, "The data-type can't be changed.*"):
+            typedFeed.setDataSeriesDType(None)
+
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"), marketsession.USEquities.getTimezone())
+        barFeed.loadAll()
+
+        typedDS = typedFeed[FeedTestCase.TestInstrument].getAdjCloseDataSeries()
+        ds = barFeed[FeedTestCase.TestInstrument].getAdjCloseDataSeries()
+        self.assertEqual(typedDS.getDType(), float)
+        self.assertEqual(typedDS[:], ds[:])
+        self.assertEqual(typedDS.getDateTimes(), ds.getDateTimes())
+
+    def testDataSeriesMemMap(self):
+        barFeed = yahoofeed.Feed(maxLen=2)
+        barFeed.setDataSeriesMemMap(True)
+        barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"), marketsession.USEquities.getTimezone())
+        barFeed.loadAll()
+        with self.assertRaisesRegexp(Exception, "Memory mapping can't be changed.*"):
+            barFeed.setDataSeriesMemMap(False)
+
+        barDS = barFeed[FeedTestCase.TestInstrument]
+        self.assertEqual(len(barDS), 2)
+        self.assertEqual(len(barDS.getCloseDataSeries()), 252)
+        self.assertEqual(barDS.getCloseDataSeries().getDateTimes()[-1], barDS.getDateTimes()[-1])
+
     def testReset(self):
         barFeed = yahoofeed.Feed()
         barFeed.addBarsFromCSV(FeedTestCase.TestInstrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"), marketsession.USEquities.getTimezone())
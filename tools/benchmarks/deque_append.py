@@ -0,0 +1,77 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+
+Measures the cost of appending to full ListDeque, NumPyDeque and SequenceDataSeries instances of increasing maxLen,
+and the cost of appending to a SequenceDataSeries and reading its datetimes right after, like strategies do on every bar.
+The time per operation should stay flat as maxLen grows.
+"""
+
+from __future__ import print_function
+
+import sys
+import os
+import timeit
+
+sys.path.append(os.path.join("..", ".."))  # For pyalgotrade
+
+from pyalgotrade.utils import collections
+from pyalgotrade import dataseries
+
+
+APPENDS = 100000
+
+
+def bench(factory, maxLen):
+    seq = factory(maxLen)
+    # Fill it up so every timed append discards a value.
+    for i in range(maxLen):
+        seq.append(i)
+    elapsed = timeit.timeit(lambda: seq.append(1), number=APPENDS)
+    return elapsed / APPENDS * 1e9
+
+
+def bench_read(maxLen):
+    ds = dataseries.SequenceDataSeries(maxLen)
+    for i in range(maxLen):
+        ds.append(i)
+
+    def appendAndRead():
+        ds.append(1)
+        ds.getDateTimes()[-1]
+
+    elapsed = timeit.timeit(appendAndRead, number=APPENDS)
+    return elapsed / APPENDS * 1e9
+
+
+def main():
+    print("%10s %20s %20s %20s %20s" % (
+        "maxLen", "ListDeque ns/append", "NumPyDeque ns/append", "SequenceDS ns/append", "SequenceDS ns/app+read"
+    ))
+    for maxLen in [10, 100, 1000, 10000, 100000, 1000000]:
+        print("%10d %20.1f %20.1f %20.1f %20.1f" % (
+            maxLen,
+            bench(collections.ListDeque, maxLen),
+            bench(collections.NumPyDeque, maxLen),
+            bench(dataseries.SequenceDataSeries, maxLen),
+            bench_read(maxLen)
+        ))
+
+
+if __name__ == "__main__":
+    main()